@@ -1,15 +1,26 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 from flask_socketio import SocketIO, emit
 import os
+import sys
 import json
+import signal
 import shutil
 import subprocess
 import time
 import logging
-from utils.server_detector import detect_servers
+from utils.server_registry import ServerRegistry
+from utils.server_discovery import ServerDiscovery
+from utils.disk_usage import DiskUsageTracker
 from utils.server_manager import ServerManager
+from utils.console_pipeline import ConsolePipeline
+from utils.lag_tracker import LagTracker, TickPoller
 from utils.server_creator import ServerCreator
-from utils.api import register_api
+from utils.job_manager import JobManager
+from utils.resource_sampler import ResourceSampler
+from utils.metrics_store import MetricsStore
+from utils.api import (register_api, delete_server_task, list_files_page, send_server_file,
+                       receive_server_file, view_file_window, patch_server_file)
+from utils.prometheus import instrument_socketio
 from config import Config
 
 # Set up logging
@@ -24,22 +35,58 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config.from_object(Config)
 socketio = SocketIO(app)
+instrument_socketio(socketio)
 
-# Initialize server manager and creator
-server_manager = ServerManager(app.config['SERVERS_DIR'], socketio)
+# Initialize server registry, manager and creator
+server_registry = ServerRegistry(app.config['SERVERS_DIR'], app.config['SERVER_REGISTRY_REFRESH_INTERVAL'])
+server_discovery = ServerDiscovery(server_registry)
+disk_usage_tracker = DiskUsageTracker(
+    server_registry,
+    rescan_interval=app.config['DISK_USAGE_RESCAN_INTERVAL'],
+    debounce=app.config['DISK_USAGE_DEBOUNCE']
+)
+console_pipeline = ConsolePipeline(
+    socketio,
+    flush_interval=app.config['CONSOLE_BATCH_INTERVAL'] / 1000,
+    max_batch_lines=app.config['CONSOLE_BATCH_LINES'],
+    max_inflight=app.config['CONSOLE_MAX_INFLIGHT']
+)
+lag_tracker = LagTracker(console_pipeline, history=app.config['TPS_HISTORY'])
+server_manager = ServerManager(
+    app.config['SERVERS_DIR'],
+    socketio,
+    server_registry,
+    console_pipeline,
+    journal_enabled=app.config['CONSOLE_JOURNAL_ENABLED'],
+    journal_segment_lines=app.config['CONSOLE_JOURNAL_SEGMENT_LINES'],
+    journal_max_segments=app.config['CONSOLE_JOURNAL_SEGMENTS'],
+    line_parsers=[lag_tracker],
+    file_view_window=app.config['FILE_VIEW_MAX_WINDOW']
+)
 server_creator = ServerCreator(app.config['SERVERS_DIR'])
+job_manager = JobManager(socketio, max_workers=app.config['JOB_WORKERS'])
+metrics_store = MetricsStore(
+    server_registry.get_path,
+    interval=app.config['METRICS_INTERVAL']
+) if app.config['METRICS_STORE_ENABLED'] else None
+resource_sampler = ResourceSampler(
+    socketio,
+    server_manager.running_servers,
+    interval=app.config['METRICS_INTERVAL'],
+    capacity=app.config['METRICS_HISTORY'],
+    store=metrics_store
+)
 
 @app.route('/')
 def index():
     """Render the main dashboard page."""
-    servers = detect_servers(app.config['SERVERS_DIR'])
+    servers = server_registry.get_all()
     return render_template('index.html', servers=servers)
 
 @app.route('/server/<server_id>')
 def server_detail(server_id):
     """Render the server detail page."""
-    servers = detect_servers(app.config['SERVERS_DIR'])
-    server = next((s for s in servers if s['id'] == server_id), None)
+    server = server_registry.get(server_id)
     
     if not server:
         return redirect(url_for('index'))
@@ -49,20 +96,45 @@ def server_detail(server_id):
 @app.route('/api/servers')
 def get_servers():
     """API endpoint to get all servers."""
-    servers = detect_servers(app.config['SERVERS_DIR'])
+    servers = server_registry.get_all()
     return jsonify(servers)
 
+@app.route('/api/servers/status')
+def servers_status():
+    """API endpoint to get the status of many servers at once."""
+    ids = request.args.get('ids')
+    server_ids = [server_id for server_id in ids.split(',') if server_id] if ids else None
+    console_lines = max(0, min(request.args.get('console', 0, type=int), 1000))
+    statuses = server_manager.get_servers_status(server_ids, console_lines)
+    return jsonify(statuses)
+
 @app.route('/api/server/<server_id>/start', methods=['POST'])
 def start_server(server_id):
-    """API endpoint to start a server."""
-    success = server_manager.start_server(server_id)
-    return jsonify({'success': success})
+    """API endpoint to start a server in the background."""
+    if not server_registry.get(server_id):
+        return jsonify({'success': False, 'message': 'Server not found'}), 404
+    
+    job = job_manager.submit('start', server_id, server_manager.start_server, server_id)
+    return jsonify({'success': True, 'job': job}), 202
 
 @app.route('/api/server/<server_id>/stop', methods=['POST'])
 def stop_server(server_id):
-    """API endpoint to stop a server."""
-    success = server_manager.stop_server(server_id)
-    return jsonify({'success': success})
+    """API endpoint to stop a server in the background."""
+    if not server_registry.get(server_id):
+        return jsonify({'success': False, 'message': 'Server not found'}), 404
+    
+    job = job_manager.submit('stop', server_id, server_manager.stop_server, server_id)
+    return jsonify({'success': True, 'job': job}), 202
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """API endpoint to get the status of a background job."""
+    job = job_manager.get(job_id)
+    
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    return jsonify({'success': True, 'job': job})
 
 @app.route('/api/server/<server_id>/status')
 def server_status(server_id):
@@ -70,6 +142,20 @@ def server_status(server_id):
     status = server_manager.get_server_status(server_id)
     return jsonify(status)
 
+@app.route('/api/server/<server_id>/metrics')
+def server_metrics(server_id):
+    """API endpoint to get a server's recent resource usage."""
+    try:
+        points = max(1, min(int(request.args.get('points', 120)), 5000))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'points must be a number'}), 400
+    
+    return jsonify({
+        'interval': resource_sampler.interval,
+        'latest': resource_sampler.latest(server_id),
+        'points': resource_sampler.query(server_id, max_points=points)
+    })
+
 @app.route('/api/server/<server_id>/properties', methods=['GET', 'POST'])
 def server_properties(server_id):
     """API endpoint to get or update server properties."""
@@ -84,39 +170,80 @@ def server_properties(server_id):
 @app.route('/api/server/<server_id>/files', methods=['GET'])
 def list_server_files(server_id):
     """API endpoint to list server files."""
+    # Paged listing when the client asks for pages
+    if 'limit' in request.args or 'cursor' in request.args:
+        return list_files_page(server_manager, server_id)
+    
     path = request.args.get('path', '')
     files = server_manager.list_server_files(server_id, path)
     return jsonify(files)
 
-@app.route('/api/server/<server_id>/file', methods=['GET', 'POST'])
+@app.route('/api/server/<server_id>/file', methods=['GET', 'POST', 'PATCH'])
 def server_file(server_id):
-    """API endpoint to get or update a server file."""
+    """API endpoint to get, update or patch a server file."""
     path = request.args.get('path', '')
     
     if request.method == 'POST':
-        content = request.json.get('content', '')
-        success = server_manager.update_server_file(server_id, path, content)
-        return jsonify({'success': success})
+        data = request.json
+        result = server_manager.update_server_file(server_id, path, data.get('content', ''),
+                                                   base_hash=data.get('base_hash'))
+        return jsonify(result), 409 if result.get('conflict') else 200
+    elif request.method == 'PATCH':
+        return patch_server_file(server_manager, server_id, path)
     else:
-        content = server_manager.get_server_file(server_id, path)
-        return jsonify({'content': content})
+        file = server_manager.read_server_file(server_id, path)
+        if not file:
+            return jsonify({'content': '', 'hash': None})
+        return jsonify(file)
+
+@app.route('/api/server/<server_id>/file/raw', methods=['GET', 'PUT'])
+def server_file_raw(server_id):
+    """API endpoint to download or upload a server file as a stream."""
+    path = request.args.get('path', '')
+    
+    if request.method == 'PUT':
+        return receive_server_file(server_manager, server_id, path)
+    return send_server_file(server_manager, server_id, path)
+
+@app.route('/api/server/<server_id>/file/view', methods=['GET'])
+def server_file_view(server_id):
+    """API endpoint to read a window of a large server file."""
+    return view_file_window(server_manager, server_id)
 
 @socketio.on('connect')
 def handle_connect():
     """Handle WebSocket connection."""
     logger.info('Client connected')
+    
+    # Send the current state of every server so clients never have to poll
+    emit('servers_snapshot', {'servers': server_manager.get_state_snapshot()})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle WebSocket disconnection."""
     logger.info('Client disconnected')
+    console_pipeline.drop_client(request.sid)
 
 @socketio.on('join_server')
 def handle_join_server(data):
     """Handle joining a server's console room."""
     server_id = data.get('server_id')
+    
+    # A malformed cursor just means the client gets the recent history
+    try:
+        since = int(data['since']) if data.get('since') is not None else None
+    except (TypeError, ValueError):
+        since = None
+    
     if server_id:
-        server_manager.attach_console(server_id)
+        server_manager.attach_console(server_id, request.sid, since)
+
+@socketio.on('leave_server')
+def handle_leave_server(data):
+    """Handle leaving a server's console room."""
+    server_id = data.get('server_id')
+    if server_id:
+        server_manager.detach_console(server_id, request.sid)
 
 @socketio.on('command')
 def handle_command(data):
@@ -143,6 +270,10 @@ def create_server():
         memory=data.get('memory', '2G'),
         options=data.get('options', {})
     )
+    if result.get('success'):
+        server = server_registry.update_server(result['server_name'])
+        if server:
+            disk_usage_tracker.refresh(server['path'])
     return jsonify(result)
 
 @app.route('/api/servers/available-versions')
@@ -153,27 +284,28 @@ def get_available_versions():
 
 @app.route('/api/server/<server_id>/delete', methods=['POST'])
 def delete_server(server_id):
-    """API endpoint to delete a server."""
-    # First check if server is running
-    if server_id in server_manager.running_servers:
-        # Stop the server first
-        success = server_manager.stop_server(server_id)
-        if not success:
-            return jsonify({'success': False, 'message': 'Could not stop the server before deletion'})
-    
-    # Get server name from ID
-    servers = detect_servers(app.config['SERVERS_DIR'])
-    server = next((s for s in servers if s['id'] == server_id), None)
-    
-    if not server:
+    """API endpoint to delete a server in the background."""
+    if not server_registry.get(server_id):
         return jsonify({'success': False, 'message': 'Server not found'})
     
-    # Delete the server
-    result = server_creator.delete_server(server['name'])
-    return jsonify(result)
+    job = job_manager.submit('delete', server_id, delete_server_task,
+                             server_manager, server_creator, server_registry, server_id,
+                             resource_sampler, disk_usage_tracker)
+    return jsonify({'success': True, 'job': job}), 202
+
+def handle_shutdown(signum, frame):
+    """Stop every running server in parallel before exiting on SIGTERM."""
+    logger.info("Received SIGTERM, shutting down")
+    
+    if app.config['SHUTDOWN_STOP_SERVERS'] and server_manager.running_servers:
+        result = server_manager.stop_all()
+        logger.info(f"Stopped servers before exit: {result['message']}")
+    
+    sys.exit(0)
 
 # Register the API
-register_api(app, server_manager, server_creator)
+register_api(app, server_manager, server_creator, server_registry, job_manager, resource_sampler,
+             lag_tracker, disk_usage_tracker)
 
 if __name__ == '__main__':
     # Ensure the servers directory exists
@@ -182,6 +314,21 @@ if __name__ == '__main__':
     # Create cache directory for server downloads
     os.makedirs(os.path.join(os.path.dirname(app.config['SERVERS_DIR']), 'cache'), exist_ok=True)
     
+    # Ask servers for their tick rate so TPS is tracked without user commands
+    if app.config['TPS_POLL_INTERVAL'] > 0:
+        TickPoller(server_manager, app.config['TPS_POLL_INTERVAL'])
+    
+    # Drain running servers when the service manager stops us
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    
+    # Watch the servers directory instead of rescanning it
+    if app.config['SERVER_WATCH_ENABLED']:
+        server_discovery.start()
+    
+    # Measure server disk usage in the background
+    if app.config['DISK_USAGE_ENABLED']:
+        disk_usage_tracker.start()
+    
     # Log API key status
     if app.config.get('API_KEY'):
         logger.info("API authentication is enabled")
@@ -0,0 +1,9 @@
+"""
+Benchmarks for McSM.
+
+Each suite builds its own synthetic servers directory, measures one part of
+the manager and returns plain dictionaries, so results can be written as
+JSON and compared across versions:
+
+    python -m benchmarks --output results.json
+"""
@@ -0,0 +1,64 @@
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import subprocess
+from config import Config
+from benchmarks import discovery, console, api
+
+def git_revision():
+    """Get the current git commit, if the tree is a git checkout."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the McSM benchmark suite and print the results as JSON.')
+    parser.add_argument('--suite', action='append', choices=('discovery', 'console', 'api'),
+                        help='Suite to run (repeatable, default: all)')
+    parser.add_argument('--servers', default='10,100,1000',
+                        help='Comma-separated server counts for the discovery suite')
+    parser.add_argument('--api-servers', type=int, default=100, help='Servers in the API suite')
+    parser.add_argument('--lines', type=int, default=200000, help='Console lines in the console suite')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement')
+    parser.add_argument('--output', help='Write the results to this file instead of stdout')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    suites = args.suite or ['discovery', 'console', 'api']
+
+    report = {
+        'version': Config.VERSION,
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started_at': time.time(),
+        'results': {}
+    }
+
+    if 'discovery' in suites:
+        counts = [int(count) for count in args.servers.split(',') if count]
+        report['results']['discovery'] = discovery.run(counts, args.repeat)
+
+    if 'console' in suites:
+        report['results']['console'] = {
+            'journal': console.run(args.lines, journal=True),
+            'no_journal': console.run(args.lines, journal=False)
+        }
+
+    if 'api' in suites:
+        report['results']['api'] = api.run(args.api_servers, args.repeat * 10)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    sys.exit(main())
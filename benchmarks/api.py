@@ -0,0 +1,52 @@
+import tempfile
+from flask import Flask
+from config import Config
+from utils.server_registry import ServerRegistry
+from utils.server_manager import ServerManager
+from utils.server_creator import ServerCreator
+from utils.api import register_api
+from benchmarks.fixtures import build_servers_dir, RecordingSocketIO
+from benchmarks.timing import measure
+
+def run(servers=100, repeat=50):
+    """
+    Measure /api/v1 endpoint latency through the Flask test client.
+
+    Args:
+        servers (int): Number of servers in the synthetic servers directory
+        repeat (int): Timed requests per endpoint
+
+    Returns:
+        dict: Latency summaries keyed by endpoint
+    """
+    with tempfile.TemporaryDirectory(prefix='mcsm-bench-') as servers_dir:
+        build_servers_dir(servers_dir, servers)
+
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        app.config['API_KEY'] = ''
+
+        socketio = RecordingSocketIO()
+        registry = ServerRegistry(servers_dir)
+        manager = ServerManager(servers_dir, socketio, registry, journal_enabled=False)
+        register_api(app, manager, ServerCreator(servers_dir), registry)
+
+        client = app.test_client()
+        server_id = registry.get_all()[0]['id']
+
+        endpoints = {
+            'GET /api/v1/health': '/api/v1/health',
+            'GET /api/v1/servers': '/api/v1/servers',
+            'GET /api/v1/servers/status': '/api/v1/servers/status',
+            'GET /api/v1/servers/<id>': f'/api/v1/servers/{server_id}',
+            'GET /api/v1/servers/<id>/console': f'/api/v1/servers/{server_id}/console'
+        }
+
+        results = {'servers': servers}
+        for name, url in endpoints.items():
+            def request():
+                response = client.get(url)
+                assert response.status_code < 500, f'{url} returned {response.status_code}'
+            results[name] = measure(request, repeat)
+
+    return results
@@ -0,0 +1,65 @@
+import os
+import time
+import tempfile
+from utils.server_registry import ServerRegistry
+from utils.server_manager import ServerManager
+from utils.console_pipeline import ConsolePipeline
+from benchmarks.fixtures import build_servers_dir, write_console_launcher, RecordingSocketIO
+
+def run(lines=200000, line_length=100, journal=True, timeout=120):
+    """
+    Measure console throughput from the server's stdout to Socket.IO emits.
+
+    A stand-in java executable prints `lines` lines as fast as it can; the
+    clock runs from start_server() until the last line has been emitted in
+    a console_batch to a subscribed client.
+
+    Args:
+        lines (int): Console lines printed by the server
+        line_length (int): Approximate length of each line
+        journal (bool): Whether lines are also written to the console journal
+        timeout (float): Seconds to wait for every line to arrive
+
+    Returns:
+        dict: Elapsed time, lines per second and megabytes per second
+    """
+    java_path = os.environ.get('JAVA_PATH')
+
+    with tempfile.TemporaryDirectory(prefix='mcsm-bench-') as root:
+        servers_dir = os.path.join(root, 'servers')
+        build_servers_dir(servers_dir, 1)
+        os.environ['JAVA_PATH'] = write_console_launcher(os.path.join(root, 'java'), lines, line_length)
+
+        socketio = RecordingSocketIO()
+        registry = ServerRegistry(servers_dir)
+        pipeline = ConsolePipeline(socketio, flush_interval=0.01)
+        manager = ServerManager(servers_dir, socketio, registry, pipeline, journal_enabled=journal)
+        server_id = registry.get_all()[0]['id']
+        pipeline.subscribe(server_id, 'bench-client')
+
+        try:
+            started = time.perf_counter()
+            manager.start_server(server_id)
+
+            deadline = started + timeout
+            while socketio.console_entries < lines and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            elapsed = time.perf_counter() - started
+
+            manager.stop_server(server_id)
+        finally:
+            if java_path is None:
+                os.environ.pop('JAVA_PATH', None)
+            else:
+                os.environ['JAVA_PATH'] = java_path
+
+    delivered = socketio.console_entries
+    return {
+        'lines': lines,
+        'delivered': delivered,
+        'journal': journal,
+        'elapsed_s': round(elapsed, 4),
+        'lines_per_second': round(delivered / elapsed),
+        'mb_per_second': round(delivered * line_length / elapsed / 1e6, 3),
+        'console_batches': socketio.events.get('console_batch', 0)
+    }
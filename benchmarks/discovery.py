@@ -0,0 +1,43 @@
+import os
+import tempfile
+from utils.server_detector import detect_servers, get_server_info
+from utils.server_registry import ServerRegistry
+from utils.server_manager import ServerManager
+from benchmarks.fixtures import build_servers_dir, RecordingSocketIO
+from benchmarks.timing import measure
+
+def run(counts=(10, 100, 1000), repeat=5):
+    """
+    Measure how server discovery and file listing scale with the number of servers.
+
+    Args:
+        counts (tuple): Numbers of servers to benchmark with
+        repeat (int): Timed runs per measurement
+
+    Returns:
+        dict: Results keyed by number of servers
+    """
+    results = {}
+
+    for count in counts:
+        with tempfile.TemporaryDirectory(prefix='mcsm-bench-') as servers_dir:
+            names = build_servers_dir(servers_dir, count)
+
+            # A modded server exercises the mods/ scan as well
+            modded = os.path.join(servers_dir, names[min(2, count - 1)])
+
+            registry = ServerRegistry(servers_dir)
+            manager = ServerManager(servers_dir, RecordingSocketIO(), registry, journal_enabled=False)
+            server_id = registry.get_all()[0]['id']
+
+            scan = measure(lambda: detect_servers(servers_dir), repeat)
+            results[str(count)] = {
+                'detect_servers': scan,
+                'detect_servers_per_server_ms': round(scan['median_ms'] / count, 4),
+                'get_server_info': measure(lambda: get_server_info(modded, os.path.basename(modded)), repeat),
+                'list_server_files_root': measure(lambda: manager.list_server_files(server_id, ''), repeat),
+                'list_server_files_config': measure(lambda: manager.list_server_files(server_id, 'config'), repeat),
+                'registry_get_all': measure(registry.get_all, repeat)
+            }
+
+    return results
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Stand-in Minecraft server for load and lifecycle testing without Java.
+
+Point JAVA_PATH at this script and McSM launches it instead of java. It
+accepts (and ignores) the JVM arguments ServerManager passes, prints a
+vanilla-style startup log ending in the "Done (Xs)!" line, answers the
+stop, list, say and tps commands, and can generate player joins/leaves,
+log spam, lag warnings, crashes and hangs.
+
+Behaviour is set with environment variables, which every fake server
+inherits from McSM, and can be overridden per server with a
+fake_server.json file in the server folder using the same names in lower
+case without the prefix (e.g. {"mode": "crash", "crash_after": 30}):
+
+    FAKE_SERVER_MODE          normal, crash (exit with an error after
+                              CRASH_AFTER seconds), hang (stop responding
+                              after HANG_AFTER seconds, ignoring stop) or
+                              fail (exit during startup)
+    FAKE_SERVER_STARTUP       Seconds the startup log takes (default 2)
+    FAKE_SERVER_SPAM          Console lines per second once started (default 0)
+    FAKE_SERVER_PLAYERS       Seconds between player joins/leaves (default 0: none)
+    FAKE_SERVER_MAX_PLAYERS   Players online at most (default 5)
+    FAKE_SERVER_LAG           Seconds between "Can't keep up!" warnings (default 0: none)
+    FAKE_SERVER_CRASH_AFTER   Seconds after startup before crashing (default 10)
+    FAKE_SERVER_HANG_AFTER    Seconds after startup before hanging (default 10)
+    FAKE_SERVER_STOP_DELAY    Seconds the shutdown log takes (default 0.5)
+    FAKE_SERVER_SEED          Random seed, for repeatable runs
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import threading
+
+DEFAULTS = {
+    'mode': 'normal',
+    'startup': 2.0,
+    'spam': 0.0,
+    'players': 0.0,
+    'max_players': 5,
+    'lag': 0.0,
+    'crash_after': 10.0,
+    'hang_after': 10.0,
+    'stop_delay': 0.5,
+    'seed': None
+}
+
+MODES = ('normal', 'crash', 'hang', 'fail')
+
+PLAYER_NAMES = ('Steve', 'Alex', 'Notch', 'Jeb_', 'Dinnerbone', 'Grumm', 'Herobrine', 'Kai',
+                'Noor', 'Sunny', 'Zuri', 'Efe', 'Makena', 'Ari')
+
+SPAM_LINES = (
+    ('Server thread', 'INFO', 'Saving the game (this may take a moment!)'),
+    ('Server thread', 'INFO', 'Saved the game'),
+    ('Server thread', 'WARN', 'Fetching packet for removed entity Zombie'),
+    ('Server thread', 'INFO', 'Villager died, message: Villager was slain by Zombie'),
+    ('Worker-Main-3', 'INFO', 'Loaded 7 recipes'),
+    ('Server thread', 'WARN', 'Mismatch in destroy block pos: BlockPos{x=12, y=64, z=-30}')
+)
+
+def load_settings(argv, cwd):
+    """
+    Read the settings from the environment and the server folder.
+
+    Args:
+        argv (list): Command line arguments (the java command line)
+        cwd (str): Server folder
+
+    Returns:
+        dict: Settings keyed by DEFAULTS names, plus 'jar' and 'version'
+    """
+    settings = dict(DEFAULTS)
+
+    for name, default in DEFAULTS.items():
+        value = os.environ.get(f'FAKE_SERVER_{name.upper()}')
+        if value is not None:
+            settings[name] = value
+
+    try:
+        with open(os.path.join(cwd, 'fake_server.json'), 'r') as f:
+            settings.update({name: value for name, value in json.load(f).items() if name in DEFAULTS})
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f'fake_server.json ignored: {e}', file=sys.stderr)
+
+    for name in ('startup', 'spam', 'players', 'lag', 'crash_after', 'hang_after', 'stop_delay'):
+        settings[name] = float(settings[name])
+    settings['max_players'] = int(settings['max_players'])
+    if settings['mode'] not in MODES:
+        settings['mode'] = 'normal'
+
+    # The jar follows -jar in the java command line
+    settings['jar'] = argv[argv.index('-jar') + 1] if '-jar' in argv[:-1] else 'server.jar'
+
+    # McSM keeps the Minecraft version of created servers next to the jar
+    try:
+        with open(os.path.join(cwd, 'mcsm_info.json'), 'r') as f:
+            settings['version'] = json.load(f).get('version') or '1.20.4'
+    except (OSError, ValueError):
+        settings['version'] = '1.20.4'
+
+    return settings
+
+def read_properties(cwd):
+    """Read server.properties from the server folder, if there is one."""
+    properties = {}
+    try:
+        with open(os.path.join(cwd, 'server.properties'), 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    properties[key.strip()] = value.strip()
+    except OSError:
+        pass
+    return properties
+
+class FakeServer:
+    """A process that behaves enough like a Minecraft server for McSM."""
+
+    def __init__(self, settings, properties):
+        self.settings = settings
+        self.properties = properties
+        self.random = random.Random(settings['seed'])
+        self.players = []
+        self.started_at = time.time()
+        self.ready_at = None
+        self.stopping = False
+        self.hung = False
+        self._output_lock = threading.Lock()
+
+    def log(self, message, thread='Server thread', level='INFO'):
+        """Print a console line in the vanilla log format."""
+        if self.hung:
+            return
+        line = f"[{time.strftime('%H:%M:%S')}] [{thread}/{level}]: {message}\n"
+        with self._output_lock:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+    def start(self):
+        """Print the startup log, then the Done line."""
+        version = self.settings['version']
+        port = self.properties.get('server-port', '25565')
+        level = self.properties.get('level-name', 'world')
+        pause = self.settings['startup'] / 14
+
+        self.log(f'Environment: Environment[sessionHost=https://sessionserver.mojang.com, '
+                 f'servicesHost=https://api.minecraftservices.com, name=PROD]', 'ServerMain')
+        time.sleep(pause)
+        self.log(f'Starting minecraft server version {version}')
+        self.log('Loading properties')
+        self.log(f"Default game type: {self.properties.get('gamemode', 'survival').upper()}")
+        self.log('Generating keypair')
+        time.sleep(pause)
+        self.log(f"Starting Minecraft server on {self.properties.get('server-ip') or '*'}:{port}")
+        self.log('Using epoll channel type')
+        self.log(f'Preparing level "{level}"')
+
+        if self.settings['mode'] == 'fail':
+            time.sleep(pause)
+            self.log('**** FAILED TO BIND TO PORT!', level='WARN')
+            self.log('The exception was: java.net.BindException: Address already in use', level='WARN')
+            self.log('Perhaps a server is already running on that port?', level='WARN')
+            sys.exit(1)
+
+        self.log('Preparing start region for dimension minecraft:overworld')
+        for percent in range(0, 100, 10):
+            time.sleep(pause)
+            self.log(f'Preparing spawn area: {percent}%', 'Worker-Main-1')
+        elapsed = time.time() - self.started_at
+        self.log(f'Time elapsed: {int(elapsed * 1000)} ms')
+        self.log(f'Done ({elapsed:.3f}s)! For help, type "help"')
+        self.ready_at = time.time()
+
+    def stop(self):
+        """Print the shutdown log and exit."""
+        self.stopping = True
+        level = self.properties.get('level-name', 'world')
+
+        self.log('Stopping the server')
+        self.log('Stopping server')
+        self.log('Saving players')
+        for player in list(self.players):
+            self.log(f'{player} lost connection: Server closed')
+            self.log(f'{player} left the game')
+        self.players = []
+        self.log('Saving worlds')
+        time.sleep(self.settings['stop_delay'])
+        self.log(f"Saving chunks for level 'ServerLevel[{level}]'/minecraft:overworld")
+        self.log(f'ThreadedAnvilChunkStorage ({level}): All chunks are saved')
+        os._exit(0)
+
+    def crash(self):
+        """Print a crash report and exit with an error."""
+        self.log('Encountered an unexpected exception', level='ERROR')
+        self.log('net.minecraft.ReportedException: Ticking entity', level='ERROR')
+        self.log('\tat net.minecraft.server.MinecraftServer.tickChildren(MinecraftServer.java:1720)', level='ERROR')
+        self.log('\tat net.minecraft.server.MinecraftServer.runServer(MinecraftServer.java:1093)', level='ERROR')
+        self.log('\tat java.lang.Thread.run(Thread.java:1583)', level='ERROR')
+        self.log(f"This crash report has been saved to: ./crash-reports/crash-{time.strftime('%Y-%m-%d_%H.%M.%S')}-server.txt",
+                 level='ERROR')
+        os._exit(1)
+
+    def handle_command(self, command):
+        """Answer a console command."""
+        name, _, argument = command.partition(' ')
+
+        if name == 'stop':
+            self.stop()
+        elif name == 'list':
+            self.log(f"There are {len(self.players)} of a max of {self.properties.get('max-players', '20')} "
+                     f"players online: {', '.join(self.players)}")
+        elif name == 'say':
+            self.log(f'[Server] {argument}')
+        elif name == 'tps':
+            tps = [round(min(20.0, self.random.uniform(17.5, 20.5)), 2) for _ in range(3)]
+            self.log(f'TPS from last 1m, 5m, 15m: {tps[0]}, {tps[1]}, {tps[2]}')
+        elif name == 'mspt':
+            self.log('Server tick times (avg/min/max) from last 5s, 10s, 1m:')
+            values = [f'{self.random.uniform(8, 30):.1f}/{self.random.uniform(2, 8):.1f}/{self.random.uniform(30, 60):.1f}'
+                      for _ in range(3)]
+            self.log(f"◴ {', '.join(values)}")
+        elif name == 'help':
+            self.log('/list, /say <message>, /stop, /tps, /mspt')
+        else:
+            self.log('Unknown or incomplete command, see below for error')
+            self.log(f'{command}<--[HERE]')
+
+    def run_background(self):
+        """Generate spam, player churn, lag warnings, crashes and hangs."""
+        now = time.time()
+        spam_interval = 1 / self.settings['spam'] if self.settings['spam'] else None
+        next_spam = now
+        next_player = now + self.settings['players'] if self.settings['players'] else None
+        next_lag = now + self.settings['lag'] if self.settings['lag'] else None
+        crash_at = now + self.settings['crash_after'] if self.settings['mode'] == 'crash' else None
+        hang_at = now + self.settings['hang_after'] if self.settings['mode'] == 'hang' else None
+
+        while not self.stopping:
+            now = time.time()
+
+            if crash_at and now >= crash_at:
+                self.crash()
+
+            if hang_at and now >= hang_at:
+                self.log("Can't keep up! Is the server overloaded? Running 60000ms or 1200 ticks behind",
+                         level='WARN')
+                self.hung = True
+                return
+
+            if spam_interval:
+                # Catch up in bursts so high rates are not limited by sleep()
+                while next_spam <= now:
+                    thread, level, message = self.random.choice(SPAM_LINES)
+                    self.log(message, thread, level)
+                    next_spam += spam_interval
+
+            if next_player and now >= next_player:
+                self.churn_players()
+                next_player = now + self.settings['players']
+
+            if next_lag and now >= next_lag:
+                behind = self.random.randint(2000, 10000)
+                self.log(f"Can't keep up! Is the server overloaded? Running {behind}ms or {behind // 50} ticks behind",
+                         level='WARN')
+                next_lag = now + self.settings['lag']
+
+            deadlines = [deadline for deadline in (next_spam if spam_interval else None, next_player,
+                                                   next_lag, crash_at, hang_at) if deadline]
+            time.sleep(max(0.001, min(deadlines) - time.time()) if deadlines else 0.5)
+
+    def churn_players(self):
+        """Have a player join or leave."""
+        offline = [name for name in PLAYER_NAMES if name not in self.players]
+        joining = offline and (not self.players or
+                               (len(self.players) < self.settings['max_players'] and self.random.random() < 0.6))
+
+        if joining:
+            player = self.random.choice(offline)
+            self.players.append(player)
+            address = f'127.0.0.1:{self.random.randint(40000, 60000)}'
+            self.log(f'{player}[/{address}] logged in with entity id {self.random.randint(100, 9999)} '
+                     f'at (0.5, 64.0, 0.5)')
+            self.log(f'{player} joined the game')
+        elif self.players:
+            player = self.players.pop(self.random.randrange(len(self.players)))
+            self.log(f'{player} lost connection: Disconnected')
+            self.log(f'{player} left the game')
+
+def main():
+    cwd = os.getcwd()
+    server = FakeServer(load_settings(sys.argv[1:], cwd), read_properties(cwd))
+    server.start()
+
+    threading.Thread(target=server.run_background, daemon=True).start()
+
+    for line in sys.stdin:
+        command = line.strip().lstrip('/')
+        if command and not server.hung:
+            server.handle_command(command)
+
+    # stdin closed: McSM went away, so behave like a server whose console died
+    if not server.hung:
+        server.stop()
+
+    # A hung server only goes away when it is killed
+    while True:
+        time.sleep(3600)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import stat
+
+SERVER_TYPES = ('vanilla', 'paper', 'forge', 'fabric')
+
+def build_servers_dir(root, count, mods=20, files=30):
+    """
+    Create a synthetic servers directory.
+
+    Every server gets a stub jar named after its type, a server.properties,
+    an mcsm_info.json, a world folder, a mods/ folder with stub mod jars
+    (for modded types) and some config files, which is what discovery and
+    the file browser look at.
+
+    Args:
+        root (str): Directory to create the servers in
+        count (int): Number of servers
+        mods (int): Mod jars per modded server
+        files (int): Extra config files per server
+
+    Returns:
+        list: Names of the created server folders
+    """
+    os.makedirs(root, exist_ok=True)
+    names = []
+
+    for index in range(count):
+        server_type = SERVER_TYPES[index % len(SERVER_TYPES)]
+        name = f'bench-{index:05d}'
+        server_dir = os.path.join(root, name)
+        os.makedirs(os.path.join(server_dir, 'world'), exist_ok=True)
+        os.makedirs(os.path.join(server_dir, 'config'), exist_ok=True)
+
+        jar = 'server.jar' if server_type == 'vanilla' else f'{server_type}-1.20.4.jar'
+        with open(os.path.join(server_dir, jar), 'wb') as f:
+            f.write(b'PK\x03\x04')
+
+        with open(os.path.join(server_dir, 'server.properties'), 'w') as f:
+            f.write('#Minecraft server properties\n')
+            f.write(f'server-port={25565 + index}\n')
+            f.write(f'motd=Benchmark server {index}\n')
+            f.write('max-players=20\nlevel-name=world\nview-distance=10\n')
+
+        with open(os.path.join(server_dir, 'mcsm_info.json'), 'w') as f:
+            json.dump({'memory': '1G', 'version': '1.20.4', 'tags': ['bench']}, f)
+
+        if server_type in ('forge', 'fabric'):
+            os.makedirs(os.path.join(server_dir, 'mods'), exist_ok=True)
+            for mod in range(mods):
+                with open(os.path.join(server_dir, 'mods', f'mod-{mod:03d}.jar'), 'wb') as f:
+                    f.write(b'PK\x03\x04')
+
+        for config in range(files):
+            with open(os.path.join(server_dir, 'config', f'config-{config:03d}.toml'), 'w') as f:
+                f.write(f'[section]\nvalue = {config}\n')
+
+        names.append(name)
+
+    return names
+
+def write_console_launcher(path, lines, line_length=100):
+    """
+    Write a stand-in for the java executable that floods stdout.
+
+    The script prints `lines` console lines as fast as it can, then waits
+    for "stop" on stdin like a real server.
+
+    Args:
+        path (str): Path of the script to write
+        lines (int): Number of lines to print
+        line_length (int): Approximate length of each line
+
+    Returns:
+        str: Path of the script
+    """
+    padding = 'x' * max(0, line_length - 50)
+
+    with open(path, 'w') as f:
+        f.write(f'#!{sys.executable}\n')
+        f.write('import sys\n')
+        f.write('out = sys.stdout\n')
+        f.write(f'for i in range({lines}):\n')
+        f.write(f'    out.write("[12:00:00] [Server thread/INFO]: line %d {padding}\\n" % i)\n')
+        f.write('out.flush()\n')
+        f.write('for line in sys.stdin:\n')
+        f.write('    if line.strip() == "stop":\n')
+        f.write('        break\n')
+
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+class RecordingSocketIO:
+    """
+    Stand-in for SocketIO that records emits and acknowledges them at once.
+    """
+
+    def __init__(self):
+        self.events = {}  # Emit counts keyed by event name
+        self.console_entries = 0  # Console lines delivered in console_batch events
+
+    def emit(self, event, data=None, to=None, callback=None, **kwargs):
+        self.events[event] = self.events.get(event, 0) + 1
+        if event == 'console_batch':
+            self.console_entries += len(data['entries'])
+        if callback:
+            callback()
@@ -0,0 +1,531 @@
+"""
+End-to-end load test of a McSM instance.
+
+Simulates many dashboard clients at once: each one holds a Socket.IO
+connection with a server console open, polls the status endpoint, browses
+the file manager and sends console commands. The report gives p50/p99
+latency per operation, console lines the clients missed, and the CPU and
+memory used by the McSM process.
+
+Against a running instance:
+
+    python -m benchmarks.loadtest --url http://localhost:5000 --pid 1234
+
+Or let the harness start one on a synthetic servers directory, with every
+server played by benchmarks/fake_server.py:
+
+    python -m benchmarks.loadtest --spawn --servers 20 --clients 200 --duration 60
+"""
+
+import os
+import pty
+import sys
+import json
+import time
+import socket
+import signal
+import shutil
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import requests
+import socketio
+from benchmarks.fixtures import build_servers_dir
+from benchmarks.timing import summarize
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_SERVER = os.path.join(ROOT_DIR, 'benchmarks', 'fake_server.py')
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+# Browsers upgrade to WebSocket; the Python client needs websocket-client for that
+try:
+    import websocket  # noqa: F401
+    TRANSPORTS = ['polling', 'websocket']
+except ImportError:
+    TRANSPORTS = ['polling']
+
+class Recorder:
+    """Collects operation latencies and errors from every client."""
+
+    def __init__(self):
+        self.latencies = {}  # Durations in seconds keyed by operation
+        self.errors = {}  # Error counts keyed by operation
+        self.console = {'received': 0, 'dropped': 0, 'lost': 0}
+        self.transports = {}  # Connected clients keyed by Socket.IO transport
+        self._lock = threading.Lock()
+
+    def record(self, operation, duration):
+        with self._lock:
+            self.latencies.setdefault(operation, []).append(duration)
+
+    def error(self, operation):
+        with self._lock:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    def console_batch(self, received, dropped, lost):
+        with self._lock:
+            self.console['received'] += received
+            self.console['dropped'] += dropped
+            self.console['lost'] += lost
+
+    def connected(self, transport):
+        with self._lock:
+            self.transports[transport] = self.transports.get(transport, 0) + 1
+
+    def report(self):
+        """
+        Summarize everything recorded.
+
+        Returns:
+            dict: 'latency' summaries and 'errors' keyed by operation,
+                'console' line counts and client 'transports'
+        """
+        with self._lock:
+            latencies = {operation: list(durations) for operation, durations in self.latencies.items()}
+            console = dict(self.console)
+            errors = dict(self.errors)
+            transports = dict(self.transports)
+
+        missed = console['dropped'] + console['lost']
+        console['missed_ratio'] = round(missed / (console['received'] + missed), 6) if missed else 0.0
+
+        return {
+            'latency': {operation: summarize(durations) for operation, durations in sorted(latencies.items())},
+            'errors': errors,
+            'console': console,
+            'transports': transports
+        }
+
+class DashboardClient(threading.Thread):
+    """
+    One simulated browser: a Socket.IO connection watching a console, plus
+    the HTTP requests the dashboard and server page make.
+    """
+
+    def __init__(self, index, url, server_id, recorder, stop_event, options):
+        """
+        Initialize the client.
+
+        Args:
+            index (int): Client number
+            url (str): Base URL of the McSM instance
+            server_id (str): Server whose console the client watches
+            recorder (Recorder): Where results go
+            stop_event (threading.Event): Set when the test is over
+            options (argparse.Namespace): Load test options
+        """
+        super().__init__(name=f'loadtest-client-{index}', daemon=True)
+        self.index = index
+        self.url = url.rstrip('/')
+        self.server_id = server_id
+        self.recorder = recorder
+        self.stop_event = stop_event
+        self.options = options
+        self.connected = False
+        self.random = random.Random(index)
+
+        self.http = requests.Session()
+        if options.api_key:
+            self.http.headers['X-API-Key'] = options.api_key
+
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on('console_batch', self._on_console_batch)
+        self._last_seq = None
+        self._commands = {}  # Send times of commands awaiting their echo, keyed by token
+        self._commands_lock = threading.Lock()
+
+    def _on_console_batch(self, data):
+        """
+        Count console lines and missed lines; returning acknowledges the batch.
+
+        Lines the server skipped because the client fell behind are reported
+        in 'dropped'; any other gap in the sequence numbers counts as lost.
+        """
+        if data.get('server_id') != self.server_id:
+            return True
+
+        if data.get('reset'):
+            self._last_seq = None
+
+        gaps = 0
+        now = time.perf_counter()
+        for entry in data.get('entries', []):
+            seq = entry.get('seq')
+            if seq is not None:
+                if self._last_seq is not None and seq > self._last_seq + 1:
+                    gaps += seq - self._last_seq - 1
+                self._last_seq = max(seq, self._last_seq if self._last_seq is not None else seq)
+
+            if 'loadtest-' in entry['line']:
+                token = entry['line'].rsplit('loadtest-', 1)[1].split()[0]
+                with self._commands_lock:
+                    sent = self._commands.pop(token, None)
+                if sent:
+                    self.recorder.record('command_echo', now - sent)
+
+        dropped = data.get('dropped', 0)
+        self.recorder.console_batch(len(data.get('entries', [])), dropped, max(0, gaps - dropped))
+        return True
+
+    def _get(self, operation, url_path, params=None):
+        """Time one HTTP GET."""
+        started = time.perf_counter()
+        try:
+            response = self.http.get(self.url + url_path, params=params, timeout=self.options.timeout)
+            if response.status_code >= 400:
+                self.recorder.error(operation)
+                return
+        except requests.RequestException:
+            self.recorder.error(operation)
+            return
+        self.recorder.record(operation, time.perf_counter() - started)
+
+    def _send_command(self, count):
+        """Send a say command whose echo is timed when it comes back on the console."""
+        token = f'{self.index}-{count}'
+        with self._commands_lock:
+            self._commands[token] = time.perf_counter()
+
+        started = time.perf_counter()
+        try:
+            self.sio.emit('command', {'server_id': self.server_id, 'command': f'say loadtest-{token}'})
+        except Exception:
+            self.recorder.error('command_send')
+            return
+        self.recorder.record('command_send', time.perf_counter() - started)
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            self.sio.connect(self.url, headers=dict(self.http.headers), transports=TRANSPORTS,
+                             wait_timeout=self.options.timeout)
+            self.sio.emit('join_server', {'server_id': self.server_id})
+        except Exception as e:
+            logger.debug(f"Client {self.index} failed to connect: {e}")
+            self.recorder.error('socketio_connect')
+            return
+
+        self.connected = True
+        self.recorder.record('socketio_connect', time.perf_counter() - started)
+        self.recorder.connected(self.sio.transport())
+
+        # Spread the clients' timers so requests do not arrive in lockstep
+        now = time.monotonic()
+        schedule = {
+            'status': now + self.random.uniform(0, self.options.status_interval),
+            'browse': now + self.random.uniform(0, self.options.browse_interval),
+            'command': now + self.random.uniform(0, self.options.command_interval)
+        }
+        commands = 0
+
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+
+            if now >= schedule['status']:
+                self._get('status_poll', '/api/v1/servers/status', {'console': 0})
+                schedule['status'] = now + self.options.status_interval
+
+            if now >= schedule['browse']:
+                path = self.random.choice(('', 'config', 'world', 'logs'))
+                self._get('file_browse', f'/api/server/{self.server_id}/files', {'path': path})
+                schedule['browse'] = now + self.options.browse_interval
+
+            if now >= schedule['command']:
+                commands += 1
+                self._send_command(commands)
+                schedule['command'] = now + self.options.command_interval
+
+            self.stop_event.wait(max(0.01, min(schedule.values()) - time.monotonic()))
+
+        # Commands that never came back count as errors
+        with self._commands_lock:
+            for _ in self._commands:
+                self.recorder.error('command_echo')
+
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+class ProcessMonitor(threading.Thread):
+    """
+    Samples the CPU and memory of a McSM process and its helper processes
+    every second. Minecraft servers (java or the fake server) are not counted.
+    """
+
+    def __init__(self, pid, stop_event):
+        super().__init__(name='loadtest-monitor', daemon=True)
+        self.pid = pid
+        self.stop_event = stop_event
+        self.cpu = []  # CPU percent per interval
+        self.rss = []  # Resident memory in bytes per interval
+
+    def _tree(self):
+        """Get the McSM process and its descendants that are not game servers."""
+        children = {}
+        for name in os.listdir('/proc'):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f'/proc/{name}/stat', 'rb') as f:
+                    fields = f.read().rsplit(b')', 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(name))
+            except (OSError, IndexError, ValueError):
+                continue
+
+        pids = [self.pid]
+        for pid in pids:
+            for child in children.get(pid, []):
+                try:
+                    with open(f'/proc/{child}/cmdline', 'rb') as f:
+                        cmdline = f.read()
+                except OSError:
+                    continue
+                if b'fake_server' not in cmdline and b'-jar' not in cmdline:
+                    pids.append(child)
+        return pids
+
+    def _usage(self):
+        """Get the total CPU ticks and resident memory of the process tree."""
+        ticks = 0
+        rss = 0
+        for pid in self._tree():
+            try:
+                with open(f'/proc/{pid}/stat', 'rb') as f:
+                    fields = f.read().rsplit(b')', 1)[1].split()
+                ticks += int(fields[11]) + int(fields[12])
+                rss += int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+            except (OSError, IndexError, ValueError):
+                continue
+        return ticks, rss
+
+    def run(self):
+        previous, _ = self._usage()
+        previous_time = time.monotonic()
+
+        while not self.stop_event.wait(1):
+            ticks, rss = self._usage()
+            now = time.monotonic()
+            self.cpu.append((ticks - previous) / CLOCK_TICKS / (now - previous_time) * 100)
+            self.rss.append(rss)
+            previous, previous_time = ticks, now
+
+    def report(self):
+        """
+        Summarize the samples.
+
+        Returns:
+            dict: Average and peak CPU percent and resident memory
+        """
+        if not self.cpu:
+            return {'samples': 0}
+        return {
+            'samples': len(self.cpu),
+            'cpu_avg_percent': round(sum(self.cpu) / len(self.cpu), 1),
+            'cpu_max_percent': round(max(self.cpu), 1),
+            'rss_avg_bytes': int(sum(self.rss) / len(self.rss)),
+            'rss_max_bytes': max(self.rss)
+        }
+
+class LocalInstance:
+    """
+    A McSM instance started by the harness on a synthetic servers directory,
+    with every server played by the fake server.
+    """
+
+    def __init__(self, servers, spam, startup_timeout=120):
+        """
+        Initialize the instance.
+
+        Args:
+            servers (int): Number of servers to create and start
+            spam (float): Console lines per second printed by each server
+            startup_timeout (float): Seconds to wait for McSM and the servers
+        """
+        self.servers = servers
+        self.spam = spam
+        self.startup_timeout = startup_timeout
+        self.root = None
+        self.process = None
+        self.url = None
+
+    def __enter__(self):
+        self.root = tempfile.mkdtemp(prefix='mcsm-loadtest-')
+        servers_dir = os.path.join(self.root, 'servers')
+        build_servers_dir(servers_dir, self.servers, mods=5, files=10)
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}'
+
+        env = dict(os.environ,
+                   DEBUG='False',
+                   HOST='127.0.0.1',
+                   PORT=str(port),
+                   SERVERS_DIR=servers_dir,
+                   API_KEY='',
+                   JAVA_PATH=FAKE_SERVER,
+                   FAKE_SERVER_STARTUP='1',
+                   FAKE_SERVER_SPAM=str(self.spam),
+                   FAKE_SERVER_PLAYERS=os.environ.get('FAKE_SERVER_PLAYERS', '30'),
+                   PYTHONUNBUFFERED='1')
+
+        self.log = open(os.path.join(self.root, 'mcsm.log'), 'w')
+        # Flask-SocketIO refuses to serve with Werkzeug unless stdin is a terminal
+        self._terminal, terminal = pty.openpty()
+        try:
+            self.process = subprocess.Popen([sys.executable, 'app.py'], cwd=ROOT_DIR, env=env, stdin=terminal,
+                                            stdout=self.log, stderr=subprocess.STDOUT, start_new_session=True)
+        finally:
+            os.close(terminal)
+
+        try:
+            self._wait_until_ready()
+        except Exception as e:
+            self.__exit__(type(e), e, None)
+            raise
+        return self
+
+    def _wait_until_ready(self):
+        """Wait for the API, start every server and wait for them to be ready."""
+        deadline = time.time() + self.startup_timeout
+
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"McSM exited with code {self.process.returncode}, see {self.log.name}")
+            try:
+                if requests.get(self.url + '/api/v1/health', timeout=1).ok:
+                    break
+            except requests.RequestException:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError(f"McSM did not start in time, see {self.log.name}")
+            time.sleep(0.2)
+
+        server_ids = [server['id'] for server in requests.get(self.url + '/api/v1/servers', timeout=10).json()['servers']]
+        requests.post(self.url + '/api/v1/servers/bulk', json={'action': 'start', 'servers': server_ids},
+                      timeout=10).raise_for_status()
+
+        while time.time() < deadline:
+            statuses = requests.get(self.url + '/api/v1/servers/status', params={'console': 0}, timeout=10).json()
+            if all(status.get('state') == 'ready' for status in statuses['servers'].values()):
+                return
+            time.sleep(0.5)
+
+        raise RuntimeError("Servers did not become ready in time")
+
+    def __exit__(self, *exc_info):
+        if self.process and self.process.poll() is None:
+            # The whole session: McSM, its reloader and the fake servers
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                self.process.wait()
+            except ProcessLookupError:
+                pass
+        self.log.close()
+        os.close(self._terminal)
+
+        # Keep the McSM log around when something went wrong
+        if exc_info[0] is None:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+def run(url, options, pid=None):
+    """
+    Run the load test against an instance.
+
+    Args:
+        url (str): Base URL of the McSM instance
+        options (argparse.Namespace): Load test options
+        pid (int): McSM process ID, to measure its CPU and memory (optional)
+
+    Returns:
+        dict: Load test report
+    """
+    headers = {'X-API-Key': options.api_key} if options.api_key else {}
+    servers = requests.get(url.rstrip('/') + '/api/v1/servers', headers=headers, timeout=10).json()['servers']
+    if not servers:
+        raise RuntimeError("The instance has no servers to watch")
+    server_ids = [server['id'] for server in servers]
+
+    recorder = Recorder()
+    stop_event = threading.Event()
+    monitor = ProcessMonitor(pid, stop_event) if pid and os.path.isdir('/proc') else None
+    clients = [DashboardClient(index, url, server_ids[index % len(server_ids)], recorder, stop_event, options)
+               for index in range(options.clients)]
+
+    if monitor:
+        monitor.start()
+
+    # Ramp up so the connection storm itself is not all that gets measured
+    for client in clients:
+        client.start()
+        time.sleep(options.ramp_up / max(1, len(clients)))
+
+    time.sleep(options.duration)
+    stop_event.set()
+    for client in clients:
+        client.join(timeout=options.timeout + 5)
+
+    report = recorder.report()
+    report['clients'] = {
+        'requested': options.clients,
+        'connected': sum(1 for client in clients if client.connected)
+    }
+    report['servers'] = len(server_ids)
+    report['duration_s'] = options.duration
+    if monitor:
+        monitor.join()
+        report['process'] = monitor.report()
+
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a McSM instance with simulated dashboard clients.')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='Base URL of a running instance')
+    target.add_argument('--spawn', action='store_true', help='Start an instance on fake servers')
+    parser.add_argument('--pid', type=int, help='McSM process ID to monitor (with --url)')
+    parser.add_argument('--api-key', default=os.environ.get('API_KEY', ''), help='API key of the instance')
+    parser.add_argument('--servers', type=int, default=10, help='Fake servers to start (with --spawn)')
+    parser.add_argument('--spam', type=float, default=20, help='Console lines per second per fake server')
+    parser.add_argument('--clients', type=int, default=100, help='Simulated dashboard clients')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run after ramp-up')
+    parser.add_argument('--ramp-up', type=float, default=10, help='Seconds over which clients connect')
+    parser.add_argument('--status-interval', type=float, default=5, help='Seconds between status polls')
+    parser.add_argument('--browse-interval', type=float, default=15, help='Seconds between file listings')
+    parser.add_argument('--command-interval', type=float, default=20, help='Seconds between console commands')
+    parser.add_argument('--timeout', type=float, default=10, help='Request timeout in seconds')
+    parser.add_argument('--output', help='Write the report to this file instead of stdout')
+    options = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if 'websocket' not in TRANSPORTS:
+        logger.warning("websocket-client is not installed, clients will use long-polling only")
+
+    if options.spawn:
+        options.api_key = ''
+        with LocalInstance(options.servers, options.spam) as instance:
+            report = run(instance.url, options, instance.process.pid)
+    else:
+        report = run(options.url, options, options.pid)
+
+    report['options'] = {name: value for name, value in vars(options).items() if name != 'api_key'}
+
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import time
+import statistics
+
+def percentile(ordered, fraction):
+    """
+    Get a percentile of sorted values (nearest rank).
+
+    Args:
+        ordered (list): Values in ascending order
+        fraction (float): Percentile as a fraction, e.g. 0.99
+
+    Returns:
+        float: The value at that percentile
+    """
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(durations):
+    """
+    Summarize a list of durations.
+
+    Args:
+        durations (list): Durations in seconds
+
+    Returns:
+        dict: Count, min, mean, median, p95, p99 and max in milliseconds
+            (only the count if there are no durations)
+    """
+    ordered = sorted(durations)
+    if not ordered:
+        return {'runs': 0}
+
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 4),
+        'mean_ms': round(statistics.mean(ordered) * 1000, 4),
+        'median_ms': round(statistics.median(ordered) * 1000, 4),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4)
+    }
+
+def measure(func, repeat=5, warmup=1):
+    """
+    Time a function over several runs.
+
+    Args:
+        func (callable): Function to time, called without arguments
+        repeat (int): Timed runs
+        warmup (int): Untimed runs before measuring
+
+    Returns:
+        dict: Summary from summarize()
+    """
+    for _ in range(warmup):
+        func()
+
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+
+    return summarize(durations)
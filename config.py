@@ -27,6 +27,34 @@ class Config:
     MAX_MEMORY = os.environ.get('MAX_MEMORY', '8G')
     JAVA_PATH = os.environ.get('JAVA_PATH', 'java')
     
+    # Server discovery settings
+    SERVER_REGISTRY_REFRESH_INTERVAL = int(os.environ.get('SERVER_REGISTRY_REFRESH_INTERVAL', 30))
+    SERVER_WATCH_ENABLED = os.environ.get('SERVER_WATCH_ENABLED', 'True').lower() in ('true', '1', 't')
+    DISK_USAGE_ENABLED = os.environ.get('DISK_USAGE_ENABLED', 'True').lower() in ('true', '1', 't')
+    DISK_USAGE_RESCAN_INTERVAL = float(os.environ.get('DISK_USAGE_RESCAN_INTERVAL', 21600))  # Seconds, 0 disables
+    DISK_USAGE_DEBOUNCE = float(os.environ.get('DISK_USAGE_DEBOUNCE', 30))  # Seconds
+    
+    # Console streaming settings
+    CONSOLE_BATCH_INTERVAL = int(os.environ.get('CONSOLE_BATCH_INTERVAL', 50))  # Milliseconds
+    CONSOLE_BATCH_LINES = int(os.environ.get('CONSOLE_BATCH_LINES', 256))
+    CONSOLE_MAX_INFLIGHT = int(os.environ.get('CONSOLE_MAX_INFLIGHT', 8))
+    CONSOLE_JOURNAL_ENABLED = os.environ.get('CONSOLE_JOURNAL_ENABLED', 'True').lower() in ('true', '1', 't')
+    CONSOLE_JOURNAL_SEGMENT_LINES = int(os.environ.get('CONSOLE_JOURNAL_SEGMENT_LINES', 65536))
+    CONSOLE_JOURNAL_SEGMENTS = int(os.environ.get('CONSOLE_JOURNAL_SEGMENTS', 16))
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 8))
+    BULK_CONCURRENCY = int(os.environ.get('BULK_CONCURRENCY', 4))
+    BULK_STAGGER = float(os.environ.get('BULK_STAGGER', 0))
+    SHUTDOWN_STOP_SERVERS = os.environ.get('SHUTDOWN_STOP_SERVERS', 'True').lower() in ('true', '1', 't')
+    METRICS_INTERVAL = float(os.environ.get('METRICS_INTERVAL', 5))
+    METRICS_HISTORY = int(os.environ.get('METRICS_HISTORY', 720))
+    METRICS_STORE_ENABLED = os.environ.get('METRICS_STORE_ENABLED', 'True').lower() in ('true', '1', 't')
+    TPS_POLL_INTERVAL = float(os.environ.get('TPS_POLL_INTERVAL', 0))
+    TPS_HISTORY = int(os.environ.get('TPS_HISTORY', 720))
+    FILE_UPLOAD_MAX_SIZE = int(os.environ.get('FILE_UPLOAD_MAX_SIZE', 0))  # Bytes, 0 means no limit
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'False').lower() in ('true', '1', 't')
+    FILE_VIEW_MAX_WINDOW = int(os.environ.get('FILE_VIEW_MAX_WINDOW', 4194304))  # Bytes per file view read
+    FILE_EDITOR_MAX_SIZE = int(os.environ.get('FILE_EDITOR_MAX_SIZE', 1048576))  # Larger files open in the viewer
+    
     # API settings
     API_KEY = os.environ.get('API_KEY', '')  # Empty string means no API key required
     RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'False').lower() in ('true', '1', 't')
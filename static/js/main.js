@@ -37,6 +37,24 @@ function formatElapsedTime(seconds) {
     return result;
 }
 
+// Badge label and colour for each server lifecycle state
+const SERVER_STATE_BADGES = {
+    starting: { text: 'Starting', cls: 'bg-warning' },
+    ready: { text: 'Running', cls: 'bg-success' },
+    stopping: { text: 'Stopping', cls: 'bg-warning' },
+    stopped: { text: 'Offline', cls: 'bg-secondary' },
+    crashed: { text: 'Crashed', cls: 'bg-danger' }
+};
+
+// Update a status badge for a server lifecycle state
+function renderStateBadge(badge, state) {
+    const style = SERVER_STATE_BADGES[state] || SERVER_STATE_BADGES.stopped;
+    
+    badge.textContent = style.text;
+    badge.classList.remove('bg-warning', 'bg-success', 'bg-secondary', 'bg-danger');
+    badge.classList.add(style.cls);
+}
+
 // Add a toast notification
 function showToast(message, type = 'info') {
     // Create toast container if it doesn't exist
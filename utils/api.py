@@ -3,7 +3,11 @@ import time
 import logging
 import json
 import os
-from flask import jsonify, request, Blueprint, current_app
+import re
+from flask import jsonify, request, Blueprint, current_app, Response, stream_with_context, g, send_file
+from utils.resource_sampler import AGGREGATES
+from utils.console_buffer import LEVELS
+from utils.prometheus import REGISTRY, CONTENT_TYPE, Counter, Gauge, Histogram
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -11,6 +15,16 @@ logger = logging.getLogger(__name__)
 # Create API blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
+# Manager internals exposed on /metrics
+REQUEST_DURATION = Histogram('mcsm_http_request_duration_seconds', 'HTTP request latency by route',
+                             ('method', 'route'))
+REQUESTS = Counter('mcsm_http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+RUNNING_SERVERS = Gauge('mcsm_running_servers', 'Server processes currently running')
+JOB_QUEUE_DEPTH = Gauge('mcsm_job_queue_depth', 'Background jobs waiting for a worker')
+SERVER_CPU = Gauge('mcsm_server_cpu_percent', 'CPU usage of a server and its child processes', ('server_id',))
+SERVER_RSS = Gauge('mcsm_server_memory_rss_bytes', 'Resident memory of a server and its child processes',
+                   ('server_id',))
+
 # API authentication middleware
 def require_api_key(f):
     @functools.wraps(f)
@@ -99,14 +113,14 @@ def health_check():
 @require_api_key
 def get_servers():
     """Get list of all servers."""
-    from utils.server_detector import detect_servers
+    server_registry = current_app.extensions['server_registry']
+    server_manager = current_app.extensions.get('server_manager')
     
-    servers = detect_servers(current_app.config['SERVERS_DIR'])
+    servers = server_registry.get_all()
     
     # Add status information
     for server in servers:
         # Check if server is running
-        server_manager = current_app.extensions.get('server_manager')
         if server_manager and server['id'] in server_manager.running_servers:
             server['status'] = 'running'
         else:
@@ -117,15 +131,41 @@ def get_servers():
         'servers': servers
     })
 
+# Get status of many servers
+@api_bp.route('/servers/status', methods=['GET'])
+@require_api_key
+def get_servers_status():
+    """Get running state, uptime and console tail for many servers at once."""
+    server_manager = current_app.extensions.get('server_manager')
+    
+    if not server_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Server manager not available',
+            'code': 500
+        }), 500
+    
+    # Comma-separated server IDs (default: all servers)
+    ids = request.args.get('ids')
+    server_ids = [server_id for server_id in ids.split(',') if server_id] if ids else None
+    
+    # Console tail length per server (default 20)
+    console_lines = max(0, min(request.args.get('console', 20, type=int), 1000))
+    
+    statuses = server_manager.get_servers_status(server_ids, console_lines)
+    
+    return jsonify({
+        'success': True,
+        'servers': statuses
+    })
+
 # Get server details
 @api_bp.route('/servers/<server_id>', methods=['GET'])
 @require_api_key
 def get_server(server_id):
     """Get details for a specific server."""
-    from utils.server_detector import detect_servers
-    
-    servers = detect_servers(current_app.config['SERVERS_DIR'])
-    server = next((s for s in servers if s['id'] == server_id), None)
+    server_registry = current_app.extensions['server_registry']
+    server = server_registry.get(server_id)
     
     if not server:
         return jsonify({
@@ -146,12 +186,81 @@ def get_server(server_id):
         'server': server
     })
 
+def wants_wait():
+    """Check whether the caller asked to wait for a lifecycle operation to finish."""
+    return request.args.get('wait', '').lower() in ('true', '1', 't')
+
+def job_accepted(job, message):
+    """Build the 202 response for a queued job."""
+    return jsonify({
+        'success': True,
+        'message': message,
+        'job': job
+    }), 202
+
+def refresh_disk_usage(server):
+    """
+    Tell the disk usage tracker that a server was created or its files changed.
+    
+    Args:
+        server (dict): Server record, or None
+    """
+    disk_usage_tracker = current_app.extensions.get('disk_usage_tracker')
+    if disk_usage_tracker and server:
+        disk_usage_tracker.refresh(server['path'])
+
+def delete_server_task(server_manager, server_creator, server_registry, server_id,
+                       resource_sampler=None, disk_usage_tracker=None, progress=None):
+    """
+    Stop a server if it is running, then delete its folder.
+    
+    Args:
+        server_manager (ServerManager): Server manager
+        server_creator (ServerCreator): Server creator
+        server_registry (ServerRegistry): Server registry
+        server_id (str): Server ID
+        resource_sampler (ResourceSampler): Resource sampler whose history is dropped
+        disk_usage_tracker (DiskUsageTracker): Disk usage tracker told about the deletion
+        progress (callable): Optional callback receiving progress messages
+        
+    Returns:
+        dict: Result of the operation with 'success' and 'message' keys
+    """
+    # Check if server is running
+    if server_id in server_manager.running_servers:
+        # Stop the server first
+        success = server_manager.stop_server(server_id, progress=progress)
+        if not success:
+            return {'success': False, 'message': 'Could not stop the server before deletion'}
+    
+    # Get server name from ID
+    server = server_registry.get(server_id)
+    
+    if not server:
+        return {'success': False, 'message': 'Server not found'}
+    
+    # Delete the server
+    if progress:
+        progress('Deleting server files')
+    server_manager.forget_server(server_id)
+    if resource_sampler:
+        resource_sampler.forget(server_id)
+    result = server_creator.delete_server(server['name'])
+    if result.get('success'):
+        server_registry.remove_server(server['name'])
+        if disk_usage_tracker:
+            disk_usage_tracker.refresh(server['path'])
+    
+    return result
+
 # Start server
 @api_bp.route('/servers/<server_id>/start', methods=['POST'])
 @require_api_key
 def start_server(server_id):
-    """Start a server."""
+    """Start a server as a background job (or synchronously with ?wait=true)."""
+    server_registry = current_app.extensions['server_registry']
     server_manager = current_app.extensions.get('server_manager')
+    job_manager = current_app.extensions.get('job_manager')
     
     if not server_manager:
         return jsonify({
@@ -160,6 +269,17 @@ def start_server(server_id):
             'code': 500
         }), 500
     
+    if not server_registry.get(server_id):
+        return jsonify({
+            'success': False,
+            'error': 'Server not found',
+            'code': 404
+        }), 404
+    
+    if job_manager and not wants_wait():
+        job = job_manager.submit('start', server_id, server_manager.start_server, server_id)
+        return job_accepted(job, 'Server start queued')
+    
     success = server_manager.start_server(server_id)
     
     return jsonify({
@@ -171,8 +291,10 @@ def start_server(server_id):
 @api_bp.route('/servers/<server_id>/stop', methods=['POST'])
 @require_api_key
 def stop_server(server_id):
-    """Stop a server."""
+    """Stop a server as a background job (or synchronously with ?wait=true)."""
+    server_registry = current_app.extensions['server_registry']
     server_manager = current_app.extensions.get('server_manager')
+    job_manager = current_app.extensions.get('job_manager')
     
     if not server_manager:
         return jsonify({
@@ -181,6 +303,17 @@ def stop_server(server_id):
             'code': 500
         }), 500
     
+    if not server_registry.get(server_id):
+        return jsonify({
+            'success': False,
+            'error': 'Server not found',
+            'code': 404
+        }), 404
+    
+    if job_manager and not wants_wait():
+        job = job_manager.submit('stop', server_id, server_manager.stop_server, server_id)
+        return job_accepted(job, 'Server stop queued')
+    
     success = server_manager.stop_server(server_id)
     
     return jsonify({
@@ -188,6 +321,69 @@ def stop_server(server_id):
         'message': 'Server stopped successfully' if success else 'Failed to stop server'
     })
 
+# Start, stop or restart many servers
+@api_bp.route('/servers/bulk', methods=['POST'])
+@require_api_key
+def bulk_action():
+    """Start, stop or restart a set of servers, or every server with a tag, in parallel."""
+    server_registry = current_app.extensions['server_registry']
+    server_manager = current_app.extensions.get('server_manager')
+    job_manager = current_app.extensions.get('job_manager')
+    
+    if not server_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Server manager not available',
+            'code': 500
+        }), 500
+    
+    data = request.json
+    
+    if not data:
+        return jsonify({
+            'success': False,
+            'error': 'No data provided',
+            'code': 400
+        }), 400
+    
+    action = data.get('action')
+    if action not in ('start', 'stop', 'restart'):
+        return jsonify({
+            'success': False,
+            'error': 'Action must be start, stop or restart',
+            'code': 400
+        }), 400
+    
+    server_ids = list(data.get('servers', []))
+    if data.get('tag'):
+        server_ids += [server['id'] for server in server_registry.find_by_tag(data['tag'])]
+    
+    if not server_ids:
+        return jsonify({
+            'success': False,
+            'error': 'No servers selected',
+            'code': 400
+        }), 400
+    
+    try:
+        concurrency = int(data.get('concurrency', current_app.config['BULK_CONCURRENCY']))
+        stagger = float(data.get('stagger', current_app.config['BULK_STAGGER']))
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'Concurrency and stagger must be numbers',
+            'code': 400
+        }), 400
+    
+    if job_manager and not wants_wait():
+        job = job_manager.submit(f'bulk_{action}', None, server_manager.bulk_action,
+                                 action, server_ids, concurrency, stagger)
+        return job_accepted(job, f'Bulk {action} of {len(set(server_ids))} servers queued')
+    
+    result = server_manager.bulk_action(action, server_ids, concurrency, stagger)
+    
+    return jsonify(result)
+
 # Send command to server
 @api_bp.route('/servers/<server_id>/command', methods=['POST'])
 @require_api_key
@@ -248,6 +444,9 @@ def create_server():
         memory=data.get('memory', '2G'),
         options=data.get('options', {})
     )
+    if result.get('success'):
+        server = current_app.extensions['server_registry'].update_server(result['server_name'])
+        refresh_disk_usage(server)
     
     return jsonify(result)
 
@@ -255,11 +454,11 @@ def create_server():
 @api_bp.route('/servers/<server_id>', methods=['DELETE'])
 @require_api_key
 def delete_server(server_id):
-    """Delete a server."""
-    from utils.server_detector import detect_servers
-    
+    """Delete a server as a background job (or synchronously with ?wait=true)."""
+    server_registry = current_app.extensions['server_registry']
     server_manager = current_app.extensions.get('server_manager')
     server_creator = current_app.extensions.get('server_creator')
+    job_manager = current_app.extensions.get('job_manager')
     
     if not server_manager or not server_creator:
         return jsonify({
@@ -268,30 +467,23 @@ def delete_server(server_id):
             'code': 500
         }), 500
     
-    # Check if server is running
-    if server_id in server_manager.running_servers:
-        # Stop the server first
-        success = server_manager.stop_server(server_id)
-        if not success:
-            return jsonify({
-                'success': False,
-                'error': 'Could not stop the server before deletion',
-                'code': 500
-            }), 500
-    
-    # Get server name from ID
-    servers = detect_servers(current_app.config['SERVERS_DIR'])
-    server = next((s for s in servers if s['id'] == server_id), None)
-    
-    if not server:
+    if not server_registry.get(server_id):
         return jsonify({
             'success': False,
             'error': 'Server not found',
             'code': 404
         }), 404
     
-    # Delete the server
-    result = server_creator.delete_server(server['name'])
+    if job_manager and not wants_wait():
+        job = job_manager.submit('delete', server_id, delete_server_task,
+                                 server_manager, server_creator, server_registry, server_id,
+                                 current_app.extensions.get('resource_sampler'),
+                                 current_app.extensions.get('disk_usage_tracker'))
+        return job_accepted(job, 'Server deletion queued')
+    
+    result = delete_server_task(server_manager, server_creator, server_registry, server_id,
+                                current_app.extensions.get('resource_sampler'),
+                                current_app.extensions.get('disk_usage_tracker'))
     
     return jsonify(result)
 
@@ -309,21 +501,560 @@ def get_console(server_id):
             'code': 500
         }), 500
     
+    try:
+        # Last sequence number the caller has seen (optional)
+        since = request.args.get('since')
+        since = int(since) if since is not None else None
+        
+        # Get last N lines, or up to N lines after the cursor (default 100)
+        lines_count = max(1, min(int(request.args.get('lines', 100)), 1000))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'since and lines must be integers',
+            'code': 400
+        }), 400
+    
+    entries = server_manager.get_console(server_id, since, lines_count)
+    
     # Check if console buffer exists
-    if server_id not in server_manager.console_buffers:
+    if entries is None:
         return jsonify({
             'success': False,
             'error': 'Console buffer not found',
             'code': 404
         }), 404
     
-    # Get last N lines (default 100)
-    lines_count = min(int(request.args.get('lines', 100)), 1000)
-    console_lines = server_manager.console_buffers[server_id][-lines_count:]
+    return jsonify({
+        'success': True,
+        'lines': [entry['line'] for entry in entries],
+        'entries': entries,
+        'last_seq': entries[-1]['seq'] if entries else since
+    })
+
+# Get server console history from the on-disk journal
+@api_bp.route('/servers/<server_id>/console/history', methods=['GET'])
+@require_api_key
+def get_console_history(server_id):
+    """Get a range of console lines, or the newest ones, from the console journal."""
+    server_manager = current_app.extensions.get('server_manager')
+    
+    if not server_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Server manager not available',
+            'code': 500
+        }), 500
+    
+    try:
+        # Sequence number of the first line (default: newest lines)
+        start = request.args.get('start')
+        start = int(start) if start is not None else None
+        
+        count = max(1, min(int(request.args.get('count', 100)), 10000))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'start and count must be integers',
+            'code': 400
+        }), 400
+    
+    history = server_manager.get_console_history(server_id, start, count)
+    
+    if history is None:
+        return jsonify({
+            'success': False,
+            'error': 'Console journal not found',
+            'code': 404
+        }), 404
     
     return jsonify({
         'success': True,
-        'lines': console_lines
+        'entries': history['entries'],
+        'first_seq': history['first_seq'],
+        'next_seq': history['next_seq']
+    })
+
+# Search server console history
+@api_bp.route('/servers/<server_id>/console/search', methods=['GET'])
+@require_api_key
+def search_console(server_id):
+    """Stream console lines matching a regex, level, thread and time window as NDJSON."""
+    server_manager = current_app.extensions.get('server_manager')
+    
+    if not server_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Server manager not available',
+            'code': 500
+        }), 500
+    
+    pattern = request.args.get('q')
+    if pattern:
+        try:
+            pattern = re.compile(pattern)
+        except re.error as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid regex: {e}',
+                'code': 400
+            }), 400
+    
+    level = request.args.get('level')
+    level = level.upper() if level else None
+    if level == 'WARNING':
+        level = 'WARN'
+    if level is not None and level not in LEVELS:
+        return jsonify({
+            'success': False,
+            'error': f'level must be one of: {", ".join(LEVELS)}',
+            'code': 400
+        }), 400
+    
+    start_time = request.args.get('start_time', type=float)
+    end_time = request.args.get('end_time', type=float)
+    start_seq = request.args.get('start_seq', type=int)
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', 1000)), 100000))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'limit must be an integer',
+            'code': 400
+        }), 400
+    
+    matches = server_manager.search_console(
+        server_id,
+        pattern=pattern or None,
+        level=level,
+        thread=request.args.get('thread'),
+        start_time=start_time,
+        end_time=end_time,
+        start_seq=start_seq,
+        limit=limit
+    )
+    
+    def generate():
+        for entry in matches:
+            yield json.dumps(entry) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# Get server resource metrics
+@api_bp.route('/servers/<server_id>/metrics', methods=['GET'])
+@require_api_key
+def get_metrics(server_id):
+    """Get a server's CPU, memory and disk I/O samples, optionally downsampled."""
+    resource_sampler = current_app.extensions.get('resource_sampler')
+    
+    if not resource_sampler or not resource_sampler.available:
+        return jsonify({
+            'success': False,
+            'error': 'Resource sampling not available',
+            'code': 503
+        }), 503
+    
+    aggregate = request.args.get('agg', 'avg')
+    if aggregate not in AGGREGATES:
+        return jsonify({
+            'success': False,
+            'error': f'agg must be one of: {", ".join(AGGREGATES)}',
+            'code': 400
+        }), 400
+    
+    try:
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        step = request.args.get('step', type=float)
+        points = max(1, min(int(request.args.get('points', 500)), 5000))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'points must be a number',
+            'code': 400
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'server_id': server_id,
+        'interval': resource_sampler.interval,
+        'latest': resource_sampler.latest(server_id),
+        'points': resource_sampler.query(server_id, start, end, step, points, aggregate)
+    })
+
+# Get server lag statistics
+@api_bp.route('/servers/<server_id>/lag', methods=['GET'])
+@require_api_key
+def get_lag(server_id):
+    """Get a server's tick rate, lag spikes and lag statistics parsed from its console."""
+    lag_tracker = current_app.extensions.get('lag_tracker')
+    
+    if not lag_tracker:
+        return jsonify({
+            'success': False,
+            'error': 'Lag tracking not available',
+            'code': 503
+        }), 503
+    
+    lag = lag_tracker.get_stats(server_id)
+    
+    return jsonify({
+        'success': True,
+        'server_id': server_id,
+        'stats': lag['stats'],
+        'events': lag['events'],
+        'samples': lag['samples']
+    })
+
+def list_files_page(server_manager, server_id):
+    """
+    List one page of a server directory from the request arguments.
+    
+    Args:
+        server_manager (ServerManager): Server manager
+        server_id (str): Server ID
+    
+    Returns:
+        Response: JSON page of files, or a JSON error
+    """
+    path = request.args.get('path', '')
+    
+    try:
+        limit = min(int(request.args.get('limit', 200)), 5000)
+        page = server_manager.list_server_files_page(
+            server_id,
+            path,
+            cursor=request.args.get('cursor') or None,
+            limit=max(1, limit),
+            sort=request.args.get('sort', 'name'),
+            descending=request.args.get('order', 'asc').lower() == 'desc',
+            name_filter=request.args.get('name') or None
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'code': 400
+        }), 400
+    
+    if page is None:
+        return jsonify({
+            'success': False,
+            'error': 'Path not found',
+            'code': 404
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'path': path,
+        'files': page['files'],
+        'total': page['total'],
+        'next_cursor': page['next_cursor']
+    })
+
+# List a server directory
+@api_bp.route('/servers/<server_id>/files', methods=['GET'])
+@require_api_key
+def list_files(server_id):
+    """List a server directory a page at a time."""
+    server_manager = current_app.extensions.get('server_manager')
+    
+    if not server_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Server manager not available',
+            'code': 500
+        }), 500
+    
+    return list_files_page(server_manager, server_id)
+
+def send_server_file(server_manager, server_id, path):
+    """
+    Stream a server file to the client.
+    
+    Responses carry an ETag and Last-Modified and honour Range,
+    If-None-Match and If-Modified-Since, so downloads can resume and
+    unchanged files are not sent again. The file is handed to the WSGI
+    server's file wrapper (or to the front-end proxy with USE_X_SENDFILE)
+    instead of being read into memory.
+    
+    Args:
+        server_manager (ServerManager): Server manager
+        server_id (str): Server ID
+        path (str): Relative path to the file
+    
+    Returns:
+        Response: File response, or a JSON error
+    """
+    file_path = server_manager.resolve_server_file(server_id, path)
+    
+    if not file_path or not os.path.isfile(file_path):
+        return jsonify({
+            'success': False,
+            'error': 'File not found',
+            'code': 404
+        }), 404
+    
+    return send_file(
+        file_path,
+        conditional=True,
+        etag=True,
+        max_age=0,
+        as_attachment=request.args.get('download', '').lower() in ('true', '1', 't'),
+        download_name=os.path.basename(file_path)
+    )
+
+def receive_server_file(server_manager, server_id, path):
+    """
+    Write the request body to a server file as it arrives.
+    
+    Args:
+        server_manager (ServerManager): Server manager
+        server_id (str): Server ID
+        path (str): Relative path to the file
+    
+    Returns:
+        Response: JSON result with the size written
+    """
+    if not server_manager.get_server_path(server_id):
+        return jsonify({
+            'success': False,
+            'error': 'Server not found',
+            'code': 404
+        }), 404
+    
+    max_size = current_app.config.get('FILE_UPLOAD_MAX_SIZE', 0)
+    if max_size and (request.content_length or 0) > max_size:
+        return jsonify({
+            'success': False,
+            'error': f'File is larger than {max_size} bytes',
+            'code': 413
+        }), 413
+    
+    result = server_manager.write_server_file_stream(server_id, path, request.stream, max_size=max_size)
+    
+    if not result['success']:
+        return jsonify({
+            'success': False,
+            'error': result['message'],
+            'code': 400
+        }), 400
+    
+    refresh_disk_usage(current_app.extensions['server_registry'].get(server_id))
+    
+    return jsonify({
+        'success': True,
+        'message': result['message'],
+        'path': path,
+        'size': result['size']
+    })
+
+def patch_server_file(server_manager, server_id, path):
+    """
+    Apply a JSON patch request to a server file.
+    
+    The body carries 'base_hash' (SHA-256 of the file as it was read) and
+    either 'diff' (a unified diff) or 'edits' (line-range replacements).
+    
+    Args:
+        server_manager (ServerManager): Server manager
+        server_id (str): Server ID
+        path (str): Relative path to the file
+    
+    Returns:
+        Response: JSON result with the new hash, or a JSON error (409 with
+            the current hash if the file changed in the meantime)
+    """
+    data = request.get_json(silent=True) or {}
+    
+    if not data.get('base_hash'):
+        return jsonify({
+            'success': False,
+            'error': 'Missing required field: base_hash',
+            'code': 400
+        }), 400
+    
+    edits = data.get('edits')
+    if edits is not None and not isinstance(edits, list):
+        return jsonify({
+            'success': False,
+            'error': 'edits must be a list',
+            'code': 400
+        }), 400
+    
+    result = server_manager.patch_server_file(
+        server_id,
+        path,
+        data['base_hash'],
+        diff=data.get('diff'),
+        edits=edits
+    )
+    
+    if result is None:
+        return jsonify({
+            'success': False,
+            'error': 'File not found',
+            'code': 404
+        }), 404
+    
+    if result.get('conflict'):
+        return jsonify({
+            'success': False,
+            'error': result['message'],
+            'hash': result['hash'],
+            'code': 409
+        }), 409
+    
+    if not result['success']:
+        return jsonify({
+            'success': False,
+            'error': result['message'],
+            'code': 400
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'message': result['message'],
+        'path': path,
+        'hash': result['hash']
+    })
+
+# Download, upload or patch a server file
+@api_bp.route('/servers/<server_id>/file', methods=['GET', 'PUT', 'PATCH'])
+@require_api_key
+def server_file(server_id):
+    """Stream a server file in either direction, or patch it."""
+    server_manager = current_app.extensions.get('server_manager')
+    
+    if not server_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Server manager not available',
+            'code': 500
+        }), 500
+    
+    path = request.args.get('path', '')
+    
+    if request.method == 'PUT':
+        return receive_server_file(server_manager, server_id, path)
+    
+    if request.method == 'PATCH':
+        return patch_server_file(server_manager, server_id, path)
+    
+    return send_server_file(server_manager, server_id, path)
+
+def view_file_window(server_manager, server_id):
+    """
+    Read a window of a server file from the request arguments.
+    
+    'mode' selects 'lines' (line and count), 'bytes' (offset and length) or
+    'tail' (count lines, then only what was appended after offset).
+    
+    Args:
+        server_manager (ServerManager): Server manager
+        server_id (str): Server ID
+    
+    Returns:
+        Response: JSON window of the file, or a JSON error
+    """
+    path = request.args.get('path', '')
+    mode = request.args.get('mode', 'lines')
+    
+    try:
+        tail_offset = request.args.get('offset') if mode == 'tail' else None
+        window = server_manager.view_server_file(
+            server_id,
+            path,
+            mode=mode,
+            offset=int(request.args.get('offset', 0)),
+            length=int(request.args.get('length', 65536)),
+            line=int(request.args.get('line', 0)),
+            count=min(int(request.args.get('count', 200)), 10000),
+            tail_offset=int(tail_offset) if tail_offset not in (None, '') else None
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'code': 400
+        }), 400
+    
+    if window is None:
+        return jsonify({
+            'success': False,
+            'error': 'File not found',
+            'code': 404
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'path': path,
+        'mode': mode,
+        **window
+    })
+
+# Read a window of a server file
+@api_bp.route('/servers/<server_id>/file/view', methods=['GET'])
+@require_api_key
+def view_file(server_id):
+    """Page through or follow a large server file."""
+    server_manager = current_app.extensions.get('server_manager')
+    
+    if not server_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Server manager not available',
+            'code': 500
+        }), 500
+    
+    return view_file_window(server_manager, server_id)
+
+# List jobs
+@api_bp.route('/jobs', methods=['GET'])
+@require_api_key
+def list_jobs():
+    """Get recent background jobs, newest first."""
+    job_manager = current_app.extensions.get('job_manager')
+    
+    if not job_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Job manager not available',
+            'code': 500
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'jobs': job_manager.list_jobs(request.args.get('server_id'))
+    })
+
+# Get job status
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+@require_api_key
+def get_job(job_id):
+    """Get the status of a background job."""
+    job_manager = current_app.extensions.get('job_manager')
+    
+    if not job_manager:
+        return jsonify({
+            'success': False,
+            'error': 'Job manager not available',
+            'code': 500
+        }), 500
+    
+    job = job_manager.get(job_id)
+    
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found',
+            'code': 404
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
     })
 
 # Get available Minecraft versions
@@ -348,11 +1079,58 @@ def get_versions():
         'versions': versions
     })
 
-def register_api(app, server_manager, server_creator):
+# Prometheus metrics
+@require_api_key
+def prometheus_metrics():
+    """Expose manager and server internals in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+def start_request_timer():
+    """Remember when a request started."""
+    g.request_started = time.perf_counter()
+
+def record_request(response):
+    """Record the latency and status of a finished request."""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_DURATION.observe(time.perf_counter() - started, method=request.method, route=route)
+        REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    return response
+
+def latest_samples(server_manager, resource_sampler, field):
+    """Get a resource field of every running server from its newest sample."""
+    values = {}
+    for server_id in list(server_manager.running_servers):
+        sample = resource_sampler.latest(server_id)
+        if sample:
+            values[(server_id,)] = sample[field]
+    return values
+
+def register_api(app, server_manager, server_creator, server_registry=None, job_manager=None,
+                 resource_sampler=None, lag_tracker=None, disk_usage_tracker=None):
     """Register API blueprint and extensions with the Flask app."""
     # Register extensions
     app.extensions['server_manager'] = server_manager
     app.extensions['server_creator'] = server_creator
+    app.extensions['server_registry'] = server_registry or server_manager.registry
+    app.extensions['job_manager'] = job_manager
+    app.extensions['resource_sampler'] = resource_sampler
+    app.extensions['lag_tracker'] = lag_tracker
+    app.extensions['disk_usage_tracker'] = disk_usage_tracker
+    
+    # Collect gauges when /metrics is scraped
+    RUNNING_SERVERS.callback = lambda: len(server_manager.running_servers)
+    if job_manager:
+        JOB_QUEUE_DEPTH.callback = job_manager.queue_depth
+    if resource_sampler:
+        SERVER_CPU.callback = lambda: latest_samples(server_manager, resource_sampler, 'cpu')
+        SERVER_RSS.callback = lambda: latest_samples(server_manager, resource_sampler, 'rss')
+    
+    # Time every request and serve /metrics next to the API
+    app.before_request(start_request_timer)
+    app.after_request(record_request)
+    app.add_url_rule('/metrics', 'prometheus_metrics', prometheus_metrics)
     
     # Register blueprint
     app.register_blueprint(api_bp)
\ No newline at end of file
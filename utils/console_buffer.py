@@ -0,0 +1,159 @@
+import re
+import time
+import threading
+
+# "[12:34:56] [Server thread/INFO]:" (vanilla, Forge, Fabric) and "[12:34:56 INFO]:" (Paper, Spigot)
+PREFIX_PATTERN = re.compile(r'^\[\d{2}:\d{2}:\d{2}\] \[(.+?)/([A-Z]+)\]|^\[\d{2}:\d{2}:\d{2} ([A-Z]+)\]')
+
+# Log levels from least to most severe
+LEVELS = ('TRACE', 'DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL')
+
+def parse_line_prefix(line):
+    """
+    Extract the log level and thread name from a console line's prefix.
+
+    Args:
+        line (str): Console line
+
+    Returns:
+        tuple: (level, thread), either of which may be None
+    """
+    match = PREFIX_PATTERN.match(line)
+    if not match:
+        return None, None
+
+    if match.group(3):
+        return match.group(3), None
+
+    level = match.group(2)
+    return ('WARN' if level == 'WARNING' else level), match.group(1)
+
+class ConsoleBuffer:
+    """
+    Fixed-capacity ring buffer of console lines.
+
+    Every line gets a monotonic sequence number and a timestamp, so clients
+    can resume from the last line they saw instead of re-reading the whole
+    buffer. The log level and thread are parsed once when a line is added.
+    Appending never reallocates: once full, the oldest line is overwritten
+    in place.
+    """
+
+    def __init__(self, capacity=1000, start_seq=0):
+        """
+        Initialize the console buffer.
+
+        Args:
+            capacity (int): Maximum number of lines kept
+            start_seq (int): Sequence number of the first appended line
+        """
+        self.capacity = capacity
+        self.start_seq = start_seq
+        self.next_seq = start_seq  # Sequence number of the next appended line
+        self._lines = [None] * capacity
+        self._times = [0.0] * capacity
+        self._levels = [None] * capacity
+        self._threads = [None] * capacity
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    @property
+    def first_seq(self):
+        """Sequence number of the oldest line still in the buffer."""
+        return max(self.start_seq, self.next_seq - self.capacity)
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest line, or start_seq - 1 if empty."""
+        return self.next_seq - 1
+
+    def append(self, line, timestamp=None):
+        """
+        Add a line, overwriting the oldest one when the buffer is full.
+
+        Args:
+            line (str): Console line
+            timestamp (float): Time the line was read (default: now)
+
+        Returns:
+            dict: The stored entry with its sequence number, level and thread
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        level, thread = parse_line_prefix(line)
+
+        with self._lock:
+            seq = self.next_seq
+            index = seq % self.capacity
+            self._lines[index] = line
+            self._times[index] = timestamp
+            self._levels[index] = level
+            self._threads[index] = thread
+            self.next_seq = seq + 1
+
+        return {'seq': seq, 'time': timestamp, 'line': line, 'level': level, 'thread': thread}
+
+    def since(self, seq=None, limit=None):
+        """
+        Get the entries that follow a sequence number.
+
+        Args:
+            seq (int): Last sequence number the caller has seen, or None for
+                the whole buffer
+            limit (int): Maximum number of entries, taken from the oldest
+
+        Returns:
+            list: Entries with 'seq', 'time', 'line', 'level' and 'thread' keys
+        """
+        with self._lock:
+            start = self.first_seq if seq is None else max(seq + 1, self.first_seq)
+            end = self.next_seq
+            if limit is not None:
+                end = min(end, start + limit)
+            return self._entries(start, end)
+
+    def tail(self, count):
+        """
+        Get the newest entries.
+
+        Args:
+            count (int): Number of entries
+
+        Returns:
+            list: Entries with 'seq', 'time', 'line', 'level' and 'thread' keys
+        """
+        if count <= 0:
+            return []
+
+        with self._lock:
+            start = max(self.first_seq, self.next_seq - count)
+            return self._entries(start, self.next_seq)
+
+    def tail_lines(self, count):
+        """
+        Get the text of the newest lines.
+
+        Args:
+            count (int): Number of lines
+
+        Returns:
+            list: Console lines
+        """
+        return [entry['line'] for entry in self.tail(count)]
+
+    def _entries(self, start, end):
+        """Build entries for sequence numbers in [start, end); caller holds the lock."""
+        entries = []
+        for seq in range(start, end):
+            index = seq % self.capacity
+            entries.append({
+                'seq': seq,
+                'time': self._times[index],
+                'line': self._lines[index],
+                'level': self._levels[index],
+                'thread': self._threads[index]
+            })
+        return entries
@@ -0,0 +1,356 @@
+import os
+import json
+import mmap
+import struct
+import bisect
+import logging
+import threading
+from utils.console_buffer import parse_line_prefix
+
+logger = logging.getLogger(__name__)
+
+# Each index entry is the little-endian end offset of one record in the log
+INDEX_ENTRY = struct.Struct('<Q')
+
+class ConsoleJournal:
+    """
+    Durable, segmented on-disk journal of a server's console output.
+
+    Lines are appended as compact JSON records to segment files named after
+    the sequence number of their first line. Next to every segment, an index
+    file stores the end offset of each record, so any line can be located
+    with one lookup. Reads go through mmap and only touch the requested
+    records, keeping memory use constant regardless of journal size.
+    """
+
+    def __init__(self, directory, segment_lines=65536, max_segments=16):
+        """
+        Initialize the console journal.
+
+        Args:
+            directory (str): Directory holding the segment and index files
+            segment_lines (int): Lines per segment before a new one is started
+            max_segments (int): Number of segments kept; older ones are deleted
+        """
+        self.directory = directory
+        self.segment_lines = segment_lines
+        self.max_segments = max_segments
+        self._segments = []  # Base sequence numbers of the segments, oldest first
+        self._log_fd = None
+        self._index_fd = None
+        self._log_size = 0
+        self._count = 0  # Lines in the segment being written
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @property
+    def first_seq(self):
+        """Sequence number of the oldest journaled line."""
+        with self._lock:
+            return self._segments[0] if self._segments else 0
+
+    @property
+    def next_seq(self):
+        """Sequence number the next appended line will get."""
+        with self._lock:
+            return self._segments[-1] + self._count if self._segments else 0
+
+    def _paths(self, base_seq):
+        """Get the log and index paths of a segment."""
+        name = f'{base_seq:016d}'
+        return (os.path.join(self.directory, f'{name}.log'),
+                os.path.join(self.directory, f'{name}.idx'))
+
+    def _load(self):
+        """Find existing segments and repair the newest one after a crash."""
+        for filename in os.listdir(self.directory):
+            base, ext = os.path.splitext(filename)
+            if ext == '.log' and base.isdigit():
+                self._segments.append(int(base))
+
+        self._segments.sort()
+
+        if not self._segments:
+            return
+
+        log_path, index_path = self._paths(self._segments[-1])
+
+        # Drop a partially written index entry, then any log bytes it does not cover
+        index_size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        index_size -= index_size % INDEX_ENTRY.size
+        log_size = 0
+
+        if index_size:
+            with open(index_path, 'rb') as f:
+                f.seek(index_size - INDEX_ENTRY.size)
+                log_size = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))[0]
+
+        with open(index_path, 'ab') as f:
+            f.truncate(index_size)
+        with open(log_path, 'ab') as f:
+            f.truncate(log_size)
+
+        self._count = index_size // INDEX_ENTRY.size
+
+    def _open_segment(self, first_seq):
+        """
+        Open the segment the next lines go into, starting one if needed.
+
+        A new segment is started when the current one is full, or when
+        first_seq does not follow its last line (lines were lost to a failed
+        write), so every line stays at position seq - base_seq of its segment.
+
+        Args:
+            first_seq (int): Sequence number of the next line to write
+        """
+        if (not self._segments or self._count >= self.segment_lines or
+                first_seq != self._segments[-1] + self._count):
+            self._close_segment()
+            self._segments.append(first_seq)
+            self._count = 0
+            self._prune()
+
+        if self._log_fd is None:
+            log_path, index_path = self._paths(self._segments[-1])
+            self._log_fd = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._index_fd = os.open(index_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._log_size = os.fstat(self._log_fd).st_size
+
+    def _close_segment(self):
+        """Close the files of the segment being written."""
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            os.close(self._index_fd)
+            self._log_fd = None
+            self._index_fd = None
+
+    def _prune(self):
+        """Delete the oldest segments beyond the retention limit."""
+        while len(self._segments) > self.max_segments:
+            base_seq = self._segments.pop(0)
+            for path in self._paths(base_seq):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def append(self, entries):
+        """
+        Append console entries to the journal.
+
+        All entries are written with one write to the log and one write to
+        the index. The log is written first, so readers bounded by the index
+        never see a partial record.
+
+        Args:
+            entries (list): Console entries with 'seq', 'time', 'line', 'level'
+                and 'thread' keys
+        """
+        with self._lock:
+            # Lines already journaled (never expected, but they would shift positions)
+            if self._segments:
+                next_seq = self._segments[-1] + self._count
+                entries = [entry for entry in entries if entry['seq'] >= next_seq]
+
+            try:
+                while entries:
+                    self._open_segment(entries[0]['seq'])
+
+                    room = self.segment_lines - self._count
+                    chunk, entries = entries[:room], entries[room:]
+
+                    records = []
+                    offsets = []
+                    end = self._log_size
+                    for entry in chunk:
+                        record = json.dumps({
+                            's': entry['seq'],
+                            't': round(entry['time'], 3),
+                            'l': entry.get('level'),
+                            'h': entry.get('thread'),
+                            'm': entry['line']
+                        }, separators=(',', ':')).encode('utf-8') + b'\n'
+                        records.append(record)
+                        end += len(record)
+                        offsets.append(INDEX_ENTRY.pack(end))
+
+                    self._write(self._log_fd, b''.join(records))
+                    self._write(self._index_fd, b''.join(offsets))
+                    self._log_size = end
+                    self._count += len(chunk)
+            except Exception as e:
+                logger.error(f"Error writing console journal in {self.directory}: {e}")
+
+                # The counters were not advanced, so the next lines do not follow
+                # on and start a new segment at their own sequence number
+                self._close_segment()
+
+    def _write(self, fd, data):
+        """Write all of data to a file, failing on a short write."""
+        written = os.write(fd, data)
+        if written != len(data):
+            raise OSError(f'Short write ({written} of {len(data)} bytes)')
+
+    def close(self):
+        """Close the journal files."""
+        with self._lock:
+            self._close_segment()
+
+    def read(self, start_seq, count):
+        """
+        Read a range of journaled lines.
+
+        Args:
+            start_seq (int): Sequence number of the first line
+            count (int): Maximum number of lines
+
+        Returns:
+            list: Entries with 'seq', 'time', 'line', 'level' and 'thread' keys
+        """
+        with self._lock:
+            segments = list(self._segments)
+
+        entries = []
+        if not segments or count <= 0:
+            return entries
+
+        start_seq = max(start_seq, segments[0])
+        position = bisect.bisect_right(segments, start_seq) - 1
+
+        while position < len(segments) and len(entries) < count:
+            base_seq = segments[position]
+            entries.extend(self._read_segment(base_seq, start_seq - base_seq, count - len(entries)))
+            position += 1
+            if position < len(segments):
+                start_seq = segments[position]
+
+        return entries
+
+    def tail(self, count):
+        """
+        Read the newest journaled lines.
+
+        Args:
+            count (int): Number of lines
+
+        Returns:
+            list: Entries with 'seq', 'time', 'line', 'level' and 'thread' keys
+        """
+        next_seq = self.next_seq
+        start_seq = max(self.first_seq, next_seq - count)
+        return self.read(start_seq, next_seq - start_seq)
+
+    def _read_segment(self, base_seq, first, count):
+        """
+        Read lines from one segment through mmap.
+
+        Args:
+            base_seq (int): Base sequence number of the segment
+            first (int): Position of the first line within the segment
+            count (int): Maximum number of lines
+
+        Returns:
+            list: Entries with 'seq', 'time', 'line', 'level' and 'thread' keys
+        """
+        log_path, index_path = self._paths(base_seq)
+        entries = []
+
+        try:
+            with open(index_path, 'rb') as index_file, open(log_path, 'rb') as log_file:
+                lines = os.fstat(index_file.fileno()).st_size // INDEX_ENTRY.size
+                last = min(lines, first + count)
+                if first >= last:
+                    return entries
+
+                with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index, \
+                     mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+                    start = INDEX_ENTRY.unpack_from(index, (first - 1) * INDEX_ENTRY.size)[0] if first else 0
+
+                    for position in range(first, last):
+                        end = INDEX_ENTRY.unpack_from(index, position * INDEX_ENTRY.size)[0]
+                        entries.append(self._decode(log[start:end]))
+                        start = end
+        except FileNotFoundError:
+            # The segment was pruned while we were reading
+            pass
+        except Exception as e:
+            logger.error(f"Error reading console journal segment {log_path}: {e}")
+
+        return entries
+
+    def scan(self, start_seq=None, start_time=None, end_time=None):
+        """
+        Iterate over journaled lines, oldest first.
+
+        Segments entirely outside the time window are skipped after looking
+        at their first and last records only.
+
+        Args:
+            start_seq (int): Sequence number to start from (default: oldest)
+            start_time (float): Skip lines logged before this Unix time
+            end_time (float): Stop at lines logged after this Unix time
+
+        Yields:
+            dict: Entries with 'seq', 'time', 'line', 'level' and 'thread' keys
+        """
+        with self._lock:
+            segments = list(self._segments)
+
+        for position, base_seq in enumerate(segments):
+            next_base = segments[position + 1] if position + 1 < len(segments) else None
+            if start_seq is not None and next_base is not None and next_base <= start_seq:
+                continue
+
+            first = max(0, start_seq - base_seq) if start_seq is not None else 0
+            log_path, index_path = self._paths(base_seq)
+
+            try:
+                with open(index_path, 'rb') as index_file, open(log_path, 'rb') as log_file:
+                    lines = os.fstat(index_file.fileno()).st_size // INDEX_ENTRY.size
+                    if first >= lines:
+                        continue
+
+                    with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index, \
+                         mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+
+                        def record(position):
+                            start = INDEX_ENTRY.unpack_from(index, (position - 1) * INDEX_ENTRY.size)[0] if position else 0
+                            end = INDEX_ENTRY.unpack_from(index, position * INDEX_ENTRY.size)[0]
+                            return self._decode(log[start:end])
+
+                        if start_time is not None and record(lines - 1)['time'] < start_time:
+                            continue
+                        if end_time is not None and record(first)['time'] > end_time:
+                            return
+
+                        for position in range(first, lines):
+                            entry = record(position)
+                            if start_time is not None and entry['time'] < start_time:
+                                continue
+                            if end_time is not None and entry['time'] > end_time:
+                                return
+                            yield entry
+            except FileNotFoundError:
+                # The segment was pruned while we were reading
+                continue
+
+    def _decode(self, raw):
+        """
+        Decode one journal record.
+
+        Args:
+            raw (bytes): JSON record
+
+        Returns:
+            dict: Entry with 'seq', 'time', 'line', 'level' and 'thread' keys
+        """
+        record = json.loads(raw)
+
+        if 'l' in record:
+            level, thread = record['l'], record['h']
+        else:
+            level, thread = parse_line_prefix(record['m'])
+
+        return {'seq': record['s'], 'time': record['t'], 'line': record['m'], 'level': level, 'thread': thread}
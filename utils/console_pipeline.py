@@ -0,0 +1,243 @@
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class ConsolePipeline:
+    """
+    Coalesces console lines into batches and fans them out to subscribers.
+
+    Lines published for a server are collected for a short window (or until
+    a batch is full) and sent as a single console_batch event to every client
+    watching that server. Each batch must be acknowledged by the client; a
+    client with too many unacknowledged batches is skipped and later told how
+    many lines it missed, so a slow client never makes the server queue
+    without limit.
+    """
+
+    def __init__(self, socketio, flush_interval=0.05, max_batch_lines=256,
+                 max_inflight=8, ack_timeout=10):
+        """
+        Initialize the console pipeline.
+
+        Args:
+            socketio: SocketIO instance for real-time communication
+            flush_interval (float): Seconds to collect lines before sending a batch
+            max_batch_lines (int): Lines per batch that trigger an early flush
+            max_inflight (int): Unacknowledged batches a client may have before
+                lines are dropped for it
+            ack_timeout (float): Seconds after which an unacknowledged batch is
+                considered lost
+        """
+        self.socketio = socketio
+        self.flush_interval = flush_interval
+        self.max_batch_lines = max_batch_lines
+        self.max_inflight = max_inflight
+        self.ack_timeout = ack_timeout
+        self._subscribers = {}  # Client states keyed by server ID, then session ID
+        self._pending = {}  # Lines waiting to be sent, keyed by server ID
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def subscribe(self, server_id, sid, hold=False):
+        """
+        Start sending a server's console batches to a client.
+
+        With hold set, batches are kept back until send_history() has sent
+        the client its history, so live lines never arrive before it.
+
+        Args:
+            server_id (str): Server ID
+            sid (str): Socket.IO session ID of the client
+            hold (bool): Whether to hold batches until send_history()
+        """
+        with self._lock:
+            self._subscribers.setdefault(server_id, {})[sid] = {
+                'inflight': deque(),  # Send times of unacknowledged batches
+                'dropped': 0,
+                'held': [] if hold else None  # Batches waiting for the history
+            }
+
+    def unsubscribe(self, server_id, sid):
+        """
+        Stop sending a server's console batches to a client.
+
+        Args:
+            server_id (str): Server ID
+            sid (str): Socket.IO session ID of the client
+        """
+        with self._lock:
+            clients = self._subscribers.get(server_id)
+            if clients:
+                clients.pop(sid, None)
+                if not clients:
+                    del self._subscribers[server_id]
+
+    def drop_client(self, sid):
+        """
+        Remove a disconnected client from every server it watched.
+
+        Args:
+            sid (str): Socket.IO session ID of the client
+        """
+        with self._lock:
+            for server_id in list(self._subscribers):
+                clients = self._subscribers[server_id]
+                clients.pop(sid, None)
+                if not clients:
+                    del self._subscribers[server_id]
+
+    def publish(self, server_id, entry):
+        """
+        Queue a console entry for the server's subscribers.
+
+        Args:
+            server_id (str): Server ID
+            entry (dict): Console entry with 'seq', 'time' and 'line' keys
+        """
+        with self._lock:
+            if server_id not in self._subscribers:
+                return
+
+            pending = self._pending.setdefault(server_id, [])
+            pending.append(entry)
+            full = len(pending) >= self.max_batch_lines
+
+        if full:
+            self._wakeup.set()
+
+    def send_event(self, server_id, event, data):
+        """
+        Send an event about a server to the clients that joined it.
+
+        Args:
+            server_id (str): Server ID
+            event (str): Socket.IO event name
+            data (dict): Event payload
+        """
+        with self._lock:
+            sids = list(self._subscribers.get(server_id, ()))
+
+        for sid in sids:
+            self.socketio.emit(event, data, to=sid)
+
+    def send_history(self, server_id, sid, entries, dropped=0, reset=False):
+        """
+        Send buffered console history to a single client.
+
+        Batches held for the client since it subscribed are sent right after
+        the history, and later batches follow them.
+
+        Args:
+            server_id (str): Server ID
+            sid (str): Socket.IO session ID of the client
+            entries (list): Console entries
+            dropped (int): Lines the client missed that are no longer buffered
+            reset (bool): Whether the client should discard what it has shown
+        """
+        # Emitting under the lock keeps a concurrent flush from overtaking us
+        with self._lock:
+            client = self._subscribers.get(server_id, {}).get(sid)
+            held = client['held'] if client else None
+            if client:
+                client['held'] = None
+
+            if entries or dropped or reset:
+                for start in range(0, max(len(entries), 1), self.max_batch_lines):
+                    self.socketio.emit('console_batch', {
+                        'server_id': server_id,
+                        'entries': entries[start:start + self.max_batch_lines],
+                        'dropped': dropped if start == 0 else 0,
+                        'reset': reset and start == 0
+                    }, to=sid)
+
+            for batch in held or ():
+                self.socketio.emit('console_batch', {
+                    'server_id': server_id,
+                    'entries': batch,
+                    'dropped': 0,
+                    'reset': False
+                }, to=sid)
+
+    def flush(self):
+        """Send every pending line to the clients that can keep up."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+
+            deliveries = []
+            now = time.time()
+
+            for server_id, entries in pending.items():
+                clients = self._subscribers.get(server_id, {})
+
+                for start in range(0, len(entries), self.max_batch_lines):
+                    batch = entries[start:start + self.max_batch_lines]
+
+                    for sid, client in clients.items():
+                        held = client['held']
+                        if held is not None:
+                            # Waiting for its history; keep a bounded backlog
+                            if len(held) < self.max_inflight:
+                                held.append(batch)
+                            else:
+                                client['dropped'] += len(batch)
+                            continue
+
+                        inflight = client['inflight']
+
+                        # Forget batches whose acknowledgement never arrived
+                        while inflight and now - inflight[0] > self.ack_timeout:
+                            inflight.popleft()
+
+                        # Skip clients that are falling behind
+                        if len(inflight) >= self.max_inflight:
+                            client['dropped'] += len(batch)
+                            continue
+
+                        inflight.append(now)
+                        deliveries.append((server_id, sid, client, batch, client['dropped']))
+                        client['dropped'] = 0
+
+        for server_id, sid, client, batch, dropped in deliveries:
+            try:
+                self.socketio.emit('console_batch', {
+                    'server_id': server_id,
+                    'entries': batch,
+                    'dropped': dropped,
+                    'reset': False
+                }, to=sid, callback=self._make_ack(client))
+            except Exception as e:
+                logger.error(f"Error sending console batch to {sid}: {e}")
+
+    def _make_ack(self, client):
+        """
+        Build the acknowledgement callback for a batch sent to a client.
+
+        Args:
+            client (dict): Client state
+
+        Returns:
+            callable: Callback releasing one in-flight batch
+        """
+        def ack(*args):
+            with self._lock:
+                if client['inflight']:
+                    client['inflight'].popleft()
+        return ack
+
+    def _run(self):
+        """Flush pending lines every interval, or sooner when a batch fills up."""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing console output: {e}")
@@ -0,0 +1,174 @@
+import os
+import logging
+import selectors
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class ConsoleReactor:
+    """
+    Reads the console output of every server process on a single thread.
+
+    Server stdout pipes are registered with one selector (epoll on Linux)
+    and read in raw chunks without blocking. Chunks are split into lines
+    incrementally, so a line spread over several reads is only delivered
+    once it is complete. The number of threads stays the same no matter how
+    many servers are running: one for reading and one for handling process
+    exits, which may block while the process is reaped.
+    """
+
+    def __init__(self, chunk_size=65536, max_line_length=65536):
+        """
+        Initialize the console reactor.
+
+        Args:
+            chunk_size (int): Maximum bytes read from a pipe at once
+            max_line_length (int): Bytes after which an unterminated line is
+                delivered anyway
+        """
+        self.chunk_size = chunk_size
+        self.max_line_length = max_line_length
+        self._selector = selectors.DefaultSelector()
+        self._pending = []  # Streams added since the selector last woke up
+        self._lock = threading.Lock()
+
+        # Writing to this pipe wakes the selector so it picks up new streams
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ, None)
+
+        self._closer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mcsm-console-exit')
+        self._thread = threading.Thread(target=self._run, name='mcsm-console-reactor', daemon=True)
+        self._thread.start()
+
+    def add(self, stream, on_lines, on_close):
+        """
+        Start reading a process output stream.
+
+        Args:
+            stream: Readable pipe (anything with a fileno() method)
+            on_lines (callable): Called on the reactor thread with a list of
+                decoded lines, without their line endings
+            on_close (callable): Called without arguments once the stream has
+                reached end of file and every line has been delivered
+        """
+        fd = stream.fileno()
+        os.set_blocking(fd, False)
+
+        with self._lock:
+            self._pending.append({
+                'fd': fd,
+                'on_lines': on_lines,
+                'on_close': on_close,
+                'partial': b''
+            })
+
+        try:
+            os.write(self._wakeup_write, b'\0')
+        except BlockingIOError:
+            # The selector is already due to wake up
+            pass
+
+    def stream_count(self):
+        """
+        Get the number of streams being read.
+
+        Returns:
+            int: Number of registered streams
+        """
+        with self._lock:
+            return len(self._selector.get_map()) - 1 + len(self._pending)
+
+    def _run(self):
+        """Wait for readable pipes and read them."""
+        while True:
+            try:
+                events = self._selector.select()
+            except Exception as e:
+                logger.error(f"Error waiting for console output: {e}")
+                continue
+
+            for key, _ in events:
+                if key.data is None:
+                    self._register_pending()
+                else:
+                    self._read(key.data)
+
+    def _register_pending(self):
+        """Drain the wakeup pipe and register newly added streams."""
+        try:
+            while os.read(self._wakeup_read, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+
+            for state in pending:
+                self._selector.register(state['fd'], selectors.EVENT_READ, state)
+
+    def _read(self, state):
+        """
+        Read one chunk from a stream and deliver the complete lines in it.
+
+        Args:
+            state (dict): Stream state
+        """
+        try:
+            chunk = os.read(state['fd'], self.chunk_size)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error(f"Error reading console output: {e}")
+            chunk = b''
+
+        if not chunk:
+            # End of file: deliver what is left and hand the exit off
+            with self._lock:
+                self._selector.unregister(state['fd'])
+            if state['partial']:
+                self._deliver(state, [state['partial']])
+                state['partial'] = b''
+            self._closer.submit(self._close, state)
+            return
+
+        parts = (state['partial'] + chunk).split(b'\n')
+        state['partial'] = parts.pop()
+
+        if len(state['partial']) >= self.max_line_length:
+            parts.append(state['partial'])
+            state['partial'] = b''
+
+        if parts:
+            self._deliver(state, parts)
+
+    def _deliver(self, state, parts):
+        """
+        Decode raw lines and pass them to the stream's line callback.
+
+        Args:
+            state (dict): Stream state
+            parts (list): Raw lines without the newline
+        """
+        lines = [part.decode('utf-8', errors='replace').rstrip() for part in parts]
+
+        try:
+            state['on_lines'](lines)
+        except Exception as e:
+            logger.error(f"Error handling console output: {e}")
+
+    def _close(self, state):
+        """
+        Run a stream's close callback.
+
+        Args:
+            state (dict): Stream state
+        """
+        try:
+            state['on_close']()
+        except Exception as e:
+            logger.error(f"Error handling console close: {e}")
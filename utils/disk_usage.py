@@ -0,0 +1,398 @@
+import os
+import time
+import errno
+import logging
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+logger = logging.getLogger(__name__)
+
+# Latest usage of each server keyed by server path, read without any I/O
+_published = {}
+_published_lock = threading.Lock()
+
+def get_disk_usage(server_path):
+    """
+    Get the last computed disk usage of a server.
+
+    This only reads what the background DiskUsageTracker has published, so
+    it is safe to call while answering a request.
+
+    Args:
+        server_path (str): Path to the server directory
+
+    Returns:
+        dict: 'total' and 'folders' (bytes per top-level folder) in bytes,
+            'files', 'directories' and 'updated' (timestamp), or None if the
+            server has not been measured yet
+    """
+    with _published_lock:
+        usage = _published.get(server_path)
+
+    if not usage:
+        return None
+
+    return dict(usage, folders=dict(usage['folders']))
+
+def _entry_size(stat_result):
+    """Get the space an entry takes on disk, as du counts it."""
+    blocks = getattr(stat_result, 'st_blocks', None)
+    return blocks * 512 if blocks is not None else stat_result.st_size
+
+class DiskUsageTracker(FileSystemEventHandler):
+    """
+    Keeps the disk usage of every server up to date in the background.
+
+    Each server is measured once with a full walk in a low-priority worker
+    thread. Afterwards the size of each directory's own files is kept in
+    memory and the server folders are watched recursively, so a change only
+    rescans the directories it touched and adjusts the totals by the
+    difference. A periodic full rescan corrects anything the watcher
+    missed, and is the only update if watching is unavailable.
+
+    Hard-linked files are counted once per link, like du -l.
+    """
+
+    def __init__(self, registry, rescan_interval=21600, debounce=30, pause=0.01):
+        """
+        Initialize the disk usage tracker.
+
+        Args:
+            registry (ServerRegistry): Registry of the servers to measure
+            rescan_interval (float): Seconds between full rescans of a server
+                (0 disables them)
+            debounce (float): Seconds to collect filesystem events before
+                rescanning the directories they touched
+            pause (float): Seconds the worker sleeps after every 256
+                directories, to leave disk bandwidth to the servers
+        """
+        self.registry = registry
+        self.rescan_interval = rescan_interval
+        self.debounce = debounce
+        self.pause = pause
+        self.observer = None
+        self._watches = {}  # Observed watches keyed by server path
+        self._servers = {}  # Usage being maintained, keyed by server path
+        self._dirs = {}  # (own bytes, own files, child directories) keyed by directory path
+        self._scanned = {}  # Time of the last full scan keyed by server path
+        self._dirty = set()  # Directories touched by events since the last update
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._visited = 0
+
+    def start(self):
+        """Start the background worker and the filesystem watcher."""
+        if self._thread:
+            return
+
+        try:
+            self.observer = Observer()
+            self.observer.daemon = True
+            self.observer.start()
+        except Exception as e:
+            logger.error(f"Error starting disk usage watcher, falling back to periodic rescans: {e}")
+            self.observer = None
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='disk-usage', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the worker and the watcher."""
+        self._stopped.set()
+        self._wake.set()
+
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+        if self.observer:
+            self.observer.stop()
+            self.observer.join(timeout=5)
+            self.observer = None
+
+        self._watches = {}
+
+    def refresh(self, server_path):
+        """
+        Bring a server up to date as soon as the worker is free.
+
+        Call this after creating or deleting a server or writing files in
+        it. New servers are measured and removed ones forgotten right away
+        instead of at the next debounce. A server that is not being watched
+        is rescanned in full, since no event will report the change.
+
+        Args:
+            server_path (str): Path to the server directory
+        """
+        if server_path not in self._watches:
+            self._scanned.pop(server_path, None)
+        self._wake.set()
+
+    def on_any_event(self, event):
+        """
+        Mark the directories touched by a filesystem event for rescanning.
+
+        Args:
+            event: watchdog filesystem event
+        """
+        # Children report their own events; a directory's mtime tells us nothing
+        if event.is_directory and event.event_type == 'modified':
+            return
+
+        touched = set()
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            if path:
+                touched.add(os.path.dirname(path))
+                if event.is_directory:
+                    touched.add(path)
+
+        with self._lock:
+            self._dirty.update(touched)
+
+    def _run(self):
+        """Measure servers and apply changes until stopped."""
+        self._lower_priority()
+
+        while not self._stopped.is_set():
+            try:
+                self._sync_servers()
+                self._apply_changes()
+            except Exception as e:
+                logger.error(f"Error updating disk usage: {e}")
+
+            self._wake.wait(self.debounce)
+            self._wake.clear()
+
+    def _lower_priority(self):
+        """Run the worker thread at the lowest CPU priority where supported."""
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            # Not supported here; the pauses between directories still apply
+            pass
+
+    def _sync_servers(self):
+        """Measure new servers, rescan stale ones and forget removed ones."""
+        paths = {server['path'] for server in self.registry.get_all()}
+
+        for server_path in list(self._servers):
+            if server_path not in paths:
+                self._forget_server(server_path)
+
+        now = time.time()
+        for server_path in sorted(paths):
+            if self._stopped.is_set():
+                return
+
+            last_scan = self._scanned.get(server_path)
+            stale = self.rescan_interval and last_scan and now - last_scan > self.rescan_interval
+            if last_scan is None or stale:
+                self._watch_server(server_path)
+                self._scan_server(server_path)
+
+    def _watch_server(self, server_path):
+        """
+        Watch a server folder recursively.
+
+        Args:
+            server_path (str): Path to the server directory
+        """
+        if not self.observer or server_path in self._watches:
+            return
+
+        try:
+            self._watches[server_path] = self.observer.schedule(self, server_path, recursive=True)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                # Every directory of the tree needs an inotify watch
+                logger.warning(f"Cannot watch {server_path} for disk usage: the inotify watch limit "
+                               f"is reached (raise fs.inotify.max_user_watches); relying on periodic rescans")
+            else:
+                logger.warning(f"Cannot watch {server_path} for disk usage, relying on periodic rescans: {e}")
+        except Exception as e:
+            logger.warning(f"Cannot watch {server_path} for disk usage, relying on periodic rescans: {e}")
+
+    def _forget_server(self, server_path):
+        """
+        Drop a server that is no longer in the registry.
+
+        Args:
+            server_path (str): Path to the server directory
+        """
+        watch = self._watches.pop(server_path, None)
+        if watch and self.observer:
+            try:
+                self.observer.unschedule(watch)
+            except Exception:
+                # The watch is already gone along with the directory
+                pass
+
+        self._drop_tree(server_path, server_path)
+        self._servers.pop(server_path, None)
+        self._scanned.pop(server_path, None)
+
+        with _published_lock:
+            _published.pop(server_path, None)
+
+    def _scan_server(self, server_path):
+        """
+        Measure a whole server folder.
+
+        Args:
+            server_path (str): Path to the server directory
+        """
+        started = time.time()
+
+        # Events during the walk are applied afterwards
+        self._drop_tree(server_path, server_path)
+        self._servers[server_path] = {'total': 0, 'files': 0, 'directories': 0, 'folders': {}}
+        self._add_tree(server_path, server_path)
+
+        self._scanned[server_path] = time.time()
+        self._publish(server_path)
+
+        usage = self._servers[server_path]
+        logger.debug(f"Measured {server_path}: {usage['total']} bytes in {usage['files']} files "
+                     f"({time.time() - started:.1f}s)")
+
+    def _scan_directory(self, directory):
+        """
+        Measure the files directly inside a directory.
+
+        Args:
+            directory (str): Path to the directory
+
+        Returns:
+            tuple: (own bytes, including the directory itself, own files,
+                child directory paths), or None if the directory cannot be read
+        """
+        files = 0
+        children = []
+
+        try:
+            size = _entry_size(os.lstat(directory))
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            children.append(entry.path)
+                        else:
+                            size += _entry_size(entry.stat(follow_symlinks=False))
+                            files += 1
+                    except OSError:
+                        # Deleted while scanning
+                        continue
+        except OSError:
+            return None
+
+        self._visited += 1
+        if self.pause and self._visited % 256 == 0:
+            time.sleep(self.pause)
+
+        return size, files, children
+
+    def _server_of(self, directory):
+        """Get the path of the server a directory belongs to."""
+        for server_path in self._servers:
+            if directory == server_path or directory.startswith(server_path + os.sep):
+                return server_path
+        return None
+
+    def _adjust(self, server_path, directory, size, files, directories):
+        """Add the differences measured in one directory to its server's totals."""
+        usage = self._servers.get(server_path)
+        if usage is None:
+            return
+
+        usage['total'] += size
+        usage['files'] += files
+        usage['directories'] += directories
+
+        if directory != server_path:
+            folder = directory[len(server_path) + 1:].split(os.sep, 1)[0]
+            usage['folders'][folder] = usage['folders'].get(folder, 0) + size
+
+    def _add_tree(self, server_path, directory):
+        """Measure a directory and everything below it."""
+        stack = [directory]
+
+        while stack and not self._stopped.is_set():
+            path = stack.pop()
+            scanned = self._scan_directory(path)
+            if scanned is None:
+                continue
+
+            size, files, children = scanned
+            self._dirs[path] = (size, files, children)
+            self._adjust(server_path, path, size, files, 0 if path == server_path else 1)
+            stack.extend(children)
+
+    def _drop_tree(self, server_path, directory):
+        """Forget a directory and everything below it."""
+        stack = [directory]
+
+        while stack:
+            path = stack.pop()
+            known = self._dirs.pop(path, None)
+            if known is None:
+                continue
+
+            size, files, children = known
+            self._adjust(server_path, path, -size, -files, 0 if path == server_path else -1)
+            stack.extend(children)
+
+        # A removed top-level folder no longer has an entry
+        usage = self._servers.get(server_path)
+        if usage and os.path.dirname(directory) == server_path:
+            usage['folders'].pop(os.path.basename(directory), None)
+
+    def _apply_changes(self):
+        """Rescan the directories touched by events and update the totals."""
+        with self._lock:
+            dirty = self._dirty
+            self._dirty = set()
+
+        changed = set()
+
+        # Parents first, so new and removed subtrees are handled as a whole
+        for directory in sorted(dirty, key=len):
+            if self._stopped.is_set():
+                break
+
+            known = self._dirs.get(directory)
+            server_path = self._server_of(directory) if known else None
+            if not server_path:
+                continue
+
+            scanned = self._scan_directory(directory)
+            if scanned is None:
+                continue  # Removed; its parent drops it
+
+            size, files, children = scanned
+            old_size, old_files, old_children = known
+            self._dirs[directory] = (size, files, children)
+            self._adjust(server_path, directory, size - old_size, files - old_files, 0)
+
+            for child in set(old_children) - set(children):
+                self._drop_tree(server_path, child)
+            for child in set(children) - set(old_children):
+                self._add_tree(server_path, child)
+
+            changed.add(server_path)
+
+        for server_path in changed:
+            self._publish(server_path)
+
+    def _publish(self, server_path):
+        """Make the current usage of a server visible to readers."""
+        usage = self._servers.get(server_path)
+        if usage is None:
+            return
+
+        snapshot = dict(usage, folders=dict(usage['folders']), updated=time.time())
+        with _published_lock:
+            _published[server_path] = snapshot
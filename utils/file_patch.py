@@ -0,0 +1,178 @@
+import re
+import hashlib
+
+# Header of a unified diff hunk: @@ -start,count +start,count @@
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+def content_hash(data):
+    """
+    Get the version hash of file contents.
+
+    Args:
+        data (bytes): File contents
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def decode(data):
+    """Decode file contents so that they encode back to the same bytes."""
+    return data.decode('utf-8', errors='surrogateescape')
+
+def encode(text):
+    """Encode text produced by decode() back to file contents."""
+    return text.encode('utf-8', errors='surrogateescape')
+
+def split_lines(text):
+    """
+    Split text into lines, keeping their line endings.
+
+    Only '\\n' ends a line, so '\\r\\n' endings stay intact and other
+    separators (form feeds, Unicode line breaks) do not start a new line.
+    """
+    lines = text.split('\n')
+    last = lines.pop()
+    lines = [line + '\n' for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+def _newline(lines):
+    """Get the line ending used by a file ('\\r\\n' or '\\n')."""
+    for line in lines:
+        if line.endswith('\n'):
+            return '\r\n' if line.endswith('\r\n') else '\n'
+    return '\n'
+
+def _strip(line):
+    """Remove the line ending of a line."""
+    if line.endswith('\r\n'):
+        return line[:-2]
+    if line.endswith('\n'):
+        return line[:-1]
+    return line
+
+def _join(lines, newline):
+    """Join lines, ending every line but the last one."""
+    return ''.join(line if line.endswith('\n') or index == len(lines) - 1 else line + newline
+                   for index, line in enumerate(lines))
+
+def apply_line_edits(text, edits):
+    """
+    Replace ranges of lines.
+
+    Every edit replaces lines [start, end) of the original text (counted
+    from 0) with 'text', whose '\\n' line endings are converted to those of
+    the file. start == end inserts before that line. Edits must not overlap.
+
+    Args:
+        text (str): Original text
+        edits (list): Dicts with 'start', 'end' and 'text'
+
+    Returns:
+        str: Patched text
+
+    Raises:
+        ValueError: If an edit is malformed, out of range or overlaps another
+    """
+    lines = split_lines(text)
+    newline = _newline(lines)
+
+    try:
+        ranges = sorted((int(edit['start']), int(edit['end']), str(edit['text'])) for edit in edits)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Edits need integer 'start' and 'end' and a 'text'")
+
+    previous_end = 0
+    for start, end, _ in ranges:
+        if start < previous_end or end < start or end > len(lines):
+            raise ValueError(f'Edit of lines {start}-{end} is out of range or overlaps another edit')
+        previous_end = end
+
+    # Apply from the bottom so earlier line numbers stay valid
+    for start, end, replacement in reversed(ranges):
+        replacement = replacement.replace('\r\n', '\n').replace('\n', newline)
+        lines[start:end] = split_lines(replacement)
+
+    return _join(lines, newline)
+
+def apply_unified_diff(text, diff):
+    """
+    Apply a unified diff (as made by diff -u or git diff) to text.
+
+    File headers are ignored and hunks must apply exactly at the lines they
+    name; context and removed lines are compared without their line endings.
+
+    Args:
+        text (str): Original text
+        diff (str): Unified diff of a single file
+
+    Returns:
+        str: Patched text
+
+    Raises:
+        ValueError: If the diff is malformed or does not match the text
+    """
+    lines = split_lines(text)
+    newline = _newline(lines)
+    diff_lines = [line.rstrip('\r') for line in diff.split('\n')]
+    if diff_lines and diff_lines[-1] == '':
+        diff_lines.pop()
+
+    output = []
+    position = 0  # Original lines consumed so far
+    index = 0
+    hunks = 0
+
+    while index < len(diff_lines):
+        header = HUNK_HEADER.match(diff_lines[index])
+        index += 1
+        if not header:
+            if hunks:
+                raise ValueError(f'Unexpected line {index} in diff')
+            continue  # File headers before the first hunk
+        hunks += 1
+
+        old_count = int(header.group(2)) if header.group(2) is not None else 1
+        # An empty old range names the line after which the new lines go
+        start = int(header.group(1)) - 1 if old_count else int(header.group(1))
+        if start < position or start > len(lines):
+            raise ValueError(f'Hunk {hunks} is out of range or out of order')
+
+        output.extend(lines[position:start])
+        position = start
+        consumed = 0
+        last_op = None
+
+        while index < len(diff_lines) and not diff_lines[index].startswith('@@'):
+            line = diff_lines[index]
+            index += 1
+            op, body = (line[0], line[1:]) if line else (' ', '')
+
+            if op in (' ', '-'):
+                if position >= len(lines) or _strip(lines[position]) != body:
+                    raise ValueError(f'Hunk {hunks} does not match line {position + 1}')
+                if op == ' ':
+                    output.append(lines[position])
+                position += 1
+                consumed += 1
+            elif op == '+':
+                output.append(body + newline)
+            elif op == '\\':
+                # "\ No newline at end of file" after an added line
+                if last_op == '+':
+                    output[-1] = _strip(output[-1])
+                continue
+            else:
+                raise ValueError(f'Unexpected line {index} in diff')
+            last_op = op
+
+        if consumed != old_count:
+            raise ValueError(f'Hunk {hunks} expects {old_count} original lines but has {consumed}')
+
+    if not hunks:
+        raise ValueError('Diff has no hunks')
+
+    output.extend(lines[position:])
+    return _join(output, newline)
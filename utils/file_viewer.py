@@ -0,0 +1,318 @@
+import os
+import mmap
+import bisect
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+
+# Bytes between two checkpoints of a newline index
+INDEX_CHUNK = 262144
+
+# Bytes hashed at the end of the indexed part to tell appends from rewrites
+TAIL_CHECK = 4096
+
+class NewlineIndex:
+    """
+    Sparse index of the line numbers in a file.
+
+    A checkpoint is kept every INDEX_CHUNK bytes with the number of lines
+    that start before it, so finding a line costs a binary search plus a
+    scan of at most one chunk, and a 300 MB log needs a few thousand
+    entries. When a file grows by appending (a log being written), only the
+    new bytes are scanned.
+    """
+
+    def __init__(self):
+        self.identity = None  # (device, inode) of the indexed file
+        self.mtime = None
+        self.size = 0
+        self.newlines = 0  # Newlines in the first `size` bytes
+        self.tail_hash = None  # Hash of the bytes just before `size`
+        self.offsets = array('Q', [0])  # Checkpoint byte offsets
+        self.counts = array('Q', [0])  # Newlines before each checkpoint
+        self.lock = threading.Lock()  # Held while updating or reading the index
+
+    def _tail_hash(self, data, size):
+        """Hash the bytes just before an offset."""
+        return hashlib.blake2b(data[max(0, size - TAIL_CHECK):size], digest_size=16).digest()
+
+    def update(self, data, stat_result):
+        """
+        Bring the index up to date with the file.
+
+        Args:
+            data (mmap.mmap): Mapped file contents
+            stat_result (os.stat_result): Current status of the file
+        """
+        identity = (stat_result.st_dev, stat_result.st_ino)
+        size = stat_result.st_size
+
+        if identity == self.identity and size == self.size and stat_result.st_mtime_ns == self.mtime:
+            return
+
+        appended = (identity == self.identity and size > self.size and
+                    self._tail_hash(data, self.size) == self.tail_hash)
+
+        if not appended:
+            self.offsets = array('Q', [0])
+            self.counts = array('Q', [0])
+
+        # Rescan from the last checkpoint, which may have been a partial chunk
+        position = self.offsets[-1]
+        count = self.counts[-1]
+        while position + INDEX_CHUNK <= size:
+            count += data[position:position + INDEX_CHUNK].count(b'\n')
+            position += INDEX_CHUNK
+            self.offsets.append(position)
+            self.counts.append(count)
+
+        self.newlines = count + data[position:size].count(b'\n')
+        self.identity = identity
+        self.mtime = stat_result.st_mtime_ns
+        self.size = size
+        self.tail_hash = self._tail_hash(data, size)
+
+    def line_count(self, data):
+        """Get the number of lines, counting an unterminated last line."""
+        if not self.size:
+            return 0
+        return self.newlines + (0 if data[self.size - 1:self.size] == b'\n' else 1)
+
+    def line_offset(self, data, line):
+        """
+        Get the byte offset where a line starts.
+
+        Args:
+            data (mmap.mmap): Mapped file contents
+            line (int): Line number, starting at 0
+
+        Returns:
+            int: Offset of the line, or the file size if there is no such line
+        """
+        if line <= 0:
+            return 0
+        if line > self.newlines:
+            return self.size
+
+        # Last checkpoint with fewer than `line` newlines before it
+        checkpoint = bisect.bisect_left(self.counts, line) - 1
+        position = self.offsets[checkpoint]
+        for _ in range(line - self.counts[checkpoint]):
+            position = data.find(b'\n', position, self.size) + 1
+        return position
+
+class FileViewer:
+    """
+    Reads windows of large text files without loading them.
+
+    Files are memory-mapped for each read and only the requested window is
+    copied out. Line windows use a NewlineIndex that is kept per file and
+    extended as the file grows, and tail windows let a client follow a log
+    by passing back the offset it has read up to.
+    """
+
+    def __init__(self, max_window=4194304, max_indexes=16):
+        """
+        Initialize the file viewer.
+
+        Args:
+            max_window (int): Most bytes returned by one read
+            max_indexes (int): Files whose newline index is kept
+        """
+        self.max_window = max_window
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()  # NewlineIndex keyed by path, least recently used first
+        self._lock = threading.Lock()
+
+    def _open(self, path):
+        """
+        Map a file for reading.
+
+        Returns:
+            tuple: (mmap or None for an empty file, os.stat_result)
+        """
+        with open(path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            if not stat_result.st_size:
+                return None, stat_result
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), stat_result
+
+    def _index(self, path):
+        """
+        Get the newline index of a file, creating it on first use.
+
+        Only the lookup happens under the viewer lock; callers update and
+        read the index under its own lock, so scanning one large file never
+        blocks views of other files.
+        """
+        with self._lock:
+            index = self._indexes.pop(path, None) or NewlineIndex()
+            self._indexes[path] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+            return index
+
+    def forget(self, path):
+        """
+        Drop the newline index of a file.
+
+        Args:
+            path (str): Path to the file
+        """
+        with self._lock:
+            self._indexes.pop(path, None)
+
+    def _decode(self, data):
+        """Decode a window of file contents for display."""
+        return data.decode('utf-8', errors='replace')
+
+    def read_bytes(self, path, offset=0, length=65536):
+        """
+        Read a byte range of a file.
+
+        Args:
+            path (str): Path to the file
+            offset (int): First byte
+            length (int): Number of bytes (at most max_window)
+
+        Returns:
+            dict: 'content', 'offset', 'end_offset' and 'size'
+        """
+        data, stat_result = self._open(path)
+        size = stat_result.st_size
+        offset = min(max(0, offset), size)
+        end = min(size, offset + max(0, min(length, self.max_window)))
+
+        try:
+            content = self._decode(data[offset:end]) if data is not None else ''
+        finally:
+            if data is not None:
+                data.close()
+
+        return {
+            'content': content,
+            'offset': offset,
+            'end_offset': end,
+            'size': size
+        }
+
+    def read_lines(self, path, line=0, count=200):
+        """
+        Read a range of lines of a file.
+
+        Args:
+            path (str): Path to the file
+            line (int): First line, starting at 0; negative values count from
+                the end of the file
+            count (int): Number of lines (fewer if they exceed max_window bytes)
+
+        Returns:
+            dict: 'lines', 'line' (first line returned), 'total_lines',
+                'offset', 'end_offset' and 'size'
+        """
+        data, stat_result = self._open(path)
+
+        try:
+            if data is None:
+                return {'lines': [], 'line': 0, 'total_lines': 0, 'offset': 0, 'end_offset': 0, 'size': 0}
+
+            index = self._index(path)
+            with index.lock:
+                index.update(data, stat_result)
+                total = index.line_count(data)
+                if line < 0:
+                    line = max(0, total + line)
+                line = min(line, total)
+                count = max(0, count)
+
+                start = index.line_offset(data, line)
+                end = index.line_offset(data, line + count)
+
+            # Never copy out more than a window, whatever the line lengths
+            end = min(end, start + self.max_window)
+            lines = self._decode(data[start:end]).split('\n')
+        finally:
+            if data is not None:
+                data.close()
+
+        # The last element is what follows the final newline of the window
+        if lines and lines[-1] == '':
+            lines.pop()
+        lines = [text.rstrip('\r') for text in lines[:count]]
+
+        return {
+            'lines': lines,
+            'line': line,
+            'total_lines': total,
+            'offset': start,
+            'end_offset': end,
+            'size': stat_result.st_size
+        }
+
+    def tail(self, path, lines=200, offset=None):
+        """
+        Read the end of a file, or what was appended since a previous read.
+
+        Without an offset the last `lines` lines are returned. With the
+        'end_offset' of a previous call, everything written since then is
+        returned, up to the last complete line. If the file has been
+        truncated or replaced by a shorter one (log rotation), the last lines
+        are returned again with 'reset' set.
+
+        Args:
+            path (str): Path to the file
+            lines (int): Lines returned when starting (or restarting) a tail
+            offset (int): Offset read up to by the previous call
+
+        Returns:
+            dict: 'lines', 'offset', 'end_offset', 'size' and 'reset'
+        """
+        data, stat_result = self._open(path)
+        size = stat_result.st_size
+        reset = offset is not None and offset > size
+
+        try:
+            if data is None:
+                return {'lines': [], 'offset': 0, 'end_offset': 0, 'size': 0, 'reset': reset}
+
+            if offset is None or reset:
+                # Walk back over the last `lines` newlines
+                end = size
+                start = size
+                if data[size - 1:size] == b'\n':
+                    start -= 1
+                for _ in range(max(0, lines)):
+                    start = data.rfind(b'\n', max(0, size - self.max_window), start)
+                    if start < 0:
+                        break
+                start = max(0, start + 1) if lines > 0 else size
+                if start < size - self.max_window:
+                    start = size - self.max_window
+            else:
+                start = offset
+                end = min(size, start + self.max_window)
+
+                # Hold back a partial last line unless it fills the window
+                last_newline = data.rfind(b'\n', start, end)
+                if last_newline >= 0:
+                    end = last_newline + 1
+                elif end - start < self.max_window:
+                    end = start
+
+            content = data[start:end]
+        finally:
+            if data is not None:
+                data.close()
+
+        text = self._decode(content).split('\n')
+        if text and text[-1] == '':
+            text.pop()
+
+        return {
+            'lines': [line.rstrip('\r') for line in text],
+            'offset': start,
+            'end_offset': end,
+            'size': size,
+            'reset': reset
+        }
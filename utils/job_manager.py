@@ -0,0 +1,160 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class JobManager:
+    """
+    Runs slow lifecycle operations as background jobs.
+
+    Jobs run on a small thread pool so HTTP workers return immediately.
+    Progress and completion are published as job_update Socket.IO events
+    and can be polled through the job-status endpoints.
+    """
+
+    def __init__(self, socketio, max_workers=8, max_finished=200):
+        """
+        Initialize the job manager.
+
+        Args:
+            socketio: SocketIO instance for real-time communication
+            max_workers (int): Number of jobs that can run at the same time
+            max_finished (int): Number of finished jobs kept for status queries
+        """
+        self.socketio = socketio
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mcsm-job')
+        self._jobs = OrderedDict()  # Jobs keyed by job ID, oldest first
+        self._lock = threading.Lock()
+
+    def submit(self, job_type, server_id, func, *args, **kwargs):
+        """
+        Queue a job.
+
+        The function is called with a progress(message) keyword argument it
+        can use to report what it is doing. A job fails if the function
+        raises, returns False, or returns a dict with success set to False.
+        If the same kind of job is already queued or running for the server,
+        that job is returned instead of starting another one. Jobs without a
+        server ID (such as bulk operations) are never merged.
+
+        Args:
+            job_type (str): Kind of job (e.g. start, stop, delete)
+            server_id (str): Server the job acts on, or None
+            func (callable): Function doing the work
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            dict: Copy of the job
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if server_id is not None and job['server_id'] == server_id and \
+                        job['type'] == job_type and job['status'] in ('pending', 'running'):
+                    return dict(job)
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'type': job_type,
+                'server_id': server_id,
+                'status': 'pending',
+                'progress': None,
+                'result': None,
+                'error': None,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None
+            }
+            self._jobs[job['id']] = job
+            self._prune()
+
+        self._emit(job)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return dict(job)
+
+    def get(self, job_id):
+        """
+        Get a job by its ID.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            dict: Copy of the job, or None if not found
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self, server_id=None):
+        """
+        Get known jobs, newest first.
+
+        Args:
+            server_id (str): Only return jobs for this server
+
+        Returns:
+            list: Copies of the jobs
+        """
+        with self._lock:
+            jobs = [dict(job) for job in reversed(self._jobs.values())
+                    if server_id is None or job['server_id'] == server_id]
+        return jobs
+
+    def queue_depth(self):
+        """
+        Get the number of jobs waiting for a worker.
+
+        Returns:
+            int: Number of pending jobs
+        """
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job['status'] == 'pending')
+
+    def _update(self, job, **changes):
+        """Update a job and publish the change."""
+        with self._lock:
+            job.update(changes)
+        self._emit(job)
+
+    def _emit(self, job):
+        """Publish a job's current state to connected clients."""
+        try:
+            self.socketio.emit('job_update', dict(job))
+        except Exception as e:
+            logger.error(f"Error emitting job update: {e}")
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the retention limit; caller holds the lock."""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job['status'] in ('succeeded', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, func, args, kwargs):
+        """Run a job on a worker thread."""
+        self._update(job, status='running', started_at=time.time())
+
+        def progress(message):
+            self._update(job, progress=message)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['type']} {job['server_id']}) failed: {e}")
+            self._update(job, status='failed', error=str(e), finished_at=time.time())
+            return
+
+        if result is False:
+            self._update(job, status='failed', result=result, error=f"{job['type'].capitalize()} failed",
+                         finished_at=time.time())
+        elif isinstance(result, dict) and result.get('success') is False:
+            self._update(job, status='failed', result=result,
+                         error=result.get('message') or result.get('error'), finished_at=time.time())
+        else:
+            self._update(job, status='succeeded', result=result, finished_at=time.time())
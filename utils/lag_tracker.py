@@ -0,0 +1,299 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Minecraft formatting codes (e.g. "§a") that Paper puts in command output
+FORMATTING_PATTERN = re.compile('§.')
+
+# Vanilla, Forge, Fabric, Paper and Spigot warn when the tick loop falls behind
+LAG_PATTERN = re.compile(r"Can't keep up! Is the server overloaded\? Running (\d+)ms or (\d+) ticks behind")
+
+# Paper and Spigot "tps" command
+TPS_PATTERN = re.compile(r'TPS from last 1m, 5m, 15m: \*?([\d.]+), \*?([\d.]+), \*?([\d.]+)')
+
+# Paper "mspt" command: a header line followed by avg/min/max for 5s, 10s and 1m
+MSPT_HEADER_PATTERN = re.compile(r'Server tick times \(avg/min/max\) from last 5s, 10s, 1m:')
+MSPT_VALUES_PATTERN = re.compile(r'([\d.]+)/([\d.]+)/([\d.]+)')
+
+# Forge "forge tps" command
+FORGE_TPS_PATTERN = re.compile(r'Overall\s*: Mean tick time: ([\d.]+) ms\. Mean TPS: ([\d.]+)')
+
+# Vanilla "tick query" command (1.20.3+)
+TICK_QUERY_PATTERN = re.compile(r'Average time per tick: ([\d.]+)ms')
+
+# Commands that make each server type report its tick rate
+TICK_COMMANDS = {
+    'paper': ('tps', 'mspt'),
+    'spigot': ('tps',),
+    'forge': ('forge tps',)
+}
+
+class ConsoleParser:
+    """
+    A stage that ServerManager runs on every console line it reads.
+
+    Parsers are called on the console reader thread, so feed() must be
+    quick and must not block. The base methods do nothing, so a stage only
+    overrides what it needs.
+    """
+
+    def feed(self, server_id, entry):
+        """
+        Handle one console line.
+
+        Args:
+            server_id (str): Server ID
+            entry (dict): Console entry with 'seq', 'time', 'line', 'level'
+                and 'thread' keys
+        """
+
+    def forget(self, server_id):
+        """
+        Drop anything kept for a server that is about to be deleted.
+
+        Args:
+            server_id (str): Server ID
+        """
+
+class LagTracker(ConsoleParser):
+    """
+    Extracts tick-rate samples and lag spikes from console output.
+
+    "Can't keep up!" warnings become lag events, and the output of the
+    tps, mspt, forge tps and tick query commands becomes TPS/MSPT samples.
+    Running statistics are kept per server and every event and sample is
+    published over Socket.IO.
+    """
+
+    def __init__(self, console_pipeline, history=720, recent_events=50):
+        """
+        Initialize the lag tracker.
+
+        Args:
+            console_pipeline (ConsolePipeline): Sends events to the clients
+                that joined a server
+            history (int): TPS/MSPT samples kept per server
+            recent_events (int): Lag events kept per server
+        """
+        self.console_pipeline = console_pipeline
+        self.history = history
+        self.recent_events = recent_events
+        self._servers = {}  # Statistics, samples and parser state keyed by server ID
+        self._lock = threading.Lock()
+
+    def _server(self, server_id):
+        """Get the tracking record of a server, creating it; caller holds the lock."""
+        server = self._servers.get(server_id)
+        if not server:
+            server = self._servers[server_id] = self._new_record()
+        return server
+
+    def _new_record(self):
+        """Build an empty tracking record."""
+        return {
+            'stats': {
+                'lag_events': 0,
+                'ticks_skipped': 0,
+                'total_behind_ms': 0,
+                'max_behind_ms': 0,
+                'last_lag_at': None,
+                'tps': None,
+                'mspt': None,
+                'updated_at': None
+            },
+            'events': deque(maxlen=self.recent_events),
+            'samples': deque(maxlen=self.history),
+            'expect_mspt': False
+        }
+
+    def feed(self, server_id, entry):
+        """
+        Look for lag warnings and tick-rate reports in a console line.
+
+        Args:
+            server_id (str): Server ID
+            entry (dict): Console entry
+        """
+        line = entry['line']
+
+        # Cheap checks first; almost every line matches none of them
+        if "Can't keep up!" in line:
+            match = LAG_PATTERN.search(line)
+            if match:
+                self._record_lag(server_id, entry['time'], int(match.group(1)), int(match.group(2)))
+            return
+
+        with self._lock:
+            server = self._servers.get(server_id)
+            expect_mspt = server['expect_mspt'] if server else False
+
+        if expect_mspt:
+            values = MSPT_VALUES_PATTERN.findall(FORMATTING_PATTERN.sub('', line))
+            with self._lock:
+                server['expect_mspt'] = False
+            if values:
+                avg, low, high = (float(value) for value in values[0])
+                self._record_sample(server_id, entry['time'], mspt={'avg': avg, 'min': low, 'max': high})
+            return
+
+        if 'tick' not in line and 'TPS' not in line:
+            return
+
+        line = FORMATTING_PATTERN.sub('', line)
+
+        match = TPS_PATTERN.search(line)
+        if match:
+            tps = {'1m': float(match.group(1)), '5m': float(match.group(2)), '15m': float(match.group(3))}
+            self._record_sample(server_id, entry['time'], tps=tps)
+            return
+
+        if MSPT_HEADER_PATTERN.search(line):
+            with self._lock:
+                self._server(server_id)['expect_mspt'] = True
+            return
+
+        match = FORGE_TPS_PATTERN.search(line)
+        if match:
+            mspt = float(match.group(1))
+            self._record_sample(server_id, entry['time'], tps={'1m': float(match.group(2))},
+                                mspt={'avg': mspt, 'min': None, 'max': None})
+            return
+
+        match = TICK_QUERY_PATTERN.search(line)
+        if match:
+            mspt = float(match.group(1))
+            self._record_sample(server_id, entry['time'], mspt={'avg': mspt, 'min': None, 'max': None})
+
+    def _record_lag(self, server_id, timestamp, behind_ms, ticks):
+        """
+        Record a lag spike.
+
+        Args:
+            server_id (str): Server ID
+            timestamp (float): Time the warning was logged
+            behind_ms (int): Milliseconds the tick loop is behind
+            ticks (int): Ticks skipped to catch up
+        """
+        event = {'time': timestamp, 'behind_ms': behind_ms, 'ticks': ticks}
+
+        with self._lock:
+            server = self._server(server_id)
+            stats = server['stats']
+            stats['lag_events'] += 1
+            stats['ticks_skipped'] += ticks
+            stats['total_behind_ms'] += behind_ms
+            stats['max_behind_ms'] = max(stats['max_behind_ms'], behind_ms)
+            stats['last_lag_at'] = timestamp
+            server['events'].append(event)
+
+        self._emit(server_id, 'server_lag', dict(event, server_id=server_id))
+
+    def _record_sample(self, server_id, timestamp, tps=None, mspt=None):
+        """
+        Record a tick-rate report.
+
+        Args:
+            server_id (str): Server ID
+            timestamp (float): Time the report was logged
+            tps (dict): Ticks per second by window, if reported
+            mspt (dict): Milliseconds per tick ('avg', 'min', 'max'), if reported
+        """
+        with self._lock:
+            server = self._server(server_id)
+            stats = server['stats']
+            if tps:
+                stats['tps'] = tps
+            if mspt:
+                stats['mspt'] = mspt
+            stats['updated_at'] = timestamp
+
+            sample = {
+                'time': timestamp,
+                'tps': stats['tps']['1m'] if stats['tps'] else None,
+                'mspt': stats['mspt']['avg'] if stats['mspt'] else None
+            }
+            server['samples'].append(sample)
+
+        self._emit(server_id, 'server_tps', dict(sample, server_id=server_id))
+
+    def _emit(self, server_id, event, data):
+        """Publish a lag event or tick-rate sample to the server's watchers."""
+        try:
+            self.console_pipeline.send_event(server_id, event, data)
+        except Exception as e:
+            logger.error(f"Error emitting {event}: {e}")
+
+    def get_stats(self, server_id):
+        """
+        Get the lag statistics of a server.
+
+        Args:
+            server_id (str): Server ID
+
+        Returns:
+            dict: 'stats', recent lag 'events' and TPS/MSPT 'samples'
+        """
+        with self._lock:
+            server = self._servers.get(server_id) or self._new_record()
+            return {
+                'stats': dict(server['stats']),
+                'events': list(server['events']),
+                'samples': list(server['samples'])
+            }
+
+    def forget(self, server_id):
+        """
+        Drop the statistics of a server that is about to be deleted.
+
+        Args:
+            server_id (str): Server ID
+        """
+        with self._lock:
+            self._servers.pop(server_id, None)
+
+class TickPoller:
+    """
+    Periodically asks running servers to report their tick rate.
+
+    Only server types with a tick-rate command (see TICK_COMMANDS) are
+    polled, and only once they have finished starting. The replies are
+    picked up from the console by LagTracker.
+    """
+
+    def __init__(self, server_manager, interval=60):
+        """
+        Initialize the tick poller.
+
+        Args:
+            server_manager (ServerManager): Server manager
+            interval (float): Seconds between polls
+        """
+        self.server_manager = server_manager
+        self.interval = interval
+
+        self._thread = threading.Thread(target=self._run, name='mcsm-tick-poller', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Poll every interval."""
+        while True:
+            time.sleep(self.interval)
+
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error polling tick rates: {e}")
+
+    def poll(self):
+        """Send the tick-rate commands to every ready server."""
+        for server_id in list(self.server_manager.running_servers):
+            if self.server_manager.get_server_state(server_id)['state'] != 'ready':
+                continue
+
+            server = self.server_manager.registry.get(server_id)
+            for command in TICK_COMMANDS.get(server['type'] if server else None, ()):
+                self.server_manager.send_command(server_id, command)
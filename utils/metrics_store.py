@@ -0,0 +1,303 @@
+import os
+import mmap
+import struct
+import logging
+import threading
+from utils.resource_sampler import METRIC_FIELDS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MCSMRRD1'
+
+# File header: magic, number of fields, number of archives
+HEADER = struct.Struct('<8sII')
+
+# Archive description in the header: step in seconds, number of rows
+ARCHIVE = struct.Struct('<dI')
+
+# Row: bucket start time, samples in the bucket, then min/avg/max of every field
+ROW = struct.Struct('<dI' + 'f' * 3 * len(METRIC_FIELDS))
+
+# Default archives as (step, retention) in seconds; a step of None means
+# the sampling interval
+DEFAULT_ARCHIVES = ((None, 86400), (60, 14 * 86400), (3600, 365 * 86400))
+
+# Rows read per point returned before a query moves to a coarser archive
+READ_FACTOR = 16
+
+class MetricsFile:
+    """
+    Fixed-size round-robin file holding one server's metrics history.
+
+    The file is made of archives of fixed-width rows; the row for a
+    timestamp is found by arithmetic, so writing a sample and reading a
+    bucket both touch a single row. Every archive keeps the min, avg and
+    max of each field for its buckets.
+    """
+
+    def __init__(self, path, archives):
+        """
+        Open (or create) a metrics file.
+
+        An existing file whose layout does not match the requested archives
+        is replaced.
+
+        Args:
+            path (str): Path to the file
+            archives (list): (step, rows) tuples, finest first
+        """
+        self.path = path
+        self.archives = []
+        self._lock = threading.Lock()
+
+        size = HEADER.size + ARCHIVE.size * len(archives)
+        header = HEADER.pack(MAGIC, len(METRIC_FIELDS), len(archives)) + \
+            b''.join(ARCHIVE.pack(step, rows) for step, rows in archives)
+
+        offset = size
+        for step, rows in archives:
+            self.archives.append({'step': step, 'rows': rows, 'offset': offset})
+            offset += rows * ROW.size
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            if os.fstat(fd).st_size != offset or os.pread(fd, size, 0) != header:
+                if os.fstat(fd).st_size:
+                    logger.warning(f"Metrics file {path} has a different layout, starting a new one")
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, offset)
+                os.pwrite(fd, header, 0)
+
+            self._map = mmap.mmap(fd, offset)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """Unmap the file."""
+        with self._lock:
+            self._map.close()
+
+    def append(self, timestamp, sample):
+        """
+        Add a sample to the bucket of every archive it falls into.
+
+        Args:
+            timestamp (float): Time the sample was taken
+            sample (dict): Value of every field in METRIC_FIELDS
+        """
+        with self._lock:
+            for archive in self.archives:
+                slot = int(timestamp // archive['step'])
+                bucket = slot * archive['step']
+                position = archive['offset'] + slot % archive['rows'] * ROW.size
+                row = ROW.unpack_from(self._map, position)
+
+                if row[0] == bucket and row[1]:
+                    count = row[1] + 1
+                    values = []
+                    for index, field in enumerate(METRIC_FIELDS):
+                        low, avg, high = row[2 + index * 3:5 + index * 3]
+                        value = sample[field]
+                        values += [min(low, value), avg + (value - avg) / count, max(high, value)]
+                else:
+                    count = 1
+                    values = []
+                    for field in METRIC_FIELDS:
+                        values += [sample[field]] * 3
+
+                ROW.pack_into(self._map, position, bucket, count, *values)
+
+    def read(self, archive, start, end):
+        """
+        Read the buckets of one archive that fall in a time window.
+
+        Args:
+            archive (dict): Archive to read
+            start (float): Unix time of the first bucket
+            end (float): Unix time of the last bucket
+
+        Returns:
+            list: Rows as (time, count, values) tuples, oldest first
+        """
+        step = archive['step']
+        first = int(start // step)
+        last = int(end // step)
+
+        # Never read more than one lap of the ring
+        first = max(first, last - archive['rows'] + 1)
+
+        rows = []
+        with self._lock:
+            for index in range(first, last + 1):
+                position = archive['offset'] + index % archive['rows'] * ROW.size
+                row = ROW.unpack_from(self._map, position)
+                if row[1] and row[0] == index * step:
+                    rows.append((row[0], row[1], row[2:]))
+
+        return rows
+
+class MetricsStore:
+    """
+    Persistent, fixed-size metrics history for every server.
+
+    Each server gets a round-robin file in its .mcsm folder with a raw
+    archive at the sampling interval and coarser rollups (by default one
+    minute and one hour). Files never grow, a sample costs one row write
+    per archive, and a query reads at most the requested number of rows
+    from the archive whose resolution suits the time range.
+    """
+
+    def __init__(self, get_path, interval=5, archives=DEFAULT_ARCHIVES):
+        """
+        Initialize the metrics store.
+
+        Args:
+            get_path (callable): Returns the directory of a server from its ID
+            interval (float): Sampling interval, used as the raw archive step
+            archives (tuple): (step, retention) pairs in seconds, finest first;
+                a step of None means the sampling interval
+        """
+        self.get_path = get_path
+        self.archives = [(step or interval, max(1, int(retention // (step or interval))))
+                         for step, retention in archives]
+        self._files = {}  # Open metrics files keyed by server ID
+        self._lock = threading.Lock()
+
+    def _get_file(self, server_id, create=False):
+        """
+        Get the metrics file of a server, opening it on first use.
+
+        Args:
+            server_id (str): Server ID
+            create (bool): Whether to create the file if it does not exist
+
+        Returns:
+            MetricsFile: The file, or None if the server has no history
+        """
+        with self._lock:
+            metrics_file = self._files.get(server_id)
+            if metrics_file:
+                return metrics_file
+
+            server_path = self.get_path(server_id)
+            if not server_path:
+                return None
+
+            path = os.path.join(server_path, '.mcsm', 'metrics.rrd')
+            if not create and not os.path.isfile(path):
+                return None
+
+            try:
+                metrics_file = self._files[server_id] = MetricsFile(path, self.archives)
+            except Exception as e:
+                logger.error(f"Error opening metrics file {path}: {e}")
+                return None
+
+            return metrics_file
+
+    def append(self, server_id, timestamp, sample):
+        """
+        Record a sample for a server.
+
+        Args:
+            server_id (str): Server ID
+            timestamp (float): Time the sample was taken
+            sample (dict): Value of every field in METRIC_FIELDS
+        """
+        metrics_file = self._get_file(server_id, create=True)
+        if metrics_file:
+            metrics_file.append(timestamp, sample)
+
+    def close(self, server_id):
+        """
+        Close the metrics file of a server, e.g. before it is deleted.
+
+        Args:
+            server_id (str): Server ID
+        """
+        with self._lock:
+            metrics_file = self._files.pop(server_id, None)
+        if metrics_file:
+            metrics_file.close()
+
+    def query(self, server_id, start, end, step=None, max_points=500, aggregate='avg'):
+        """
+        Get a server's metrics over a time range.
+
+        The finest archive that covers the range in a bounded number of rows
+        (and is not finer than `step`) is read and merged down to at most
+        `max_points` points, so the cost depends on the number of points
+        returned and not on the length of the range.
+
+        Args:
+            server_id (str): Server ID
+            start (float): Unix time of the start of the range
+            end (float): Unix time of the end of the range
+            step (float): Minimum bucket width in seconds
+            max_points (int): Maximum number of points returned
+            aggregate (str): 'avg', 'min' or 'max'
+
+        Returns:
+            list: Points with a 'time' key and every field in METRIC_FIELDS
+        """
+        metrics_file = self._get_file(server_id)
+        if not metrics_file or end < start:
+            return []
+
+        archive = metrics_file.archives[-1]
+        for candidate in metrics_file.archives:
+            if step and candidate['step'] < step:
+                continue
+            covers = candidate['step'] * candidate['rows'] >= end - start
+            if covers and (end - start) / candidate['step'] <= max_points * READ_FACTOR:
+                archive = candidate
+                break
+
+        rows = metrics_file.read(archive, start, end)
+
+        # Merge neighbouring rows down to the requested number of points
+        width = max(step or 0, archive['step'], (end - start) / max(1, max_points - 1))
+        if width > archive['step']:
+            rows = self._merge(rows, start, width)
+
+        column = {'min': 0, 'avg': 1, 'max': 2}[aggregate]
+        points = []
+        for timestamp, count, values in rows[-max_points:]:
+            point = {'time': timestamp}
+            for index, field in enumerate(METRIC_FIELDS):
+                point[field] = values[index * 3 + column]
+            points.append(point)
+
+        return points
+
+    def _merge(self, rows, origin, width):
+        """
+        Merge rows into wider buckets.
+
+        Args:
+            rows (list): (time, count, values) tuples, oldest first
+            origin (float): Start of the first bucket
+            width (float): Bucket width in seconds
+
+        Returns:
+            list: Merged (time, count, values) tuples
+        """
+        merged = []
+
+        for timestamp, count, values in rows:
+            bucket = origin + (timestamp - origin) // width * width
+
+            if merged and merged[-1][0] == bucket:
+                _, total, combined = merged[-1]
+                for index in range(len(METRIC_FIELDS)):
+                    low, avg, high = index * 3, index * 3 + 1, index * 3 + 2
+                    combined[low] = min(combined[low], values[low])
+                    combined[avg] = (combined[avg] * total + values[avg] * count) / (total + count)
+                    combined[high] = max(combined[high], values[high])
+                merged[-1] = (bucket, total + count, combined)
+            else:
+                merged.append((bucket, count, list(values)))
+
+        return merged
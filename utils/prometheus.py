@@ -0,0 +1,312 @@
+import time
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Default histogram buckets in seconds, suited to request and scan latencies
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _format_value(value):
+    """Format a sample value for the text exposition format."""
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    if value != value:
+        return 'NaN'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _format_labels(names, values):
+    """Format a label set for the text exposition format."""
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+class Metric:
+    """
+    Base class of the metrics kept in a MetricsRegistry.
+
+    A metric has a name, a help text and optional label names; values are
+    kept per label set.
+    """
+
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        """
+        Initialize the metric and add it to a registry.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Label names
+            registry (MetricsRegistry): Registry to add the metric to
+                (default: the module-level REGISTRY)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # Values keyed by label values
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        """Get the label values of a sample in label name order."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def remove(self, **labels):
+        """
+        Forget the value of a label set, e.g. for a deleted server.
+
+        Args:
+            **labels: Label values
+        """
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def samples(self):
+        """
+        Get the current samples of the metric.
+
+        Returns:
+            list: (suffix, label names, label values, value) tuples
+        """
+        with self._lock:
+            return [('', self.labelnames, key, value) for key, value in self._values.items()]
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Increase the counter.
+
+        Args:
+            amount (float): Amount to add
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """A value that can go up and down, or is read from a callback."""
+
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, callback=None):
+        """
+        Initialize the gauge.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Label names
+            registry (MetricsRegistry): Registry to add the gauge to
+            callback (callable): Called at scrape time; returns a number for
+                a gauge without labels, or a dict mapping label value tuples
+                to numbers
+        """
+        self.callback = callback
+        super().__init__(name, documentation, labelnames, registry)
+
+    def set(self, value, **labels):
+        """
+        Set the gauge.
+
+        Args:
+            value (float): New value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        """Get the current samples, reading the callback if there is one."""
+        if not self.callback:
+            return super().samples()
+
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.error(f"Error collecting metric {self.name}: {e}")
+            return []
+
+        if isinstance(value, dict):
+            return [('', self.labelnames, tuple(str(label) for label in key), item)
+                    for key, item in value.items()]
+        return [('', (), (), value)]
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Label names
+            registry (MetricsRegistry): Registry to add the histogram to
+            buckets (tuple): Upper bounds of the buckets, ascending
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        """
+        Record an observation.
+
+        Args:
+            value (float): Observed value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            state = self._values.get(key)
+            if not state:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            state['counts'][index] += 1
+            state['sum'] += value
+
+    def time(self, **labels):
+        """
+        Time a block of code.
+
+        Args:
+            **labels: Label values
+
+        Returns:
+            Timer: Context manager observing the elapsed seconds on exit
+        """
+        return Timer(self, labels)
+
+    def samples(self):
+        """Get the bucket, sum and count samples of every label set."""
+        with self._lock:
+            states = [(key, list(state['counts']), state['sum']) for key, state in self._values.items()]
+
+        samples = []
+        names = self.labelnames + ('le',)
+        for key, counts, total in states:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(('_bucket', names, key + (_format_value(bound),), cumulative))
+            samples.append(('_sum', self.labelnames, key, total))
+            samples.append(('_count', self.labelnames, key, cumulative))
+        return samples
+
+class Timer:
+    """Context manager that observes the time spent in a block."""
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}  # Metrics keyed by name
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Add a metric.
+
+        Args:
+            metric (Metric): Metric to add
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def unregister(self, name):
+        """
+        Remove a metric.
+
+        Args:
+            name (str): Metric name
+        """
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def get(self, name):
+        """
+        Get a registered metric.
+
+        Args:
+            name (str): Metric name
+
+        Returns:
+            Metric: The metric, or None if not registered
+        """
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format (0.0.4).
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for suffix, names, values, value in metric.samples():
+                lines.append(f'{metric.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+# Registry shared by the whole application
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Socket.IO events sent, by event name
+SOCKETIO_EMITS = Counter('mcsm_socketio_emits_total', 'Socket.IO events emitted', ('event',))
+
+def instrument_socketio(socketio):
+    """
+    Count every event emitted through a SocketIO instance.
+
+    Args:
+        socketio: SocketIO instance
+    """
+    emit = socketio.emit
+
+    def counting_emit(event, *args, **kwargs):
+        SOCKETIO_EMITS.inc(event=event)
+        return emit(event, *args, **kwargs)
+
+    socketio.emit = counting_emit
@@ -0,0 +1,390 @@
+import os
+import time
+import logging
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# Values recorded in every sample
+METRIC_FIELDS = ('cpu', 'rss', 'read_rate', 'write_rate', 'threads', 'processes')
+
+# Ways samples can be combined when downsampling
+AGGREGATES = ('avg', 'min', 'max')
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+class MetricsSeries:
+    """
+    Fixed-capacity ring buffer of resource samples for one server.
+
+    Every field is kept in its own array of doubles, so a day of samples
+    for a server costs a few hundred kilobytes and appending never allocates.
+    """
+
+    def __init__(self, capacity=720):
+        """
+        Initialize the metrics series.
+
+        Args:
+            capacity (int): Maximum number of samples kept
+        """
+        self.capacity = capacity
+        self.count = 0  # Number of samples ever appended
+        self._times = array('d', bytes(8 * capacity))
+        self._values = {field: array('d', bytes(8 * capacity)) for field in METRIC_FIELDS}
+        self._lock = threading.Lock()
+
+    def append(self, timestamp, sample):
+        """
+        Add a sample, overwriting the oldest one when the series is full.
+
+        Args:
+            timestamp (float): Time the sample was taken
+            sample (dict): Value of every field in METRIC_FIELDS
+        """
+        with self._lock:
+            index = self.count % self.capacity
+            self._times[index] = timestamp
+            for field in METRIC_FIELDS:
+                self._values[field][index] = sample[field]
+            self.count += 1
+
+    def latest(self):
+        """
+        Get the newest sample.
+
+        Returns:
+            dict: Sample with a 'time' key and every field, or None if empty
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            return self._sample((self.count - 1) % self.capacity)
+
+    def query(self, start=None, end=None, step=None, max_points=None, aggregate='avg'):
+        """
+        Get samples in a time window, optionally downsampled.
+
+        Samples are grouped into buckets of `step` seconds and each bucket is
+        reduced to one point. When only `max_points` is given, the step is
+        chosen so the window fits in that many points.
+
+        Args:
+            start (float): Only samples taken at or after this Unix time
+            end (float): Only samples taken at or before this Unix time
+            step (float): Bucket width in seconds
+            max_points (int): Maximum number of points returned
+            aggregate (str): 'avg', 'min' or 'max'
+
+        Returns:
+            list: Points with a 'time' key (start of the bucket) and every field
+        """
+        with self._lock:
+            first = max(0, self.count - self.capacity)
+            samples = [self._sample(position % self.capacity) for position in range(first, self.count)]
+
+        samples = [sample for sample in samples
+                   if (start is None or sample['time'] >= start) and (end is None or sample['time'] <= end)]
+
+        if not samples:
+            return []
+
+        if not step and max_points and len(samples) > max_points:
+            step = (samples[-1]['time'] - samples[0]['time']) / max(1, max_points - 1)
+
+        if not step:
+            return samples
+
+        reduce = {'avg': lambda values: sum(values) / len(values), 'min': min, 'max': max}[aggregate]
+        origin = samples[0]['time']
+        points = []
+        bucket = []
+        bucket_index = 0
+
+        for sample in samples + [None]:
+            index = int((sample['time'] - origin) // step) if sample else None
+            if bucket and index != bucket_index:
+                point = {'time': origin + bucket_index * step}
+                for field in METRIC_FIELDS:
+                    point[field] = reduce([item[field] for item in bucket])
+                points.append(point)
+                bucket = []
+            if sample:
+                bucket.append(sample)
+                bucket_index = index
+
+        return points[-max_points:] if max_points else points
+
+    def _sample(self, index):
+        """Build the sample stored at an index; caller holds the lock."""
+        sample = {'time': self._times[index]}
+        for field in METRIC_FIELDS:
+            sample[field] = self._values[field][index]
+        return sample
+
+class ResourceSampler:
+    """
+    Samples the CPU, memory and disk I/O of every running server.
+
+    At a fixed interval the sampler reads /proc/<pid>/stat, status and io for
+    each server process and all of its descendants, sums them per server and
+    appends the result to that server's MetricsSeries and, if configured, to
+    a persistent MetricsStore. Each sample is also published as a
+    server_metrics Socket.IO event. On systems without /proc the sampler
+    does nothing.
+    """
+
+    def __init__(self, socketio, processes, interval=5, capacity=720, store=None):
+        """
+        Initialize the resource sampler.
+
+        Args:
+            socketio: SocketIO instance for real-time communication
+            processes (dict): Running server processes keyed by server ID,
+                read on every sample
+            interval (float): Seconds between samples
+            capacity (int): Samples kept per server in memory
+            store (MetricsStore): Persistent history (optional)
+        """
+        self.socketio = socketio
+        self.processes = processes
+        self.interval = interval
+        self.capacity = capacity
+        self.store = store
+        self.series = {}  # MetricsSeries keyed by server ID, kept across restarts
+        self._previous = {}  # Last CPU ticks and I/O counters keyed by (pid, start time)
+        self._last_sample = None
+        self._lock = threading.Lock()
+
+        self.available = os.path.isdir('/proc')
+        if not self.available:
+            logger.warning("/proc is not available, server resource sampling is disabled")
+            return
+
+        self._thread = threading.Thread(target=self._run, name='mcsm-resource-sampler', daemon=True)
+        self._thread.start()
+
+    def get_series(self, server_id):
+        """
+        Get the metrics series of a server.
+
+        Args:
+            server_id (str): Server ID
+
+        Returns:
+            MetricsSeries: The series, or None if the server was never sampled
+        """
+        with self._lock:
+            return self.series.get(server_id)
+
+    def latest(self, server_id):
+        """
+        Get the newest sample of a server.
+
+        Args:
+            server_id (str): Server ID
+
+        Returns:
+            dict: Newest sample, or None if the server was never sampled
+        """
+        series = self.get_series(server_id)
+        return series.latest() if series else None
+
+    def query(self, server_id, start=None, end=None, step=None, max_points=None, aggregate='avg'):
+        """
+        Get a server's samples in a time window, optionally downsampled.
+
+        With a persistent store, the window defaults to the last `max_points`
+        sampling intervals and can reach back as far as the store's longest
+        archive; otherwise only the samples held in memory are available.
+
+        Args:
+            server_id (str): Server ID
+            start (float): Only samples taken at or after this Unix time
+            end (float): Only samples taken at or before this Unix time
+            step (float): Bucket width in seconds
+            max_points (int): Maximum number of points returned
+            aggregate (str): 'avg', 'min' or 'max'
+
+        Returns:
+            list: Points with a 'time' key and every field in METRIC_FIELDS
+        """
+        if self.store:
+            end = end if end is not None else time.time()
+            max_points = max(1, max_points) if max_points is not None else 500
+            start = start if start is not None else end - self.interval * max_points
+            return self.store.query(server_id, start, end, step, max_points, aggregate)
+
+        series = self.get_series(server_id)
+        return series.query(start, end, step, max_points, aggregate) if series else []
+
+    def forget(self, server_id):
+        """
+        Drop the history of a server that is about to be deleted.
+
+        Args:
+            server_id (str): Server ID
+        """
+        with self._lock:
+            self.series.pop(server_id, None)
+
+        if self.store:
+            self.store.close(server_id)
+
+    def _run(self):
+        """Take a sample every interval."""
+        while True:
+            started = time.time()
+
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Error sampling server resources: {e}")
+
+            time.sleep(max(0, self.interval - (time.time() - started)))
+
+    def sample(self):
+        """
+        Sample every running server once.
+
+        Returns:
+            dict: Samples keyed by server ID
+        """
+        now = time.time()
+        elapsed = now - self._last_sample if self._last_sample else None
+        self._last_sample = now
+
+        children = self._children_by_parent()
+        samples = {}
+        seen = set()
+
+        for server_id, process in list(self.processes.items()):
+            pids = self._descendants(process.pid, children)
+            sample = {field: 0.0 for field in METRIC_FIELDS}
+
+            for pid in pids:
+                usage = self._read_process(pid)
+                if not usage:
+                    continue
+
+                key = (pid, usage['start_time'])
+                seen.add(key)
+                previous = self._previous.get(key)
+                self._previous[key] = usage
+
+                sample['rss'] += usage['rss']
+                sample['threads'] += usage['threads']
+                sample['processes'] += 1
+
+                if previous and elapsed:
+                    sample['cpu'] += (usage['ticks'] - previous['ticks']) / CLOCK_TICKS / elapsed * 100
+                    sample['read_rate'] += max(0, usage['read_bytes'] - previous['read_bytes']) / elapsed
+                    sample['write_rate'] += max(0, usage['write_bytes'] - previous['write_bytes']) / elapsed
+
+            if not sample['processes']:
+                continue
+
+            with self._lock:
+                series = self.series.get(server_id)
+                if not series:
+                    series = self.series[server_id] = MetricsSeries(self.capacity)
+            series.append(now, sample)
+            samples[server_id] = sample
+
+            if self.store:
+                self.store.append(server_id, now, sample)
+
+            try:
+                self.socketio.emit('server_metrics', dict(sample, server_id=server_id, time=now))
+            except Exception as e:
+                logger.error(f"Error emitting server metrics: {e}")
+
+        # Forget processes that have exited
+        for key in list(self._previous):
+            if key not in seen:
+                del self._previous[key]
+
+        return samples
+
+    def _children_by_parent(self):
+        """
+        Map every process on the system to its children.
+
+        Returns:
+            dict: Lists of child PIDs keyed by parent PID
+        """
+        children = {}
+
+        for name in os.listdir('/proc'):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f'/proc/{name}/stat', 'rb') as f:
+                    fields = f.read().rsplit(b')', 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(name))
+            except (OSError, IndexError, ValueError):
+                continue
+
+        return children
+
+    def _descendants(self, pid, children):
+        """
+        Get a process and all of its descendants.
+
+        Args:
+            pid (int): Root process ID
+            children (dict): Lists of child PIDs keyed by parent PID
+
+        Returns:
+            list: Process IDs
+        """
+        pids = [pid]
+        for current in pids:
+            pids.extend(children.get(current, []))
+        return pids
+
+    def _read_process(self, pid):
+        """
+        Read the resource usage of one process from /proc.
+
+        Args:
+            pid (int): Process ID
+
+        Returns:
+            dict: 'ticks', 'start_time', 'rss', 'threads', 'read_bytes' and
+                'write_bytes', or None if the process is gone
+        """
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                # The command name may contain spaces, so split after it
+                fields = f.read().rsplit(b')', 1)[1].split()
+
+            usage = {
+                'ticks': int(fields[11]) + int(fields[12]),  # utime + stime
+                'start_time': int(fields[19]),
+                'rss': 0,
+                'threads': int(fields[17]),
+                'read_bytes': 0,
+                'write_bytes': 0
+            }
+
+            with open(f'/proc/{pid}/status', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'VmRSS:'):
+                        usage['rss'] = int(line.split()[1]) * 1024
+                        break
+        except (OSError, IndexError, ValueError):
+            return None
+
+        try:
+            with open(f'/proc/{pid}/io', 'rb') as f:
+                for line in f:
+                    key, _, value = line.partition(b':')
+                    if key in (b'read_bytes', b'write_bytes'):
+                        usage[key.decode()] = int(value)
+        except (OSError, ValueError):
+            # I/O counters need ptrace access to the process
+            pass
+
+        return usage
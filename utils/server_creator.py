@@ -7,6 +7,7 @@ import shutil
 import time
 import subprocess
 from pathlib import Path
+from utils.server_properties import write_properties
 
 logger = logging.getLogger(__name__)
 
@@ -310,9 +311,7 @@ class ServerCreator:
             properties.update(options)
         
         # Write to file
-        with open(properties_path, 'w') as f:
-            for key, value in sorted(properties.items()):
-                f.write(f"{key}={value}\n")
+        write_properties(properties_path, dict(sorted(properties.items())))
 
     def _create_eula_file(self, server_dir):
         """
@@ -3,6 +3,8 @@ import json
 import logging
 import re
 import hashlib
+from utils.server_properties import read_properties
+from utils.disk_usage import get_disk_usage
 
 logger = logging.getLogger(__name__)
 
@@ -93,6 +95,12 @@ def get_server_info(server_path, server_name):
     world_name = properties.get('level-name', 'world')
     has_world = os.path.isdir(os.path.join(server_path, world_name))
     
+    # Get the tags used to address groups of servers
+    tags = get_server_tags(server_path)
+    
+    # Disk usage is measured in the background; this only reads the last result
+    disk_usage = get_disk_usage(server_path)
+    
     # Return the server information
     return {
         'id': server_id,
@@ -107,7 +115,9 @@ def get_server_info(server_path, server_name):
         'has_world': has_world,
         'world_name': world_name,
         'max_players': int(properties.get('max-players', 20)),
-        'motd': properties.get('motd', 'A Minecraft Server')
+        'motd': properties.get('motd', 'A Minecraft Server'),
+        'tags': tags,
+        'disk_usage': disk_usage
     }
 
 def determine_server_type(server_path):
@@ -177,30 +187,40 @@ def determine_server_version(server_path, server_type):
     
     return 'unknown'
 
+def get_server_tags(server_path):
+    """
+    Read the tags of a server from its mcsm_info.json file.
+    
+    Args:
+        server_path (str): Path to the server directory
+        
+    Returns:
+        list: Tag names
+    """
+    info_path = os.path.join(server_path, 'mcsm_info.json')
+    
+    if not os.path.isfile(info_path):
+        return []
+    
+    try:
+        with open(info_path, 'r') as f:
+            tags = json.load(f).get('tags', [])
+        return [str(tag) for tag in tags] if isinstance(tags, list) else []
+    except Exception as e:
+        logger.error(f"Error reading server tags: {e}")
+        return []
+
 def get_server_properties(server_path):
     """
     Read the server.properties file.
     
+    The parsed result is cached until the file changes and is shared with
+    other callers, so it must not be modified.
+    
     Args:
         server_path (str): Path to the server directory
         
     Returns:
         dict: Dictionary of server properties
     """
-    properties = {}
-    properties_path = os.path.join(server_path, 'server.properties')
-    
-    if os.path.isfile(properties_path):
-        try:
-            with open(properties_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        key_value = line.split('=', 1)
-                        if len(key_value) == 2:
-                            key, value = key_value
-                            properties[key.strip()] = value.strip()
-        except Exception as e:
-            logger.error(f"Error reading server properties: {e}")
-    
-    return properties
\ No newline at end of file
+    return read_properties(os.path.join(server_path, 'server.properties'))
\ No newline at end of file
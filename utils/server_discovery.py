@@ -0,0 +1,216 @@
+import os
+import logging
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+logger = logging.getLogger(__name__)
+
+# Files in a server root that feed into get_server_info()
+RELEVANT_FILES = ('server.properties', 'mcsm_info.json', 'forge-version.properties')
+
+class ServerDiscovery(FileSystemEventHandler):
+    """
+    Keeps a ServerRegistry up to date from filesystem events.
+
+    After one full scan at startup, the servers directory and every server
+    root (plus its mods/ folder) are watched non-recursively. Only the
+    servers touched by an event are recomputed, so the cost of discovery
+    follows the rate of changes instead of the number of servers.
+    """
+
+    def __init__(self, registry, debounce=0.5):
+        """
+        Initialize the discovery service.
+
+        Args:
+            registry (ServerRegistry): Registry to keep up to date
+            debounce (float): Seconds to wait for related events to settle
+                before a server is recomputed
+        """
+        self.registry = registry
+        self.servers_dir = os.path.abspath(registry.servers_dir)
+        self.debounce = debounce
+        self.observer = None
+        self._watches = {}  # Observed watches keyed by server folder name
+        self._pending = set()  # Server folder names waiting to be recomputed
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Run the initial scan and start watching for changes.
+
+        Returns:
+            bool: True if watching started, False if the registry has to fall
+                back to periodic rescans
+        """
+        if not os.path.isdir(self.servers_dir):
+            logger.warning(f"Servers directory '{self.servers_dir}' does not exist, not watching it")
+            return False
+
+        self.registry.refresh()
+
+        try:
+            self.observer = Observer()
+            self.observer.daemon = True
+            self.observer.schedule(self, self.servers_dir, recursive=False)
+
+            for entry in os.scandir(self.servers_dir):
+                if entry.is_dir():
+                    self._watch_server(entry.name)
+
+            self.observer.start()
+        except Exception as e:
+            logger.error(f"Error starting server discovery watcher: {e}")
+            self.observer = None
+            return False
+
+        self.registry.watched = True
+        logger.info(f"Watching {len(self._watches)} server folders for changes")
+        return True
+
+    def stop(self):
+        """Stop watching and hand the registry back to periodic rescans."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+        if self.observer:
+            self.observer.stop()
+            self.observer.join(timeout=5)
+            self.observer = None
+
+        self._watches = {}
+        self.registry.watched = False
+
+    def _watch_server(self, server_name):
+        """
+        Watch a server root and its mods/ folder.
+
+        Args:
+            server_name (str): Name of the server directory
+        """
+        server_path = os.path.join(self.servers_dir, server_name)
+        watches = self._watches.setdefault(server_name, {})
+
+        try:
+            if 'root' not in watches:
+                watches['root'] = self.observer.schedule(self, server_path, recursive=False)
+
+            mods_path = os.path.join(server_path, 'mods')
+            if 'mods' not in watches and os.path.isdir(mods_path):
+                watches['mods'] = self.observer.schedule(self, mods_path, recursive=False)
+            elif 'mods' in watches and not os.path.isdir(mods_path):
+                self.observer.unschedule(watches.pop('mods'))
+        except Exception as e:
+            logger.error(f"Error watching server folder {server_path}: {e}")
+
+    def _unwatch_server(self, server_name):
+        """
+        Stop watching a server folder that no longer exists.
+
+        Args:
+            server_name (str): Name of the server directory
+        """
+        for watch in self._watches.pop(server_name, {}).values():
+            try:
+                self.observer.unschedule(watch)
+            except Exception:
+                # The watch is already gone along with the directory
+                pass
+
+    def on_any_event(self, event):
+        """
+        Queue the server affected by a filesystem event for recomputation.
+
+        Args:
+            event: watchdog filesystem event
+        """
+        # Children report their own events; a directory's mtime tells us nothing
+        if event.is_directory and event.event_type == 'modified':
+            return
+
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            if not path:
+                continue
+
+            server_name = self._affected_server(path, event.is_directory)
+            if server_name:
+                self._schedule(server_name)
+
+    def _affected_server(self, path, is_directory):
+        """
+        Map an event path to the server folder whose record it can change.
+
+        Args:
+            path (str): Path reported by the event
+            is_directory (bool): Whether the path is a directory
+
+        Returns:
+            str: Server folder name, or None if the event is irrelevant
+        """
+        rel_path = os.path.relpath(path, self.servers_dir)
+        parts = rel_path.split(os.sep)
+
+        if parts[0] in ('.', '..'):
+            return None
+
+        server_name = parts[0]
+
+        # A server folder itself was created, removed or renamed
+        if len(parts) == 1:
+            return server_name if is_directory or not os.path.exists(path) else None
+
+        name = parts[1]
+
+        # Anything inside mods/ changes the mod count
+        if name == 'mods':
+            return server_name
+
+        if len(parts) > 2:
+            return None
+
+        # Jars decide type and version, directories may be the world
+        if name.endswith('.jar') or name in RELEVANT_FILES or is_directory:
+            return server_name
+
+        return None
+
+    def _schedule(self, server_name):
+        """
+        Queue a server for recomputation once events have settled.
+
+        Args:
+            server_name (str): Name of the server directory
+        """
+        with self._lock:
+            self._pending.add(server_name)
+
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self._process_pending)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _process_pending(self):
+        """Recompute every server queued since the last run."""
+        with self._lock:
+            pending = self._pending
+            self._pending = set()
+            self._timer = None
+
+        for server_name in pending:
+            server_path = os.path.join(self.servers_dir, server_name)
+
+            try:
+                if os.path.isdir(server_path):
+                    if self.observer:
+                        self._watch_server(server_name)
+                    self.registry.update_server(server_name)
+                else:
+                    if self.observer:
+                        self._unwatch_server(server_name)
+                    self.registry.remove_server(server_name)
+            except Exception as e:
+                logger.error(f"Error updating server {server_name}: {e}")
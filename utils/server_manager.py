@@ -6,28 +6,86 @@ import logging
 import threading
 import re
 import json
-from utils.server_detector import detect_servers
+import heapq
+import base64
+import fnmatch
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from utils.server_registry import ServerRegistry
+from utils.console_pipeline import ConsolePipeline
+from utils.console_reactor import ConsoleReactor
+from utils.console_buffer import ConsoleBuffer, LEVELS
+from utils.console_journal import ConsoleJournal
+from utils.server_properties import read_properties, write_properties
+from utils.file_viewer import FileViewer
+from utils.file_patch import content_hash, decode, encode, apply_line_edits, apply_unified_diff
+from utils.prometheus import Counter
 
 logger = logging.getLogger(__name__)
 
+# Console patterns that drive lifecycle and player tracking
+DONE_PATTERN = re.compile(r'Done \([0-9.,]+s\)!')
+JOIN_PATTERN = re.compile(r':\s(\S+) joined the game$')
+LEAVE_PATTERN = re.compile(r':\s(\S+) left the game$')
+
+# Directory listings can be sorted by these entry fields
+LISTING_SORT_KEYS = ('name', 'size', 'modified')
+
+# Directory scans reused while the directory is unchanged
+LISTING_CACHE_SIZE = 32
+LISTING_CACHE_SECONDS = 5
+
+# Seconds the console closer waits for a server's exit code before handing off
+CONSOLE_CLOSE_WAIT = 5
+
+CONSOLE_LINES = Counter('mcsm_console_lines_total', 'Console lines read from servers', ('server_id',))
+CONSOLE_BYTES = Counter('mcsm_console_bytes_total', 'Console bytes read from servers', ('server_id',))
+
 class ServerManager:
     """
     Manages Minecraft server processes and provides utility functions.
     """
     
-    def __init__(self, servers_dir, socketio):
+    def __init__(self, servers_dir, socketio, registry=None, console_pipeline=None,
+                 journal_enabled=True, journal_segment_lines=65536, journal_max_segments=16,
+                 console_reactor=None, line_parsers=None, file_view_window=4194304):
         """
         Initialize the server manager.
         
         Args:
             servers_dir (str): Directory containing server folders
             socketio: SocketIO instance for real-time communication
+            registry (ServerRegistry): Shared server index (created if not given)
+            console_pipeline (ConsolePipeline): Console fan-out (created if not given)
+            journal_enabled (bool): Whether console output is journaled to disk
+            journal_segment_lines (int): Lines per console journal segment
+            journal_max_segments (int): Console journal segments kept per server
+            console_reactor (ConsoleReactor): Reader of every server's output
+                (created if not given)
+            line_parsers (list): ConsoleParser stages run on every console line
+            file_view_window (int): Most bytes returned by one file view read
         """
         self.servers_dir = servers_dir
         self.socketio = socketio
+        self.registry = registry or ServerRegistry(servers_dir)
+        self.console_pipeline = console_pipeline or ConsolePipeline(socketio)
         self.running_servers = {}  # Dictionary of running server processes
-        self.console_buffers = {}  # Console output buffers
-        self.console_threads = {}  # Console reader threads
+        self.console_buffers = {}  # Console ring buffers, kept across restarts
+        self.console_journals = {}  # On-disk console journals, opened on demand
+        self.journal_enabled = journal_enabled
+        self.journal_segment_lines = journal_segment_lines
+        self.journal_max_segments = journal_max_segments
+        self.console_reactor = console_reactor or ConsoleReactor()
+        self.line_parsers = list(line_parsers or [])
+        self.server_states = {}  # Lifecycle state, start time and players per server
+        self._state_lock = threading.Lock()
+        self._listing_cache = OrderedDict()  # Recent directory scans keyed by path
+        self._listing_lock = threading.Lock()
+        self.file_viewer = FileViewer(max_window=file_view_window)
+        self._file_locks = {}  # [lock, holders and waiters] keyed by file path
+        self._file_locks_lock = threading.Lock()
 
     def get_server_path(self, server_id):
         """
@@ -39,18 +97,15 @@ class ServerManager:
         Returns:
             str: Path to the server directory, or None if not found
         """
-        servers = detect_servers(self.servers_dir)
-        for server in servers:
-            if server['id'] == server_id:
-                return server['path']
-        return None
+        return self.registry.get_path(server_id)
 
-    def start_server(self, server_id):
+    def start_server(self, server_id, progress=None):
         """
         Start a Minecraft server.
         
         Args:
             server_id (str): Server ID
+            progress (callable): Optional callback receiving progress messages
             
         Returns:
             bool: True if successful, False otherwise
@@ -100,6 +155,9 @@ class ServerManager:
         ]
         
         # Start the server process
+        if progress:
+            progress(f'Launching {server_jar}')
+        
         try:
             process = subprocess.Popen(
                 command,
@@ -107,23 +165,36 @@ class ServerManager:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1  # Line-buffered
+                bufsize=0  # Output is read in raw chunks by the console reactor
             )
             
             # Store the process
             self.running_servers[server_id] = process
             
-            # Initialize console buffer
-            self.console_buffers[server_id] = []
+            # Initialize console buffer (sequence numbers continue across restarts
+            # and, with a journal, across restarts of the manager)
+            if server_id not in self.console_buffers:
+                journal = self._get_journal(server_id)
+                start_seq = journal.next_seq if journal else 0
+                self.console_buffers[server_id] = ConsoleBuffer(start_seq=start_seq)
+            
+            # Track lifecycle from here on
+            with self._state_lock:
+                self.server_states[server_id] = {
+                    'state': 'starting',
+                    'started_at': time.time(),
+                    'players': set(),
+                    'stop_requested': False,
+                    'exit_code': None
+                }
+            self._emit_state(server_id)
             
-            # Start console reader thread
-            self.console_threads[server_id] = threading.Thread(
-                target=self._read_console,
-                args=(server_id,),
-                daemon=True
+            # Hand the output over to the console reactor
+            self.console_reactor.add(
+                process.stdout,
+                lambda lines: self._handle_console_lines(server_id, lines),
+                lambda: self._handle_console_close(server_id, process)
             )
-            self.console_threads[server_id].start()
             
             logger.info(f"Started server {server_id}")
             return True
@@ -132,12 +203,14 @@ class ServerManager:
             logger.error(f"Error starting server {server_id}: {e}")
             return False
 
-    def stop_server(self, server_id):
+    def stop_server(self, server_id, timeout=30, progress=None):
         """
         Stop a running Minecraft server.
         
         Args:
             server_id (str): Server ID
+            timeout (int): Seconds to wait for a graceful shutdown before terminating
+            progress (callable): Optional callback receiving progress messages
             
         Returns:
             bool: True if successful, False otherwise
@@ -148,25 +221,31 @@ class ServerManager:
         
         process = self.running_servers[server_id]
         
+        self._set_state(server_id, 'stopping', stop_requested=True)
+        
         # Send stop command to the server
         try:
-            process.stdin.write("stop\n")
+            if progress:
+                progress('Sending stop command')
+            process.stdin.write(b"stop\n")
             process.stdin.flush()
             
-            # Wait for the process to terminate (up to 30 seconds)
-            for _ in range(30):
-                if process.poll() is not None:
-                    break
-                time.sleep(1)
-            
-            # If server is still running, force kill it
-            if process.poll() is None:
+            # Wait for the process to terminate
+            if progress:
+                progress('Waiting for the server to shut down')
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # If server is still running, force kill it
                 logger.warning(f"Server {server_id} did not stop gracefully, forcing termination")
+                if progress:
+                    progress('Server did not stop gracefully, forcing termination')
                 process.terminate()
                 process.wait(timeout=10)
             
-            # Remove server from dictionaries
-            del self.running_servers[server_id]
+            # Remove server from dictionaries (the console thread may have done so already)
+            if self.running_servers.get(server_id) is process:
+                del self.running_servers[server_id]
             
             # The console thread will detect the process termination and exit
             
@@ -181,41 +260,231 @@ class ServerManager:
                 if process.poll() is None:
                     process.kill()
                     process.wait(timeout=5)
+                if self.running_servers.get(server_id) is process:
                     del self.running_servers[server_id]
             except Exception:
                 pass
                 
             return False
 
-    def get_server_status(self, server_id):
+    def restart_server(self, server_id, timeout=30, progress=None):
+        """
+        Stop a server if it is running, then start it again.
+        
+        Args:
+            server_id (str): Server ID
+            timeout (int): Seconds to wait for a graceful shutdown before terminating
+            progress (callable): Optional callback receiving progress messages
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if server_id in self.running_servers and not self.stop_server(server_id, timeout, progress):
+            return False
+        
+        return self.start_server(server_id, progress)
+
+    def bulk_action(self, action, server_ids, concurrency=4, stagger=0, timeout=30, progress=None):
+        """
+        Start, stop or restart many servers in parallel.
+        
+        At most `concurrency` servers are handled at the same time. Launches
+        are spaced at least `stagger` seconds apart so a maintenance restart
+        does not make every JVM allocate its heap at once. Servers that are
+        already in the requested state are skipped and count as successful.
+        
+        Args:
+            action (str): 'start', 'stop' or 'restart'
+            server_ids (list): Server IDs
+            concurrency (int): Maximum number of servers handled at once
+            stagger (float): Minimum seconds between two server launches
+            timeout (int): Seconds to wait for each graceful shutdown
+            progress (callable): Optional callback receiving progress messages
+        
+        Returns:
+            dict: 'success', 'message' and per-server 'results' with 'success'
+                and 'message' keys
+        """
+        if action not in ('start', 'stop', 'restart'):
+            return {'success': False, 'message': f'Unknown action: {action}', 'results': {}}
+        
+        server_ids = list(dict.fromkeys(server_ids))
+        results = {}
+        results_lock = threading.Lock()
+        
+        # Time before which the next launch may not happen
+        launch_gate = {'next': 0.0}
+        launch_lock = threading.Lock()
+        
+        def wait_for_launch_slot():
+            with launch_lock:
+                now = time.time()
+                launch_at = max(now, launch_gate['next'])
+                launch_gate['next'] = launch_at + stagger
+            if launch_at > now:
+                time.sleep(launch_at - now)
+        
+        def run(server_id):
+            if not self.get_server_path(server_id):
+                return {'success': False, 'message': 'Server not found'}
+        
+            running = server_id in self.running_servers
+        
+            if action == 'start' and running:
+                return {'success': True, 'message': 'Server is already running', 'skipped': True}
+            if action == 'stop' and not running:
+                return {'success': True, 'message': 'Server is not running', 'skipped': True}
+        
+            if action in ('stop', 'restart') and running:
+                if not self.stop_server(server_id, timeout):
+                    return {'success': False, 'message': 'Failed to stop server'}
+                if action == 'stop':
+                    return {'success': True, 'message': 'Server stopped successfully'}
+        
+            wait_for_launch_slot()
+            if not self.start_server(server_id):
+                return {'success': False, 'message': 'Failed to start server'}
+            return {'success': True, 'message': 'Server started successfully'}
+        
+        def run_and_record(server_id):
+            try:
+                result = run(server_id)
+            except Exception as e:
+                logger.error(f"Error running {action} on server {server_id}: {e}")
+                result = {'success': False, 'message': str(e)}
+        
+            with results_lock:
+                results[server_id] = result
+                done = len(results)
+            if progress:
+                progress(f'{done}/{len(server_ids)} servers done')
+        
+        if server_ids:
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(server_ids))),
+                                    thread_name_prefix=f'mcsm-{action}') as executor:
+                list(executor.map(run_and_record, server_ids))
+        
+        failed = [server_id for server_id, result in results.items() if not result['success']]
+        logger.info(f"Bulk {action} of {len(server_ids)} servers finished with {len(failed)} failures")
+        
+        return {
+            'success': not failed,
+            'message': f'{len(server_ids) - len(failed)} of {len(server_ids)} servers succeeded',
+            'results': results
+        }
+
+    def stop_all(self, concurrency=0, timeout=30):
+        """
+        Stop every running server in parallel, e.g. when the manager shuts down.
+        
+        Args:
+            concurrency (int): Maximum number of servers stopped at once (0 for all)
+            timeout (int): Seconds to wait for each graceful shutdown
+        
+        Returns:
+            dict: Result of bulk_action()
+        """
+        server_ids = list(self.running_servers)
+        return self.bulk_action('stop', server_ids, concurrency or len(server_ids), timeout=timeout)
+
+    def forget_server(self, server_id):
+        """
+        Drop the console buffer, journal handle, state and parser data of a
+        server that is about to be deleted.
+        
+        Args:
+            server_id (str): Server ID
+        """
+        journal = self.console_journals.pop(server_id, None)
+        if journal:
+            journal.close()
+        
+        self.console_buffers.pop(server_id, None)
+        
+        with self._state_lock:
+            self.server_states.pop(server_id, None)
+        
+        for parser in self.line_parsers:
+            parser.forget(server_id)
+        
+        CONSOLE_LINES.remove(server_id=server_id)
+        CONSOLE_BYTES.remove(server_id=server_id)
+
+    def get_server_status(self, server_id, console_lines=20):
         """
         Get the status of a server.
         
         Args:
             server_id (str): Server ID
+            console_lines (int): Number of trailing console lines to include
             
         Returns:
             dict: Server status information
         """
-        is_running = server_id in self.running_servers
-        
         # Get server info
-        servers = detect_servers(self.servers_dir)
-        server_info = next((s for s in servers if s['id'] == server_id), None)
+        server_info = self.registry.get(server_id)
         
         if not server_info:
             return {'error': 'Server not found'}
         
+        return self._build_status(server_id, server_info, console_lines)
+
+    def get_servers_status(self, server_ids=None, console_lines=20):
+        """
+        Get the status of many servers in one pass.
+        
+        Args:
+            server_ids (list): Server IDs to report on, or None for all servers
+            console_lines (int): Number of trailing console lines to include per server
+            
+        Returns:
+            dict: Server status information keyed by server ID
+        """
+        if server_ids is None:
+            servers = {server['id']: server for server in self.registry.get_all()}
+            server_ids = list(servers)
+        else:
+            servers = {server_id: self.registry.get(server_id) for server_id in server_ids}
+        
+        statuses = {}
+        for server_id in server_ids:
+            server_info = servers.get(server_id)
+            if not server_info:
+                statuses[server_id] = {'error': 'Server not found'}
+            else:
+                statuses[server_id] = self._build_status(server_id, server_info, console_lines)
+        
+        return statuses
+
+    def _build_status(self, server_id, server_info, console_lines):
+        """
+        Build the status payload of a known server.
+        
+        Args:
+            server_id (str): Server ID
+            server_info (dict): Registry record of the server
+            console_lines (int): Number of trailing console lines to include
+            
+        Returns:
+            dict: Server status information
+        """
+        is_running = server_id in self.running_servers
+        
         # Get last console lines if available
         last_console_lines = []
-        if server_id in self.console_buffers:
-            last_console_lines = self.console_buffers[server_id][-20:]  # Last 20 lines
+        if console_lines > 0 and server_id in self.console_buffers:
+            last_console_lines = self.console_buffers[server_id].tail_lines(console_lines)
+        
+        state = self.get_server_state(server_id)
         
         return {
             'id': server_id,
             'name': server_info['name'],
             'running': is_running,
-            'uptime': self._get_server_uptime(server_id) if is_running else 0,
+            'state': state['state'],
+            'uptime': state['uptime'],
+            'players': state['players'],
+            'player_count': state['player_count'],
             'console': last_console_lines
         }
 
@@ -229,9 +498,86 @@ class ServerManager:
         Returns:
             int: Uptime in seconds, or 0 if not running
         """
-        # This would need to track server start time
-        # For now, just return 0
-        return 0
+        with self._state_lock:
+            state = self.server_states.get(server_id)
+            if not state or server_id not in self.running_servers:
+                return 0
+            return int(time.time() - state['started_at'])
+
+    def _set_state(self, server_id, state, **changes):
+        """
+        Move a server to a new lifecycle state and publish the transition.
+        
+        Args:
+            server_id (str): Server ID
+            state (str): New state (starting, ready, stopping, stopped or crashed)
+            **changes: Other state fields to update
+        """
+        with self._state_lock:
+            server_state = self.server_states.setdefault(server_id, {
+                'started_at': time.time(),
+                'players': set(),
+                'stop_requested': False,
+                'exit_code': None
+            })
+            server_state['state'] = state
+            server_state.update(changes)
+        
+        self._emit_state(server_id)
+
+    def get_server_state(self, server_id):
+        """
+        Get the lifecycle state of a server.
+        
+        Args:
+            server_id (str): Server ID
+            
+        Returns:
+            dict: State, uptime and online players of the server
+        """
+        uptime = self._get_server_uptime(server_id)
+        
+        with self._state_lock:
+            server_state = self.server_states.get(server_id)
+            if not server_state:
+                return {
+                    'server_id': server_id,
+                    'state': 'stopped',
+                    'running': False,
+                    'uptime': 0,
+                    'players': [],
+                    'player_count': 0,
+                    'exit_code': None
+                }
+            
+            players = sorted(server_state['players'])
+            return {
+                'server_id': server_id,
+                'state': server_state['state'],
+                'running': server_id in self.running_servers,
+                'uptime': uptime,
+                'players': players,
+                'player_count': len(players),
+                'exit_code': server_state['exit_code']
+            }
+
+    def get_state_snapshot(self):
+        """
+        Get the lifecycle state of every known server.
+        
+        Returns:
+            list: State dictionaries, one per server
+        """
+        return [self.get_server_state(server['id']) for server in self.registry.get_all()]
+
+    def _emit_state(self, server_id):
+        """
+        Publish the current state of a server to connected clients.
+        
+        Args:
+            server_id (str): Server ID
+        """
+        self.socketio.emit('server_state', self.get_server_state(server_id))
 
     def get_server_properties(self, server_id):
         """
@@ -247,21 +593,8 @@ class ServerManager:
         if not server_path:
             return {}
         
-        properties = {}
-        properties_path = os.path.join(server_path, 'server.properties')
-        
-        if os.path.isfile(properties_path):
-            try:
-                with open(properties_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#'):
-                            key_value = line.split('=', 1)
-                            if len(key_value) == 2:
-                                key, value = key_value
-                                properties[key.strip()] = value.strip()
-            except Exception as e:
-                logger.error(f"Error reading server properties: {e}")
+        # Copy the cached properties, as the memory setting is added below
+        properties = dict(read_properties(os.path.join(server_path, 'server.properties')))
         
         # Add memory setting if available
         server_info_path = os.path.join(server_path, 'mcsm_info.json')
@@ -324,30 +657,12 @@ class ServerManager:
                 logger.error(f"Error updating server info: {e}")
                 return False
         
-        # Read existing properties
-        existing_properties = {}
+        # Rewrite only the changed lines, keeping comments and key order
         try:
-            if os.path.isfile(properties_path):
-                with open(properties_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#'):
-                            key_value = line.split('=', 1)
-                            if len(key_value) == 2:
-                                key, value = key_value
-                                existing_properties[key.strip()] = value.strip()
-        except Exception as e:
-            logger.error(f"Error reading server properties: {e}")
-            return False
-        
-        # Update properties
-        existing_properties.update(properties)
-        
-        # Write properties back to file
-        try:
-            with open(properties_path, 'w') as f:
-                for key, value in sorted(existing_properties.items()):
-                    f.write(f"{key}={value}\n")
+            write_properties(properties_path, properties)
+            
+            # Port, MOTD, world name etc. come from server.properties
+            self.registry.invalidate(server_id)
             return True
         except Exception as e:
             logger.error(f"Error writing server properties: {e}")
@@ -362,54 +677,189 @@ class ServerManager:
             path (str): Relative path within the server directory
             
         Returns:
-            list: List of file information dictionaries
+            list: List of file information dictionaries, directories first
         """
-        server_path = self.get_server_path(server_id)
-        if not server_path:
-            return []
+        page = self.list_server_files_page(server_id, path)
+        return page['files'] if page else []
+
+    def list_server_files_page(self, server_id, path='', cursor=None, limit=None, sort='name',
+                               descending=False, name_filter=None):
+        """
+        List one page of a server directory.
         
-        # Sanitize and resolve the requested path
-        requested_path = os.path.normpath(os.path.join(server_path, path))
+        Directories always come before files. Only the entries of the
+        requested page are ordered (with a bounded heap), so paging through a
+        directory with tens of thousands of files never sorts all of them.
         
-        # Ensure the path is within the server directory
-        if not requested_path.startswith(server_path):
-            logger.warning(f"Attempted to access path outside server directory: {requested_path}")
-            return []
+        Args:
+            server_id (str): Server ID
+            path (str): Relative path within the server directory
+            cursor (str): Cursor returned with the previous page
+            limit (int): Maximum entries returned (default: all)
+            sort (str): 'name', 'size' or 'modified'
+            descending (bool): Whether to sort in descending order
+            name_filter (str): Case-insensitive glob the names must match
+                (e.g. '*.jar')
         
-        # Check if path exists
-        if not os.path.exists(requested_path):
-            return []
+        Returns:
+            dict: 'files', 'total' matching entries and 'next_cursor' (None on
+                the last page), or None if the path is invalid
+        
+        Raises:
+            ValueError: If the sort key or cursor is invalid
+        """
+        if sort not in LISTING_SORT_KEYS:
+            raise ValueError(f"Sort must be one of {', '.join(LISTING_SORT_KEYS)}")
+        
+        requested_path = self.resolve_server_file(server_id, path)
+        if not requested_path or not os.path.exists(requested_path):
+            return None
+        
+        server_path = self.get_server_path(server_id)
         
         # If path is a file, return file info
         if os.path.isfile(requested_path):
-            return [{
-                'name': os.path.basename(requested_path),
-                'path': os.path.relpath(requested_path, server_path),
-                'type': 'file',
-                'size': os.path.getsize(requested_path)
-            }]
-        
-        # List directory contents
+            stat_result = os.stat(requested_path)
+            return {
+                'files': [{
+                    'name': os.path.basename(requested_path),
+                    'path': os.path.relpath(requested_path, server_path),
+                    'type': 'file',
+                    'size': stat_result.st_size,
+                    'modified': stat_result.st_mtime
+                }],
+                'total': 1,
+                'next_cursor': None
+            }
+        
+        entries = self._scan_directory(requested_path)
+        
+        if name_filter:
+            pattern = name_filter.lower()
+            entries = [entry for entry in entries if fnmatch.fnmatchcase(entry['name'].lower(), pattern)]
+        
+        total = len(entries)
+        
+        # Directories first, then the sort key, then the name as a tie-breaker
+        if descending:
+            def key(entry):
+                return (entry['type'] == 'directory', entry[sort], entry['name'])
+        else:
+            def key(entry):
+                return (entry['type'] == 'file', entry[sort], entry['name'])
+        
+        if cursor:
+            after = self._decode_cursor(cursor, sort, descending)
+            if descending:
+                entries = [entry for entry in entries if key(entry) < after]
+            else:
+                entries = [entry for entry in entries if key(entry) > after]
+        
+        if limit:
+            select = heapq.nlargest if descending else heapq.nsmallest
+            page = select(limit + 1, entries, key=key)
+        else:
+            page = sorted(entries, key=key, reverse=descending)
+        
+        next_cursor = None
+        if limit and len(page) > limit:
+            page = page[:limit]
+            next_cursor = self._encode_cursor(key(page[-1]), sort, descending)
+        
         files = []
+        for entry in page:
+            entry = dict(entry)
+            entry['path'] = os.path.relpath(os.path.join(requested_path, entry['name']), server_path)
+            files.append(entry)
+        
+        return {
+            'files': files,
+            'total': total,
+            'next_cursor': next_cursor
+        }
+
+    def _scan_directory(self, directory):
+        """
+        Read the entries of a directory with their size and modification time.
+        
+        os.scandir() gives the entry type without a stat call and caches the
+        one stat needed for size and time. The result is reused for a few
+        seconds while the directory itself is unchanged, so paging through a
+        large folder scans it once.
+        
+        Args:
+            directory (str): Absolute path of the directory
+        
+        Returns:
+            list: Entries with 'name', 'type', 'size' and 'modified' keys
+                (shared; copy before modifying)
+        """
         try:
-            for item in os.listdir(requested_path):
-                item_path = os.path.join(requested_path, item)
-                item_type = 'directory' if os.path.isdir(item_path) else 'file'
-                
-                # Skip certain directories like .git
-                if item.startswith('.'):
-                    continue
-                
-                files.append({
-                    'name': item,
-                    'path': os.path.relpath(item_path, server_path),
-                    'type': item_type,
-                    'size': os.path.getsize(item_path) if item_type == 'file' else 0
-                })
+            directory_mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        
+        now = time.monotonic()
+        with self._listing_lock:
+            cached = self._listing_cache.get(directory)
+            if cached and cached[0] == directory_mtime and now - cached[1] < LISTING_CACHE_SECONDS:
+                return cached[2]
+        
+        entries = []
+        try:
+            with os.scandir(directory) as iterator:
+                for item in iterator:
+                    # Skip certain directories like .git
+                    if item.name.startswith('.'):
+                        continue
+                    
+                    try:
+                        is_directory = item.is_dir()
+                        stat_result = item.stat()
+                    except OSError:
+                        # Broken symlink or removed while listing
+                        continue
+                    
+                    entries.append({
+                        'name': item.name,
+                        'type': 'directory' if is_directory else 'file',
+                        'size': 0 if is_directory else stat_result.st_size,
+                        'modified': stat_result.st_mtime
+                    })
         except Exception as e:
             logger.error(f"Error listing files: {e}")
+            return []
+        
+        with self._listing_lock:
+            self._listing_cache[directory] = (directory_mtime, now, entries)
+            self._listing_cache.move_to_end(directory)
+            while len(self._listing_cache) > LISTING_CACHE_SIZE:
+                self._listing_cache.popitem(last=False)
+        
+        return entries
+
+    def _encode_cursor(self, key, sort, descending):
+        """Build an opaque cursor pointing after an entry's sort key."""
+        data = json.dumps([sort, descending, list(key)]).encode('utf-8')
+        return base64.urlsafe_b64encode(data).decode('ascii')
+
+    def _decode_cursor(self, cursor, sort, descending):
+        """
+        Read the sort key from a cursor.
+        
+        Raises:
+            ValueError: If the cursor is malformed or from another sort order
+        """
+        try:
+            cursor_sort, cursor_descending, key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            key = tuple(key)
+        except Exception:
+            raise ValueError('Invalid cursor')
+        
+        if cursor_sort != sort or cursor_descending != descending or len(key) != 3:
+            raise ValueError('Cursor does not match the sort order')
         
-        return sorted(files, key=lambda x: (x['type'] == 'file', x['name']))
+        return key
 
     def get_server_file(self, server_id, path):
         """
@@ -422,74 +872,351 @@ class ServerManager:
         Returns:
             str: File content, or empty string if file cannot be read
         """
-        server_path = self.get_server_path(server_id)
-        if not server_path:
-            return ""
+        file = self.read_server_file(server_id, path)
+        return file['content'] if file else ""
+
+    def read_server_file(self, server_id, path):
+        """
+        Get the content of a server file with its version hash.
         
-        # Sanitize and resolve the requested path
-        file_path = os.path.normpath(os.path.join(server_path, path))
+        The hash is taken from the same bytes as the content, so it can be
+        passed back as the base of a patch_server_file() call.
         
-        # Ensure the path is within the server directory
-        if not file_path.startswith(server_path):
-            logger.warning(f"Attempted to access file outside server directory: {file_path}")
-            return ""
+        Args:
+            server_id (str): Server ID
+            path (str): Relative path to the file
+        
+        Returns:
+            dict: 'content' and 'hash' (None for binary files), or None if the
+                file cannot be read
+        """
+        file_path = self.resolve_server_file(server_id, path)
         
         # Check if file exists and is a file
-        if not os.path.isfile(file_path):
-            return ""
+        if not file_path or not os.path.isfile(file_path):
+            return None
         
         # Check if file is binary (avoid returning binary content)
         if self._is_binary_file(file_path):
-            return "Binary file - cannot display content"
+            return {'content': "Binary file - cannot display content", 'hash': None}
         
         # Read file content
         try:
-            with open(file_path, 'r', errors='replace') as f:
-                return f.read()
+            with open(file_path, 'rb') as f:
+                data = f.read()
         except Exception as e:
             logger.error(f"Error reading file {file_path}: {e}")
-            return ""
+            return None
+        
+        return {'content': data.decode('utf-8', errors='replace'), 'hash': content_hash(data)}
 
-    def update_server_file(self, server_id, path, content):
+    def update_server_file(self, server_id, path, content, base_hash=None):
         """
         Update the content of a server file.
         
+        With a base hash the file is only replaced if it still has the
+        version the content was based on, as in patch_server_file(); an
+        empty base hash means the file must not exist yet.
+        
         Args:
             server_id (str): Server ID
             path (str): Relative path to the file
             content (str): New file content
+            base_hash (str): Hash of the version the content was based on, or
+                None to overwrite whatever is there
             
         Returns:
-            bool: True if successful, False otherwise
+            dict: 'success', 'message' and 'hash' (the new hash, or the
+                current one on a conflict, which also sets 'conflict')
+        """
+        file_path = self.resolve_server_file(server_id, path)
+        if not file_path:
+            return {'success': False, 'message': 'Invalid path'}
+        
+        # Check if file is binary (avoid writing to binary files)
+        if os.path.exists(file_path) and self._is_binary_file(file_path):
+            logger.warning(f"Attempted to write to binary file: {file_path}")
+            return {'success': False, 'message': 'Cannot write a binary file'}
+        
+        data = content.encode('utf-8')
+        
+        # Write file content
+        try:
+            # Create directory if it doesn't exist
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            
+            with self._file_lock(file_path):
+                if base_hash is not None:
+                    try:
+                        with open(file_path, 'rb') as f:
+                            current_hash = content_hash(f.read())
+                    except FileNotFoundError:
+                        current_hash = ''
+                    
+                    if base_hash != current_hash:
+                        return {
+                            'success': False,
+                            'message': 'File has changed since it was opened',
+                            'conflict': True,
+                            'hash': current_hash or None
+                        }
+                
+                self._replace_file(file_path, data)
+            
+            # The edit may have touched server.properties, jars or mods
+            self.registry.invalidate(server_id)
+            return {'success': True, 'message': 'File saved', 'hash': content_hash(data)}
+        except Exception as e:
+            logger.error(f"Error writing file {file_path}: {e}")
+            return {'success': False, 'message': str(e)}
+
+    def view_server_file(self, server_id, path, mode='lines', offset=0, length=65536, line=0,
+                         count=200, tail_offset=None):
+        """
+        Read a window of a server file without loading the whole file.
+        
+        Args:
+            server_id (str): Server ID
+            path (str): Relative path to the file
+            mode (str): 'lines' for a range of lines, 'bytes' for a byte
+                range, or 'tail' for the end of the file
+            offset (int): First byte ('bytes' mode)
+            length (int): Number of bytes ('bytes' mode)
+            line (int): First line, negative to count from the end ('lines' mode)
+            count (int): Number of lines ('lines' mode), or lines to start
+                from ('tail' mode)
+            tail_offset (int): Offset read up to by the previous tail read, to
+                get only what has been appended since ('tail' mode)
+        
+        Returns:
+            dict: The window (see FileViewer), or None if the file does not exist
+        
+        Raises:
+            ValueError: If the mode is unknown or the file is binary
+        """
+        if mode not in ('lines', 'bytes', 'tail'):
+            raise ValueError(f"Unknown view mode '{mode}'")
+        
+        file_path = self.resolve_server_file(server_id, path)
+        if not file_path or not os.path.isfile(file_path):
+            return None
+        
+        if self._is_binary_file(file_path):
+            raise ValueError('Binary file - cannot display content')
+        
+        try:
+            if mode == 'bytes':
+                return self.file_viewer.read_bytes(file_path, offset, length)
+            if mode == 'tail':
+                return self.file_viewer.tail(file_path, count, tail_offset)
+            return self.file_viewer.read_lines(file_path, line, count)
+        except FileNotFoundError:
+            return None
+
+    def patch_server_file(self, server_id, path, base_hash, diff=None, edits=None):
+        """
+        Apply changes to a server file without sending its whole content.
+        
+        The patch only applies if the file still has the version it was
+        made against, so when two people edit the same file the second
+        save is rejected instead of silently overwriting the first. The
+        check and the write happen under a per-file lock and the result is
+        renamed into place, so readers never see a partial file.
+        
+        Args:
+            server_id (str): Server ID
+            path (str): Relative path to the file
+            base_hash (str): Hash of the version the changes were made against
+            diff (str): Unified diff to apply
+            edits (list): Line-range edits to apply instead of a diff (see
+                apply_line_edits)
+        
+        Returns:
+            dict: 'success', 'message' and 'hash' (the new hash, or the
+                current one on a conflict, which also sets 'conflict'), or
+                None if the file does not exist
+        """
+        file_path = self.resolve_server_file(server_id, path)
+        if not file_path or not os.path.isfile(file_path):
+            return None
+        
+        if (diff is None) == (edits is None):
+            return {'success': False, 'message': 'Send either a diff or edits'}
+        
+        if self._is_binary_file(file_path):
+            return {'success': False, 'message': 'Cannot patch a binary file'}
+        
+        with self._file_lock(file_path):
+            try:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+            except Exception as e:
+                logger.error(f"Error reading file {file_path}: {e}")
+                return {'success': False, 'message': str(e)}
+            
+            current_hash = content_hash(data)
+            if base_hash != current_hash:
+                return {
+                    'success': False,
+                    'message': 'File has changed since it was opened',
+                    'conflict': True,
+                    'hash': current_hash
+                }
+            
+            try:
+                if diff is not None:
+                    text = apply_unified_diff(decode(data), diff)
+                else:
+                    text = apply_line_edits(decode(data), edits)
+            except ValueError as e:
+                return {'success': False, 'message': str(e)}
+            
+            patched = encode(text)
+            if patched != data:
+                try:
+                    self._replace_file(file_path, patched)
+                except Exception as e:
+                    logger.error(f"Error writing file {file_path}: {e}")
+                    return {'success': False, 'message': str(e)}
+        
+        # The edit may have touched server.properties, jars or mods
+        self.registry.invalidate(server_id)
+        return {'success': True, 'message': 'File saved', 'hash': content_hash(patched)}
+
+    @contextmanager
+    def _file_lock(self, file_path):
+        """
+        Hold the lock that serializes writes to a file.
+        
+        Locks only exist while someone holds or waits for them, so the
+        table does not grow with every file ever written.
+        """
+        with self._file_locks_lock:
+            entry = self._file_locks.setdefault(file_path, [threading.Lock(), 0])
+            entry[1] += 1
+        
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._file_locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._file_locks[file_path]
+
+    def _replace_file(self, file_path, data):
+        """
+        Write a file through a temporary file renamed over it, keeping its mode.
+        
+        Args:
+            file_path (str): Path to the file
+            data (bytes): New file contents
+        """
+        mode = os.stat(file_path).st_mode & 0o7777 if os.path.exists(file_path) else 0o644
+        fd, temp_path = tempfile.mkstemp(prefix='.save-', suffix='.tmp', dir=os.path.dirname(file_path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def resolve_server_file(self, server_id, path):
+        """
+        Resolve a path inside a server directory.
+        
+        Args:
+            server_id (str): Server ID
+            path (str): Relative path within the server directory
+        
+        Returns:
+            str: Absolute path, or None if the server does not exist or the
+                path leads outside its directory
         """
         server_path = self.get_server_path(server_id)
         if not server_path:
-            return False
+            return None
         
         # Sanitize and resolve the requested path
         file_path = os.path.normpath(os.path.join(server_path, path))
         
         # Ensure the path is within the server directory
-        if not file_path.startswith(server_path):
+        if file_path != server_path and not file_path.startswith(server_path + os.sep):
             logger.warning(f"Attempted to access file outside server directory: {file_path}")
-            return False
+            return None
         
-        # Check if file is binary (avoid writing to binary files)
-        if os.path.exists(file_path) and self._is_binary_file(file_path):
-            logger.warning(f"Attempted to write to binary file: {file_path}")
-            return False
+        return file_path
+
+    def write_server_file_stream(self, server_id, path, stream, chunk_size=1048576, max_size=0):
+        """
+        Write a server file from a stream without holding it in memory.
         
-        # Write file content
+        The data is copied in chunks to a temporary file next to the target,
+        which replaces the target only once everything has been written, so
+        an interrupted upload never leaves a truncated file behind.
+        
+        Args:
+            server_id (str): Server ID
+            path (str): Relative path to the file
+            stream: Readable binary stream (e.g. the request body)
+            chunk_size (int): Bytes copied at a time
+            max_size (int): Largest accepted file in bytes (0 for no limit)
+        
+        Returns:
+            dict: 'success', 'message' and, on success, 'size'
+        """
+        file_path = self.resolve_server_file(server_id, path)
+        if not file_path or file_path == self.get_server_path(server_id):
+            return {'success': False, 'message': 'Invalid file path'}
+        
+        if os.path.isdir(file_path):
+            return {'success': False, 'message': 'Path is a directory'}
+        
+        directory = os.path.dirname(file_path)
         try:
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.makedirs(directory, exist_ok=True)
+            mode = os.stat(file_path).st_mode & 0o7777 if os.path.exists(file_path) else 0o644
+            fd, temp_path = tempfile.mkstemp(prefix='.upload-', suffix='.tmp', dir=directory)
+        except Exception as e:
+            logger.error(f"Error preparing upload of {file_path}: {e}")
+            return {'success': False, 'message': str(e)}
+        
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size and size > max_size:
+                        raise ValueError(f'File is larger than {max_size} bytes')
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
             
-            with open(file_path, 'w') as f:
-                f.write(content)
-            return True
+            # Never lands between the hash check and the write of a patch
+            with self._file_lock(file_path):
+                os.chmod(temp_path, mode)
+                os.replace(temp_path, file_path)
         except Exception as e:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
             logger.error(f"Error writing file {file_path}: {e}")
-            return False
+            return {'success': False, 'message': str(e)}
+        
+        # The upload may have replaced server.properties, jars or mods
+        self.registry.invalidate(server_id)
+        return {'success': True, 'message': 'File uploaded', 'size': size}
 
     def _is_binary_file(self, file_path, sample_size=1024):
         """
@@ -515,20 +1242,199 @@ class ServerManager:
         except Exception:
             return False
 
-    def attach_console(self, server_id):
+    def attach_console(self, server_id, sid, since=None):
         """
         Attach to a server's console output.
         
+        The client receives the buffered history it has not seen yet and then
+        every new batch of console lines for the server. Live batches are held
+        back until the history has been sent, so they always come after it;
+        the two may overlap by a few lines and clients skip sequence numbers
+        they already have.
+        
         Args:
             server_id (str): Server ID
+            sid (str): Socket.IO session ID of the client
+            since (int): Last sequence number the client has seen, or None
         """
-        # Send the console buffer to the client
-        if server_id in self.console_buffers:
-            for line in self.console_buffers[server_id]:
-                self.socketio.emit('console_output', {
-                    'server_id': server_id,
-                    'line': line
-                })
+        self.console_pipeline.subscribe(server_id, sid, hold=True)
+        
+        # Send the missed part of the console buffer to the client
+        buffer = self.console_buffers.get(server_id)
+        if buffer is None:
+            self.console_pipeline.send_history(server_id, sid, [])
+            return
+        
+        reset = False
+        dropped = 0
+        backfill = []
+        if since is not None:
+            if since >= buffer.next_seq:
+                # The cursor belongs to an earlier run of the manager
+                since = None
+                reset = True
+            elif since + 1 < buffer.first_seq:
+                # Fill the gap from the journal, up to one buffer's worth
+                journal = self._get_journal(server_id)
+                gap_start = max(since + 1, buffer.first_seq - buffer.capacity)
+                if journal:
+                    gap_start = max(gap_start, journal.first_seq)
+                    backfill = journal.read(gap_start, buffer.first_seq - gap_start)
+                dropped = (backfill[0]['seq'] if backfill else buffer.first_seq) - since - 1
+        
+        entries = backfill + buffer.since(since)
+        self.console_pipeline.send_history(server_id, sid, entries, dropped=dropped, reset=reset)
+
+    def _get_journal(self, server_id):
+        """
+        Get the console journal of a server, opening it on first use.
+        
+        Args:
+            server_id (str): Server ID
+            
+        Returns:
+            ConsoleJournal: The journal, or None if journaling is disabled or
+                the server is unknown
+        """
+        if not self.journal_enabled:
+            return None
+        
+        journal = self.console_journals.get(server_id)
+        if journal:
+            return journal
+        
+        server_path = self.get_server_path(server_id)
+        if not server_path:
+            return None
+        
+        try:
+            journal = ConsoleJournal(
+                os.path.join(server_path, '.mcsm', 'console'),
+                segment_lines=self.journal_segment_lines,
+                max_segments=self.journal_max_segments
+            )
+        except Exception as e:
+            logger.error(f"Error opening console journal for server {server_id}: {e}")
+            return None
+        
+        return self.console_journals.setdefault(server_id, journal)
+
+    def search_console(self, server_id, pattern=None, level=None, thread=None,
+                       start_time=None, end_time=None, start_seq=None, limit=1000):
+        """
+        Search a server's console history.
+        
+        The on-disk journal is searched when available, otherwise the
+        in-memory buffer. Level and thread come from the prefix parsed when
+        each line was read, so filtering does not re-parse text.
+        
+        Args:
+            server_id (str): Server ID
+            pattern (re.Pattern): Compiled regex the line must match
+            level (str): Minimum log level (e.g. WARN also matches ERROR and FATAL)
+            thread (str): Exact thread name
+            start_time (float): Earliest Unix time
+            end_time (float): Latest Unix time
+            start_seq (int): Earliest sequence number
+            limit (int): Maximum number of matches
+            
+        Yields:
+            dict: Matching entries, oldest first
+            
+        Raises:
+            ValueError: If level is not one of LEVELS
+        """
+        if level is not None and level not in LEVELS:
+            raise ValueError(f'Unknown log level: {level}')
+        levels = set(LEVELS[LEVELS.index(level):]) if level is not None else None
+        
+        journal = self._get_journal(server_id)
+        if journal:
+            entries = journal.scan(start_seq, start_time, end_time)
+        elif server_id in self.console_buffers:
+            since = start_seq - 1 if start_seq is not None else None
+            entries = self.console_buffers[server_id].since(since)
+        else:
+            return
+        
+        matches = 0
+        for entry in entries:
+            if levels is not None and entry['level'] not in levels:
+                continue
+            if thread is not None and entry['thread'] != thread:
+                continue
+            if start_time is not None and entry['time'] < start_time:
+                continue
+            if end_time is not None and entry['time'] > end_time:
+                break
+            if pattern is not None and not pattern.search(entry['line']):
+                continue
+            
+            yield entry
+            matches += 1
+            if matches >= limit:
+                break
+
+    def get_console_history(self, server_id, start=None, count=100):
+        """
+        Get console lines from a server's on-disk journal.
+        
+        Args:
+            server_id (str): Server ID
+            start (int): Sequence number of the first line, or None for the
+                newest lines
+            count (int): Maximum number of lines
+            
+        Returns:
+            dict: Entries plus the journal's first and next sequence numbers,
+                or None if no journal is available
+        """
+        journal = self._get_journal(server_id)
+        if not journal:
+            return None
+        
+        if start is None:
+            entries = journal.tail(count)
+        else:
+            entries = journal.read(start, count)
+        
+        return {
+            'entries': entries,
+            'first_seq': journal.first_seq,
+            'next_seq': journal.next_seq
+        }
+
+    def get_console(self, server_id, since=None, limit=100):
+        """
+        Get buffered console entries of a server.
+        
+        Args:
+            server_id (str): Server ID
+            since (int): Last sequence number the caller has seen; None returns
+                the newest lines
+            limit (int): Maximum number of entries
+            
+        Returns:
+            list: Entries with 'seq', 'time' and 'line' keys, or None if the
+                server has no console buffer
+        """
+        buffer = self.console_buffers.get(server_id)
+        if buffer is None:
+            return None
+        
+        if since is None:
+            return buffer.tail(limit)
+        return buffer.since(since, limit)
+
+    def detach_console(self, server_id, sid):
+        """
+        Detach a client from a server's console output.
+        
+        Args:
+            server_id (str): Server ID
+            sid (str): Socket.IO session ID of the client
+        """
+        self.console_pipeline.unsubscribe(server_id, sid)
 
     def send_command(self, server_id, command):
         """
@@ -548,50 +1454,96 @@ class ServerManager:
         process = self.running_servers[server_id]
         
         try:
-            process.stdin.write(f"{command}\n")
+            process.stdin.write(f"{command}\n".encode('utf-8'))
             process.stdin.flush()
             return True
         except Exception as e:
             logger.error(f"Error sending command to server {server_id}: {e}")
             return False
 
-    def _read_console(self, server_id):
+    def _handle_console_lines(self, server_id, lines):
         """
-        Read console output from a running server process.
+        Store, journal and publish console lines read from a server.
         
         Args:
             server_id (str): Server ID
+            lines (list): Console lines, oldest first
         """
-        if server_id not in self.running_servers:
+        buffer = self.console_buffers[server_id]
+        entries = [buffer.append(line) for line in lines]
+        
+        CONSOLE_LINES.inc(len(lines), server_id=server_id)
+        CONSOLE_BYTES.inc(sum(len(line.encode('utf-8')) + 1 for line in lines), server_id=server_id)
+        
+        # One journal write for the whole chunk
+        journal = self._get_journal(server_id)
+        if journal:
+            journal.append(entries)
+        
+        for entry in entries:
+            # Queue line for clients watching this server's console
+            self.console_pipeline.publish(server_id, entry)
+            
+            self._track_console_line(server_id, entry['line'])
+            
+            for parser in self.line_parsers:
+                try:
+                    parser.feed(server_id, entry)
+                except Exception as e:
+                    logger.error(f"Error in console parser {type(parser).__name__}: {e}")
+
+    def _handle_console_close(self, server_id, process):
+        """
+        Handle the end of a server's console output.
+        
+        This runs on the reactor's single closer thread, so the wait for the
+        exit code is bounded. A process that closed its output but keeps
+        running is waited for on its own thread instead, so it cannot hold up
+        the other servers.
+        
+        Args:
+            server_id (str): Server ID
+            process (subprocess.Popen): Server process whose output ended
+        """
+        try:
+            process.wait(timeout=CONSOLE_CLOSE_WAIT)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Server {server_id} closed its console but is still running, "
+                           f"waiting for it in the background")
+            threading.Thread(target=self._finish_console_close, args=(server_id, process),
+                             name=f'mcsm-exit-{server_id}', daemon=True).start()
             return
         
-        process = self.running_servers[server_id]
+        self._finish_console_close(server_id, process)
+
+    def _finish_console_close(self, server_id, process):
+        """
+        Record the exit of a server whose console output has ended.
         
+        Args:
+            server_id (str): Server ID
+            process (subprocess.Popen): Server process whose output ended
+        """
         try:
-            # Read lines from the process output
-            for line in iter(process.stdout.readline, ''):
-                line = line.rstrip()
-                
-                # Store line in buffer
-                self.console_buffers[server_id].append(line)
-                
-                # Keep buffer at reasonable size
-                if len(self.console_buffers[server_id]) > 1000:
-                    self.console_buffers[server_id] = self.console_buffers[server_id][-1000:]
-                
-                # Emit line to connected clients
-                self.socketio.emit('console_output', {
-                    'server_id': server_id,
-                    'line': line
-                })
-                
-                # Check if process is still running
-                if process.poll() is not None:
-                    break
+            # Process has terminated, collect its exit code
+            exit_code = process.wait()
+            process.stdout.close()
             
-            # Process has terminated
-            if server_id in self.running_servers:
+            journal = self.console_journals.get(server_id)
+            if journal:
+                journal.close()
+            if self.running_servers.get(server_id) is process:
                 del self.running_servers[server_id]
+            
+            with self._state_lock:
+                stop_requested = self.server_states.get(server_id, {}).get('stop_requested', False)
+            
+            # A non-zero exit that nobody asked for is a crash
+            if stop_requested or exit_code == 0:
+                self._set_state(server_id, 'stopped', exit_code=exit_code, players=set())
+            else:
+                logger.warning(f"Server {server_id} exited unexpectedly with code {exit_code}")
+                self._set_state(server_id, 'crashed', exit_code=exit_code, players=set())
                 
             # Emit termination notice
             self.socketio.emit('server_stopped', {
@@ -599,4 +1551,32 @@ class ServerManager:
             })
             
         except Exception as e:
-            logger.error(f"Error reading console output: {e}")
\ No newline at end of file
+            logger.error(f"Error handling end of console output: {e}")
+
+    def _track_console_line(self, server_id, line):
+        """
+        Update lifecycle state and online players from a console line.
+        
+        Args:
+            server_id (str): Server ID
+            line (str): Console line
+        """
+        if DONE_PATTERN.search(line):
+            with self._state_lock:
+                starting = self.server_states[server_id]['state'] == 'starting'
+            if starting:
+                self._set_state(server_id, 'ready')
+            return
+        
+        match = JOIN_PATTERN.search(line)
+        if match:
+            with self._state_lock:
+                self.server_states[server_id]['players'].add(match.group(1))
+            self._emit_state(server_id)
+            return
+        
+        match = LEAVE_PATTERN.search(line)
+        if match:
+            with self._state_lock:
+                self.server_states[server_id]['players'].discard(match.group(1))
+            self._emit_state(server_id)
@@ -0,0 +1,153 @@
+import os
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Parsed properties files keyed by path, with the (mtime, size) they were read at
+_cache = {}
+_cache_lock = threading.Lock()
+
+def parse_properties(text):
+    """
+    Parse the contents of a properties file.
+
+    Args:
+        text (str): File contents
+
+    Returns:
+        dict: Property values keyed by name, in file order
+    """
+    properties = {}
+
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            key_value = line.split('=', 1)
+            if len(key_value) == 2:
+                key, value = key_value
+                properties[key.strip()] = value.strip()
+
+    return properties
+
+def _signature(stat_result):
+    """Get what identifies one version of a file for the cache."""
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+def read_properties(path):
+    """
+    Read a properties file, reusing the parsed result while the file is unchanged.
+
+    The file is only read again when its modification time or size
+    changes. The returned dictionary is shared between callers and must not
+    be modified; copy it first.
+
+    Args:
+        path (str): Path to the properties file
+
+    Returns:
+        dict: Property values keyed by name (empty if the file does not exist)
+    """
+    try:
+        signature = _signature(os.stat(path))
+    except OSError:
+        with _cache_lock:
+            _cache.pop(path, None)
+        return {}
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    try:
+        with open(path, 'r') as f:
+            properties = parse_properties(f.read())
+    except Exception as e:
+        logger.error(f"Error reading properties file {path}: {e}")
+        return {}
+
+    with _cache_lock:
+        _cache[path] = (signature, properties)
+
+    return properties
+
+def write_properties(path, updates):
+    """
+    Set properties in a file, creating it if needed.
+
+    Existing lines, comments and key order are kept; only the lines of
+    changed keys are rewritten and new keys are appended, so a save is a
+    minimal diff. The file is written to a temporary file and renamed into
+    place, so readers never see a partial file, and the cache is updated
+    with the result.
+
+    Args:
+        path (str): Path to the properties file
+        updates (dict): Property values to set, keyed by name
+
+    Returns:
+        dict: Properties of the file after the update
+
+    Raises:
+        OSError: If the file cannot be read or written
+    """
+    updates = {str(key): str(value) for key, value in updates.items()}
+
+    try:
+        with open(path, 'r') as f:
+            lines = f.readlines()
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        lines = []
+        mode = 0o644
+
+    output = []
+    seen = set()
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith('#') and '=' in stripped:
+            key = stripped.split('=', 1)[0].strip()
+            if key in updates:
+                seen.add(key)
+                if stripped.split('=', 1)[1].strip() != updates[key]:
+                    line = f"{key}={updates[key]}\n"
+        output.append(line)
+
+    added = [key for key in updates if key not in seen]
+    if added and output and not output[-1].endswith('\n'):
+        output[-1] += '\n'
+    for key in added:
+        output.append(f"{key}={updates[key]}\n")
+
+    text = ''.join(output)
+
+    if output != lines:
+        directory = os.path.dirname(path) or '.'
+        fd, temp_path = tempfile.mkstemp(prefix='.server.properties.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    properties = parse_properties(text)
+
+    # No updates for a file that does not exist: nothing was written
+    if not output and not lines and not os.path.exists(path):
+        return properties
+
+    with _cache_lock:
+        _cache[path] = (_signature(os.stat(path)), properties)
+
+    return properties
@@ -0,0 +1,190 @@
+import os
+import time
+import logging
+import threading
+from utils.server_detector import detect_servers, is_minecraft_server, get_server_info
+from utils.disk_usage import get_disk_usage
+from utils.prometheus import Histogram, Gauge
+
+logger = logging.getLogger(__name__)
+
+SCAN_DURATION = Histogram('mcsm_server_scan_duration_seconds', 'Time spent in full detect_servers() scans')
+SERVERS_DETECTED = Gauge('mcsm_servers_detected', 'Servers found by the last full scan')
+
+class ServerRegistry:
+    """
+    In-memory index of the servers found in the servers directory.
+
+    The registry performs a full detect_servers() scan on first use and then
+    answers lookups from an id -> record index. Individual servers can be
+    refreshed or dropped without rescanning the whole directory.
+    """
+
+    def __init__(self, servers_dir, refresh_interval=30):
+        """
+        Initialize the server registry.
+
+        Args:
+            servers_dir (str): Directory containing server folders
+            refresh_interval (int): Maximum age in seconds of the index before a
+                listing triggers a full rescan (0 disables periodic rescans)
+        """
+        self.servers_dir = servers_dir
+        self.refresh_interval = refresh_interval
+        self.watched = False  # Set while a discovery watcher keeps the index current
+        self._servers = {}  # Server records keyed by server ID
+        self._ids_by_name = {}  # Server IDs keyed by folder name
+        self._last_refresh = None
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        """
+        Rebuild the whole index with a full scan of the servers directory.
+
+        Returns:
+            int: Number of servers found
+        """
+        with SCAN_DURATION.time():
+            servers = detect_servers(self.servers_dir)
+        SERVERS_DETECTED.set(len(servers))
+
+        with self._lock:
+            self._servers = {server['id']: server for server in servers}
+            self._ids_by_name = {server['name']: server['id'] for server in servers}
+            self._last_refresh = time.time()
+
+        logger.debug(f"Indexed {len(servers)} servers in {self.servers_dir}")
+        return len(servers)
+
+    def _ensure_fresh(self):
+        """Run a full scan if the index was never built or has gone stale."""
+        if self._last_refresh is None:
+            self.refresh()
+        elif self.watched:
+            return
+        elif self.refresh_interval and time.time() - self._last_refresh > self.refresh_interval:
+            self.refresh()
+
+    def get(self, server_id):
+        """
+        Get a server record by its ID.
+
+        Args:
+            server_id (str): Server ID
+
+        Returns:
+            dict: Copy of the server record, or None if not found
+        """
+        self._ensure_fresh()
+
+        with self._lock:
+            server = self._servers.get(server_id)
+
+        return self._copy(server) if server else None
+
+    def get_path(self, server_id):
+        """
+        Get the path to a server by its ID.
+
+        Args:
+            server_id (str): Server ID
+
+        Returns:
+            str: Path to the server directory, or None if not found
+        """
+        if self._last_refresh is None:
+            self.refresh()
+
+        with self._lock:
+            server = self._servers.get(server_id)
+
+        return server['path'] if server else None
+
+    def get_all(self):
+        """
+        Get all indexed servers.
+
+        Returns:
+            list: Copies of all server records
+        """
+        self._ensure_fresh()
+
+        with self._lock:
+            servers = list(self._servers.values())
+
+        return [self._copy(server) for server in servers]
+
+    def _copy(self, server):
+        """Copy a server record with its latest disk usage."""
+        server = dict(server)
+        server['disk_usage'] = get_disk_usage(server['path'])
+        return server
+
+    def find_by_tag(self, tag):
+        """
+        Get the servers carrying a tag.
+
+        Args:
+            tag (str): Tag name
+
+        Returns:
+            list: Copies of the matching server records
+        """
+        return [server for server in self.get_all() if tag in server.get('tags', [])]
+
+    def update_server(self, server_name):
+        """
+        Recompute the record of a single server folder.
+
+        The folder is added to the index if it now looks like a Minecraft
+        server, and dropped from it if it no longer does.
+
+        Args:
+            server_name (str): Name of the server directory
+
+        Returns:
+            dict: The updated server record, or None if the folder is not a server
+        """
+        server_path = os.path.join(self.servers_dir, server_name)
+
+        if not os.path.isdir(server_path) or not is_minecraft_server(server_path):
+            self.remove_server(server_name)
+            return None
+
+        server_info = get_server_info(server_path, server_name)
+
+        with self._lock:
+            self._servers[server_info['id']] = server_info
+            self._ids_by_name[server_name] = server_info['id']
+
+        return dict(server_info)
+
+    def invalidate(self, server_id):
+        """
+        Recompute the record of a server after its files have changed.
+
+        Args:
+            server_id (str): Server ID
+
+        Returns:
+            dict: The updated server record, or None if the server is gone
+        """
+        with self._lock:
+            server = self._servers.get(server_id)
+
+        if not server:
+            return None
+
+        return self.update_server(server['name'])
+
+    def remove_server(self, server_name):
+        """
+        Drop a server folder from the index.
+
+        Args:
+            server_name (str): Name of the server directory
+        """
+        with self._lock:
+            server_id = self._ids_by_name.pop(server_name, None)
+            if server_id:
+                self._servers.pop(server_id, None)